@@ -0,0 +1,44 @@
+"""Measure the import time of github_analyser and its submodules.
+
+Each import runs in a fresh interpreter with `-X importtime`, and the cumulative time
+of the top-level import is reported. Run with `python scripts/import_time_benchmark.py`.
+"""
+from __future__ import annotations
+
+import statistics
+import subprocess
+import sys
+
+import github_analyser
+
+REPEATS = 5
+
+
+def import_time_us(module: str) -> int:
+    """Return the cumulative import time of `module` in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        _, _, cumulative, name = (x.strip() for x in line.replace(":", "|").split("|"))
+        if name == module:
+            return int(cumulative)
+    msg = f"No import time reported for {module}."
+    raise RuntimeError(msg)
+
+
+def main():
+    modules = ["github_analyser"] + [
+        f"github_analyser.{name}" for name in sorted(github_analyser._SUBMODULES)
+    ]
+    modules.append("pandas")  # For reference.
+    for module in modules:
+        times = [import_time_us(module) for _ in range(REPEATS)]
+        print(f"{module:40} {statistics.median(times) / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare the time to decode a page of issues with json and orjson.
+
+The page mimics a response to the issues query of `github_analyser.issues`: 100 issues,
+each with 100 comments. Also reports how much the page shrinks with gzip, which is what
+GitHub uses when the request asks for compressed transfer. Run with
+`python scripts/json_decode_benchmark.py`.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import string
+import timeit
+
+import orjson
+
+ISSUES_PER_PAGE = 100
+COMMENTS_PER_ISSUE = 100
+REPEATS = 20
+
+
+def _text(length: int) -> str:
+    words = (
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(2, 10)))
+        for _ in range(length // 6)
+    )
+    return " ".join(words)
+
+
+def make_page() -> bytes:
+    """Build a JSON encoded issues page."""
+    logins = [f"user-{i}" for i in range(50)]
+    edges = []
+    for i in range(ISSUES_PER_PAGE):
+        comments = [
+            {
+                "node": {
+                    "author": {"login": random.choice(logins)},
+                    "createdAt": "2024-02-29T12:12:22Z",
+                    "body": _text(400),
+                }
+            }
+            for _ in range(COMMENTS_PER_ISSUE)
+        ]
+        edges.append(
+            {
+                "node": {
+                    "title": f"Issue {i}",
+                    "body": _text(1000),
+                    "createdAt": "2024-02-29T12:11:12Z",
+                    "closedAt": None,
+                    "author": {"login": random.choice(logins)},
+                    "comments": {"totalCount": len(comments), "edges": comments},
+                    "labels": {"totalCount": 1, "edges": [{"node": {"name": "bug"}}]},
+                }
+            }
+        )
+    page = {
+        "data": {
+            "repository": {
+                "issues": {
+                    "pageInfo": {"endCursor": "abc", "hasNextPage": True},
+                    "edges": edges,
+                }
+            }
+        }
+    }
+    return json.dumps(page).encode()
+
+
+def main():
+    random.seed(0)
+    content = make_page()
+    print(f"Page size: {len(content) / 1e6:.1f} MB")
+    print(f"gzip size: {len(gzip.compress(content)) / 1e6:.1f} MB")
+    for name, loads in [("json", json.loads), ("orjson", orjson.loads)]:
+        seconds = min(
+            timeit.repeat(lambda f=loads: f(content), number=1, repeat=REPEATS)
+        )
+        print(f"{name:8} {seconds * 1000:8.1f} ms per page")
+
+
+if __name__ == "__main__":
+    main()
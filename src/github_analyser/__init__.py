@@ -3,5 +3,53 @@ github-analyser:
 """
 from __future__ import annotations
 
+import importlib
+from typing import Any
+
 __all__ = ("__version__",)
 __version__ = "0.1.0"
+
+# Submodules are only imported when first accessed as attributes of the package, so
+# that `import github_analyser` stays cheap. Nothing in the package imports pandas at
+# module level; it is loaded when a DataFrame is first built.
+_SUBMODULES = frozenset(
+    {
+        "activity",
+        "archive",
+        "bulk",
+        "cli",
+        "cache",
+        "commits",
+        "crawl",
+        "dictionaries",
+        "extraction",
+        "events",
+        "issues",
+        "licences",
+        "loaders",
+        "metrics",
+        "org_user_info",
+        "output",
+        "planner",
+        "pull_requests",
+        "repo_contributors",
+        "repo_stats",
+        "repo_user_info",
+        "repos",
+        "scheduler",
+        "search",
+        "team_user_info",
+        "utils",
+    }
+)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | _SUBMODULES)
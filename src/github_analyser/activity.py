@@ -0,0 +1,242 @@
+"""Incremental aggregation of per-person activity across repositories.
+
+`ActivityAggregator` keeps running counts of commits, issues opened, pull requests
+authored, reviews and comments, per user, per repository and per time period. Rows
+from `get_commits`, `get_issues` and `get_pull_requests` are added as they arrive, in
+any of the output formats, and the activity table is available at any time without
+rescanning the data added before.
+
+Every issue and pull request is remembered by its ID, and every commit by its hash,
+together with the counts it contributed. Adding the same item again, for instance because it has new comments
+since the last crawl, replaces its earlier contribution instead of counting it twice.
+The state can be saved to and loaded from a JSON file, so that a daily job only needs
+to add what changed since the day before.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+from pathlib import Path
+from typing import Any
+
+from github_analyser.output import check_output, columns_from, to_output
+from github_analyser.utils import github_timestamp
+
+ACTIVITIES = ("commits", "issues_opened", "prs_authored", "reviews", "comments")
+PERIODS = ("day", "week", "month", "year")
+
+ACTIVITY_SCHEMA = {
+    "login": "login",
+    "repo": "string",
+    "period": "string",
+    **{activity: "int" for activity in ACTIVITIES},
+}
+
+_COMMITS, _ISSUES_OPENED, _PRS_AUTHORED, _REVIEWS, _COMMENTS = range(len(ACTIVITIES))
+
+
+def period_of(timestamp: str, period: str) -> str:
+    """Get the period an ISO 8601 timestamp falls in, in UTC.
+
+    Args:
+        timestamp: A timestamp as returned by GitHub, e.g. "2024-02-29T12:11:12Z",
+            or with a UTC offset, as the dates of commits are.
+        period: One of "day" ("2024-02-29"), "week" ("2024-W09"), "month" ("2024-02")
+            or "year" ("2024").
+
+    Returns:
+        str: The label of the period.
+    """
+    if not timestamp.endswith("Z"):
+        # Commit dates keep the offset of their author, other timestamps are in UTC.
+        timestamp = github_timestamp(timestamp)
+    if period == "month":
+        return timestamp[:7]
+    if period == "day":
+        return timestamp[:10]
+    if period == "year":
+        return timestamp[:4]
+    if period == "week":
+        year, week, _ = datetime.date.fromisoformat(timestamp[:10]).isocalendar()
+        return f"{year}-W{week:02d}"
+    msg = f"Unknown period {period!r}, must be one of {PERIODS}."
+    raise ValueError(msg)
+
+
+class ActivityAggregator:
+    """Running per-user, per-repository, per-period activity counts.
+
+    Comments and reviews are counted in the period in which they were made, from the
+    comment_dates and review_dates columns of the getters, and in the period in which
+    their issue or pull request was created if their own timestamp is missing.
+    Activity by deleted users, and commits whose author has no GitHub account, is not
+    counted.
+
+    Args:
+        period: The length of the periods to count over, in UTC, one of "day",
+            "week", "month" or "year". Defaults to "month".
+    """
+
+    def __init__(self, period: str = "month") -> None:
+        if period not in PERIODS:
+            msg = f"Unknown period {period!r}, must be one of {PERIODS}."
+            raise ValueError(msg)
+        self.period = period
+        # (login, repo, period) -> one count per activity.
+        self._counts: dict[tuple[str, str, str], list[int]] = {}
+        # (kind, repo, item ID) -> the (login, period, activity) triples it added.
+        self._contributions: dict[tuple[str, str, str], list[tuple[str, str, int]]] = {}
+
+    def __len__(self) -> int:
+        """The number of (login, repo, period) rows with any activity."""
+        return len(self._counts)
+
+    def _apply(self, repo: str, contributions: list[tuple[str, str, int]], sign: int):
+        for login, period, activity in contributions:
+            key = (login, repo, period)
+            counts = self._counts.setdefault(key, [0] * len(ACTIVITIES))
+            counts[activity] += sign
+            if sign < 0 and not any(counts):
+                del self._counts[key]
+
+    def _update(
+        self,
+        kind: str,
+        repo: str,
+        item_id: str,
+        contributions: list[tuple[str, str, int]],
+    ) -> None:
+        """Replace the contributions of one item with new ones."""
+        key = (kind, repo, item_id)
+        old = self._contributions.get(key)
+        if old is not None:
+            self._apply(repo, old, -1)
+        self._apply(repo, contributions, 1)
+        self._contributions[key] = contributions
+
+    def add_commits(self, repo: str, commits: Any) -> None:
+        """Add commits, as returned by `get_commits`, of the repository `repo`."""
+        # Keyed by hash, as commits from push events have no node ID.
+        columns = columns_from(commits, ["hash", "login", "date"])
+        for commit_hash, login, date in zip(
+            columns["hash"], columns["login"], columns["date"]
+        ):
+            contributions = []
+            if login is not None:
+                contributions.append((login, period_of(date, self.period), _COMMITS))
+            self._update("commit", repo, commit_hash, contributions)
+
+    def _add_threads(
+        self, kind: str, opened: int, repo: str, columns: dict[str, list[Any]]
+    ) -> None:
+        """Add issues or pull requests, with their comments and reviews if any."""
+        no_reviews: list[list[Any]] = [[]] * len(columns["id"])
+        rows = zip(
+            columns["id"],
+            columns["author"],
+            columns["created_at"],
+            columns["comments"],
+            columns["comment_dates"],
+            columns.get("reviews", no_reviews),
+            columns.get("review_dates", no_reviews),
+        )
+        for (
+            item_id,
+            author,
+            created_at,
+            comments,
+            comment_dates,
+            reviews,
+            review_dates,
+        ) in rows:
+            contributions = []
+            if author is not None:
+                contributions.append(
+                    (author, period_of(created_at, self.period), opened)
+                )
+            for logins, dates, activity in (
+                (comments, comment_dates, _COMMENTS),
+                (reviews, review_dates, _REVIEWS),
+            ):
+                contributions.extend(
+                    (login, period_of(date or created_at, self.period), activity)
+                    for login, date in zip(logins, dates)
+                    if login is not None
+                )
+            self._update(kind, repo, item_id, contributions)
+
+    def add_issues(self, repo: str, issues: Any) -> None:
+        """Add issues, as returned by `get_issues`, of the repository `repo`."""
+        columns = columns_from(
+            issues, ["id", "author", "created_at", "comments", "comment_dates"]
+        )
+        self._add_threads("issue", _ISSUES_OPENED, repo, columns)
+
+    def add_pull_requests(self, repo: str, pull_requests: Any) -> None:
+        """Add pull requests, as returned by `get_pull_requests`, of the repository
+        `repo`."""
+        columns = columns_from(
+            pull_requests,
+            [
+                "id",
+                "author",
+                "created_at",
+                "comments",
+                "comment_dates",
+                "reviews",
+                "review_dates",
+            ],
+        )
+        self._add_threads("pull_request", _PRS_AUTHORED, repo, columns)
+
+    def to_output(self, output: str = "pandas", categorical: bool = False) -> Any:
+        """Get the activity table.
+
+        Args:
+            output: The format of the return value, one of "pandas", "records",
+                "arrow" or "polars". Defaults to "pandas".
+            categorical: If True, return logins as categoricals backed by the shared
+                dictionaries of `github_analyser.dictionaries`. Defaults to False.
+
+        Returns:
+            One row per login, repo and period with any activity, sorted by those, with
+            columns login, repo, period, commits, issues_opened, prs_authored, reviews
+            and comments.
+        """
+        check_output(output)
+        columns: dict[str, list[Any]] = {name: [] for name in ACTIVITY_SCHEMA}
+        for (login, repo, period), counts in sorted(self._counts.items()):
+            columns["login"].append(login)
+            columns["repo"].append(repo)
+            columns["period"].append(period)
+            for activity, count in zip(ACTIVITIES, counts):
+                columns[activity].append(count)
+        return to_output(columns, ACTIVITY_SCHEMA, output, categorical)
+
+    def save(self, path: str | Path) -> None:
+        """Save the state of the aggregator as JSON to `path`."""
+        state = {
+            "period": self.period,
+            "contributions": [
+                [kind, repo, item_id, contributions]
+                for (kind, repo, item_id), contributions in self._contributions.items()
+            ],
+        }
+        Path(path).write_text(json.dumps(state))
+
+    @classmethod
+    def load(cls, path: str | Path) -> ActivityAggregator:
+        """Load an aggregator saved with `save`."""
+        state = json.loads(Path(path).read_text())
+        aggregator = cls(state["period"])
+        for kind, repo, item_id, contributions in state["contributions"]:
+            aggregator._update(
+                kind,
+                repo,
+                item_id,
+                [
+                    (login, period, activity)
+                    for login, period, activity in contributions
+                ],
+            )
+        return aggregator
@@ -0,0 +1,206 @@
+"""Archiving raw GraphQL pages, and replaying getters from the archive.
+
+While an archive is recording, every page the API returns is written to it as it
+arrives, zstd compressed, keyed by a hash of the query and its variables and by the
+time it was fetched:
+
+    {path}/{key[:2]}/{key}/{fetched_at}.json.zst
+
+While an archive is replaying, GraphQL requests are answered from it instead of the
+network, with the latest page fetched for the query and variables, or the latest one
+fetched at or before `as_of`. Pagination follows the cursors of the archived pages,
+so any getter can be rerun, e.g. after a change to how it shapes its results, without
+spending any rate limit:
+
+    from github_analyser.archive import recording, replaying
+    from github_analyser.issues import get_issues
+
+    with recording("archive"):
+        issues = get_issues("my-org", "my-repo")
+    # Later, with a fixed get_issues.
+    with replaying("archive"):
+        issues = get_issues("my-org", "my-repo")
+
+Recording and replaying apply to all threads, so that getters that fetch in the
+background, and `crawl_org`, can be recorded and replayed too. REST requests are
+neither recorded nor replayed. Compression uses the zstd codec of pyarrow, and the
+files are standard zstd frames, which the `zstd` command line tool can read.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+ARCHIVE_SUFFIX = ".json.zst"
+_TIME_FORMAT = "%Y%m%dT%H%M%S%fZ"
+
+
+def page_key(payload: Any) -> str:
+    """The key of the pages of a GraphQL request, a hash of its query and variables."""
+    request = json.dumps(
+        {"query": payload["query"], "variables": payload.get("variables") or {}},
+        sort_keys=True,
+    )
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+class PageArchive:
+    """A directory of raw GraphQL pages, see the module docstring."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def _dir(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def record(
+        self,
+        payload: Any,
+        data: Any,
+        fetched_at: datetime.datetime | None = None,
+    ) -> Path:
+        """Write a page to the archive.
+
+        Args:
+            payload: The GraphQL request, with "query" and optionally "variables".
+            data: The parsed response.
+            fetched_at: When the page was fetched. Optional, default is now.
+
+        Returns:
+            Path: The file written.
+        """
+        import pyarrow as pa
+
+        if fetched_at is None:
+            fetched_at = datetime.datetime.now(datetime.timezone.utc)
+        directory = self._dir(page_key(payload))
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{fetched_at:{_TIME_FORMAT}}{ARCHIVE_SUFFIX}"
+        record = {
+            "query": payload["query"],
+            "variables": payload.get("variables") or {},
+            "fetched_at": fetched_at.isoformat(),
+            "data": data,
+        }
+        # Written under a temporary name, so that readers never see a partial page.
+        partial = path.with_name(f".{path.name}.{threading.get_ident()}")
+        with pa.CompressedOutputStream(str(partial), "zstd") as f:
+            f.write(json.dumps(record).encode())
+        partial.replace(path)
+        return path
+
+    def fetches(self, payload: Any) -> list[datetime.datetime]:
+        """The times the pages of a GraphQL request were fetched, oldest first."""
+        directory = self._dir(page_key(payload))
+        if not directory.exists():
+            return []
+        return sorted(
+            datetime.datetime.strptime(
+                path.name[: -len(ARCHIVE_SUFFIX)], _TIME_FORMAT
+            ).replace(tzinfo=datetime.timezone.utc)
+            for path in directory.glob(f"*{ARCHIVE_SUFFIX}")
+        )
+
+    def replay(self, payload: Any, as_of: datetime.datetime | None = None) -> Any:
+        """Read the page of a GraphQL request from the archive.
+
+        Args:
+            payload: The GraphQL request.
+            as_of: Read the latest page fetched at or before this time. Optional,
+                default is None (the latest page).
+
+        Returns:
+            The parsed response, as it was recorded.
+
+        Raises:
+            KeyError: If the archive has no such page.
+        """
+        import pyarrow as pa
+
+        fetches = self.fetches(payload)
+        if as_of is not None:
+            fetches = [fetched_at for fetched_at in fetches if fetched_at <= as_of]
+        if not fetches:
+            variables = payload.get("variables") or {}
+            msg = f"No archived page for the query with variables {variables}."
+            raise KeyError(msg)
+        path = self._dir(page_key(payload)) / (
+            f"{fetches[-1]:{_TIME_FORMAT}}{ARCHIVE_SUFFIX}"
+        )
+        with pa.CompressedInputStream(str(path), "zstd") as f:
+            return json.loads(f.read())["data"]
+
+
+# The archive being recorded to or replayed from, if any, and `as_of` for replays.
+_lock = threading.Lock()
+_recording: PageArchive | None = None
+_replaying: tuple[PageArchive, datetime.datetime | None] | None = None
+
+
+def record_page(payload: Any, data: Any) -> None:
+    """Record a page fetched from the network, if an archive is recording."""
+    archive = _recording
+    if archive is not None:
+        archive.record(payload, data)
+
+
+def replay_page(payload: Any) -> Any | None:
+    """The archived page of a request if an archive is replaying, None otherwise."""
+    replay = _replaying
+    if replay is None:
+        return None
+    archive, as_of = replay
+    return archive.replay(payload, as_of)
+
+
+@contextmanager
+def recording(path: str | Path) -> Iterator[PageArchive]:
+    """Record the GraphQL pages fetched within the block to the archive at `path`."""
+    global _recording  # noqa: PLW0603
+    with _lock:
+        if _recording is not None:
+            msg = "Already recording to an archive."
+            raise RuntimeError(msg)
+        _recording = PageArchive(path)
+    try:
+        yield _recording
+    finally:
+        with _lock:
+            _recording = None
+
+
+@contextmanager
+def replaying(
+    path: str | Path, as_of: datetime.datetime | str | None = None
+) -> Iterator[PageArchive]:
+    """Answer the GraphQL requests made within the block from the archive at `path`.
+
+    Args:
+        path: The directory of the archive.
+        as_of: Replay the pages as they were at this time, as a datetime or an ISO
+            8601 string. Naive datetimes are taken to be in UTC. Optional, default is
+            None (the latest pages).
+    """
+    # Imported here, as utils records and replays pages through this module.
+    from github_analyser.utils import parse_timestamp
+
+    global _replaying  # noqa: PLW0603
+    if as_of is not None:
+        as_of = parse_timestamp(as_of)
+    archive = PageArchive(path)
+    with _lock:
+        if _replaying is not None:
+            msg = "Already replaying from an archive."
+            raise RuntimeError(msg)
+        _replaying = (archive, as_of)
+    try:
+        yield archive
+    finally:
+        with _lock:
+            _replaying = None
@@ -0,0 +1,172 @@
+"""Running a function over many items, keeping what succeeded when some fail.
+
+`run_bulk` calls a function for each item in a pool of threads. An item that raises
+does not stop the others: the results of the items that succeeded and the errors of
+those that failed are collected in a `BulkResult`, and the failed items can be
+retried on their own:
+
+    from github_analyser.bulk import run_bulk
+    from github_analyser.licences import LICENCE_SCHEMA, get_licences
+
+    def licence(repo):
+        return get_licences("my-org", [repo], output="records")
+
+    result = run_bulk(licence, repo_names)
+    result.errors()  # A table of the items that failed and why.
+    result = result.retry_failed()
+    licences = result.table(LICENCE_SCHEMA)
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from github_analyser.output import check_output, empty_columns, to_output
+
+BULK_ERROR_SCHEMA = {"item": "string", "error": "string", "message": "string"}
+
+
+class BulkResult:
+    """The outcome of `run_bulk`.
+
+    Attributes:
+        successes: The results of the items that succeeded, by item.
+        failures: The exceptions raised by the items that failed, by item.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[Any], Any],
+        successes: dict[Hashable, Any],
+        failures: dict[Hashable, Exception],
+        max_workers: int,
+    ) -> None:
+        self.func = func
+        self.successes = successes
+        self.failures = failures
+        self.max_workers = max_workers
+
+    def __repr__(self) -> str:
+        return (
+            f"BulkResult({len(self.successes)} succeeded, "
+            f"{len(self.failures)} failed)"
+        )
+
+    @property
+    def ok(self) -> bool:
+        """Whether every item succeeded."""
+        return not self.failures
+
+    def retry_failed(self, max_workers: int | None = None) -> BulkResult:
+        """Run the failed items again.
+
+        Args:
+            max_workers: The number of items to run in parallel. Optional, default is
+                None (as many as the first run).
+
+        Returns:
+            BulkResult: The successes of this result and of the retry, and the
+            failures of the retry.
+        """
+        retried = run_bulk(
+            self.func, list(self.failures), max_workers or self.max_workers
+        )
+        return BulkResult(
+            self.func,
+            {**self.successes, **retried.successes},
+            retried.failures,
+            self.max_workers,
+        )
+
+    def table(self, schema: dict[str, str], output: str = "pandas") -> Any:
+        """The results of the items that succeeded as a table.
+
+        Args:
+            schema: The schema of the table, see `github_analyser.output`. Each
+                result must be a record, i.e. a dictionary, or a list of records.
+            output: The format of the return value, one of "pandas", "records",
+                "arrow" or "polars". Defaults to "pandas".
+
+        Returns:
+            The table of the records of the successes.
+        """
+        check_output(output)
+        columns = empty_columns(schema)
+        for result in self.successes.values():
+            for record in [result] if isinstance(result, dict) else result:
+                for name, values in columns.items():
+                    values.append(record[name])
+        return to_output(columns, schema, output)
+
+    def errors(self, output: str = "pandas") -> Any:
+        """A table of the items that failed, with the type and message of the error.
+
+        Args:
+            output: The format of the return value, one of "pandas", "records",
+                "arrow" or "polars". Defaults to "pandas".
+
+        Returns:
+            A table with the columns item, error and message.
+        """
+        check_output(output)
+        columns = empty_columns(BULK_ERROR_SCHEMA)
+        for item, error in self.failures.items():
+            columns["item"].append(str(item))
+            columns["error"].append(type(error).__name__)
+            columns["message"].append(str(error))
+        return to_output(columns, BULK_ERROR_SCHEMA, output)
+
+    def raise_for_failures(self) -> None:
+        """Raise `BulkError` with this result if any item failed."""
+        if self.failures:
+            raise BulkError(self)
+
+
+class BulkError(Exception):
+    """Some items of a bulk run failed. The partial result is in `result`."""
+
+    def __init__(self, result: BulkResult) -> None:
+        item, error = next(iter(result.failures.items()))
+        super().__init__(
+            f"{len(result.failures)} of "
+            f"{len(result.failures) + len(result.successes)} items failed, "
+            f"e.g. {item!r}: {error}"
+        )
+        self.result = result
+
+
+def run_bulk(
+    func: Callable[[Any], Any], items: Iterable[Hashable], max_workers: int = 4
+) -> BulkResult:
+    """Call `func` on each item in parallel, isolating the failures of items.
+
+    Args:
+        func: The function to call with each item.
+        items: The items, which must be hashable, e.g. repository names. Repeated
+            items are run once.
+        max_workers: The number of items to run in parallel. Defaults to 4.
+
+    Returns:
+        BulkResult: The results of the items that succeeded and the errors of those
+        that failed.
+    """
+    items = list(dict.fromkeys(items))
+
+    def call(item: Hashable) -> tuple[Any, Exception | None]:
+        try:
+            return func(item), None
+        except Exception as e:
+            return None, e
+
+    successes = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for item, (result, error) in zip(items, executor.map(call, items)):
+            if error is None:
+                successes[item] = result
+            else:
+                logging.warning("Failed on %r: %s", item, error)
+                failures[item] = error
+    return BulkResult(func, successes, failures, max_workers)
@@ -0,0 +1,286 @@
+"""In-memory memoisation of getters.
+
+Wrapping a getter with `memoise` makes repeated calls with the same arguments return
+the result of the first call, without going back to GitHub, until the entry expires:
+
+    from github_analyser.cache import invalidate, memoise
+    from github_analyser.repos import get_repos
+
+    get_repos = memoise(get_repos, ttl=3600)
+    repos = get_repos("my-org")  # Crawls the organisation.
+    repos = get_repos("my-org")  # Returns immediately.
+    invalidate("my-org", resource="repos")
+
+Entries live in a `ResultCache`, by default the module-wide `CACHE`. Each getter has
+its own time to live, and the least recently used entries are evicted when the
+results take up more than `max_bytes`. Concurrent misses for the same arguments
+share a single crawl.
+
+Cached results are handed out cheaply: pandas frames as shallow copies, so that
+adding or replacing columns does not affect the cache, Arrow tables and polars frames
+as they are, since they are immutable, and records as new lists of new dictionaries,
+with copies of their list and map values, e.g. the comments of an issue.
+Values inside a pandas frame must not be modified in place, unless pandas' copy on
+write mode is enabled.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from github_analyser.output import output_format_of
+from github_analyser.utils import SingleFlight
+
+# Default time to live of cached results, in seconds, by resource.
+DEFAULT_TTL = 600.0
+TTLS = {
+    "repos": 3600.0,
+    "org_members": 3600.0,
+    "org_teams": 3600.0,
+    "team_members": 3600.0,
+    "all_team_members": 3600.0,
+    "licence": 86400.0,
+    "licences": 86400.0,
+}
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+
+def _freeze(value: Any) -> Any:
+    """Make an argument value hashable, for use in a cache key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(x) for x in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _size_of(data: Any) -> int:
+    """Estimate the memory taken by the result of a getter, in bytes."""
+    output = output_format_of(data)
+    if output == "arrow":
+        return data.nbytes
+    if output == "polars":
+        return int(data.estimated_size())
+    if output == "records":
+        return sys.getsizeof(data) + sum(
+            sys.getsizeof(record) + sum(sys.getsizeof(v) for v in record.values())
+            for record in data
+        )
+    if hasattr(data, "memory_usage"):
+        usage = data.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    return sys.getsizeof(data)
+
+
+def _copy_value(value: Any) -> Any:
+    """Copy the list and map values of records, which are mutable."""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _view_of(data: Any) -> Any:
+    """Return a copy of a cached result that is cheap to make and safe to hand out."""
+    output = output_format_of(data)
+    if output in ("arrow", "polars"):
+        return data
+    if output == "records":
+        return [
+            {name: _copy_value(value) for name, value in record.items()}
+            for record in data
+        ]
+    return data.copy(deep=False)
+
+
+class _Entry:
+    def __init__(
+        self, resource: str, org: str | None, repo: str | None, value: Any, ttl: float
+    ) -> None:
+        self.resource = resource
+        self.org = org
+        self.repo = repo
+        self.value = value
+        self.size = _size_of(value)
+        self.expires_at = time.monotonic() + ttl
+
+
+class ResultCache:
+    """A thread-safe cache of getter results with expiry and a memory cap.
+
+    Args:
+        max_bytes: The maximum estimated size of all cached results, in bytes. The
+            least recently used entries are evicted beyond it. Defaults to 256 MiB.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._in_flight = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """The estimated size of all cached results, in bytes."""
+        return self._size
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def get(self, key: tuple) -> Any | None:
+        """Return the cached result for `key`, or None if there is none or it has
+        expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(
+        self,
+        key: tuple,
+        value: Any,
+        ttl: float,
+        resource: str,
+        org: str | None = None,
+        repo: str | None = None,
+    ) -> None:
+        """Cache `value` under `key` for `ttl` seconds, evicting old entries if the
+        cache is over its memory cap."""
+        entry = _Entry(resource, org, repo, value, ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(
+        self,
+        org: str | None = None,
+        repo: str | None = None,
+        resource: str | None = None,
+    ) -> int:
+        """Drop cached results, e.g. after learning that the data has changed.
+
+        Args:
+            org: Only drop results for this organisation. Optional, default is None
+                (any organisation).
+            repo: Only drop results for this repository. Optional, default is None
+                (any repository, and results not specific to a repository).
+            resource: Only drop results of this resource, e.g. "repos" or "issues".
+                Optional, default is None (any resource).
+
+        Returns:
+            int: The number of results dropped.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key, entry in self._entries.items()
+                if (org is None or entry.org == org)
+                and (repo is None or entry.repo == repo)
+                and (resource is None or entry.resource == resource)
+            ]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def memoise(
+        self,
+        getter: Callable[..., Any],
+        resource: str | None = None,
+        ttl: float | None = None,
+    ) -> Callable[..., Any]:
+        """Wrap a getter so that its results are cached, see `memoise`."""
+        if resource is None:
+            resource = getter.__name__.removeprefix("get_")
+        if ttl is None:
+            ttl = TTLS.get(resource, DEFAULT_TTL)
+        signature = inspect.signature(getter)
+
+        @functools.wraps(getter)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            save = arguments.pop("save", False)
+            key = (resource, _freeze(arguments))
+
+            def fetch() -> Any:
+                value = getter(*args, **kwargs)
+                org, repo = arguments.get("org_name"), arguments.get("repo_name")
+                self.put(key, value, ttl, resource, org, repo)
+                return value
+
+            if save:
+                # Saving is a side effect, so always run the getter.
+                return _view_of(fetch())
+            value = self.get(key)
+            if value is None:
+                value = self._in_flight.do(repr(key), fetch)
+            return _view_of(value)
+
+        return wrapper
+
+
+CACHE = ResultCache()
+
+
+def memoise(
+    getter: Callable[..., Any],
+    resource: str | None = None,
+    ttl: float | None = None,
+    cache: ResultCache | None = None,
+) -> Callable[..., Any]:
+    """Wrap a getter so that its results are cached in memory.
+
+    Results are keyed by all the arguments of the getter, except `save`. Calls with
+    `save` set always run the getter, and refresh the cache.
+
+    Args:
+        getter: The getter, e.g. `get_repos`.
+        resource: The name of the resource, used by `invalidate`. Optional, default
+            is the name of the getter without the "get_" prefix, e.g. "repos".
+        ttl: How long results stay cached, in seconds. Optional, default is taken
+            from `TTLS`, or `DEFAULT_TTL` for resources not in it.
+        cache: The cache to use. Optional, default is `CACHE`.
+
+    Returns:
+        The wrapped getter.
+    """
+    if cache is None:
+        cache = CACHE
+    return cache.memoise(getter, resource, ttl)
+
+
+def invalidate(
+    org: str | None = None, repo: str | None = None, resource: str | None = None
+) -> int:
+    """Drop results from `CACHE`, see `ResultCache.invalidate`."""
+    return CACHE.invalidate(org, repo, resource)
@@ -0,0 +1,378 @@
+"""The `github-analyser` command.
+
+    github-analyser crawl ORG --resources issues,prs,commits --workers 16 \\
+        --format parquet --since 2026-01-01 --output-dir data
+
+crawls the organisation ORG with `crawl_org` and writes one file per repo and
+resource, in a layout that `pyarrow.dataset` reads as a partitioned dataset:
+
+    {output_dir}/{org}/repos.{format}
+    {output_dir}/{org}/{resource}/repo={repo}/part-0.{format}
+    {output_dir}/{org}/{resource}/_snapshot.{format}
+
+The repos table of the previous run is the snapshot of the next, kept for each
+resource, so repos whose resource has not changed since are skipped, and their files
+are left as they are. A resource that was never crawled is crawled in full. With
+--since, the rows fetched for a repo are merged into its file, replacing the rows
+with the same ID, or hash for commits, so that a crawl with a later --since, e.g. a
+daily one, keeps the history written before. Without it, the file is replaced. Repos
+that fail are reported and left out of the snapshot, so the next run retries them,
+and the command exits with status 1. With --archive
+DIR the raw GraphQL pages are also written to an archive, and with --replay DIR they
+are read from one instead of GitHub, see `github_analyser.archive`. With --dry-run
+the cost of the crawl is estimated instead, see `github_analyser.planner`.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any
+
+from github_analyser.archive import recording, replaying
+from github_analyser.commits import COMMIT_SCHEMA
+from github_analyser.crawl import RESOURCES, SINCE_COLUMNS, crawl_org
+from github_analyser.issues import ISSUE_SCHEMA
+from github_analyser.output import (
+    columns_from,
+    output_format_of,
+    save_output,
+    to_output,
+)
+from github_analyser.planner import plan_crawl
+from github_analyser.pull_requests import PULL_REQUEST_SCHEMA
+from github_analyser.repos import REPO_SCHEMA
+from github_analyser.utils import parse_timestamp
+
+FORMATS = ("csv", "parquet")
+RESOURCE_ALIASES = {"prs": "pull_requests", "pull_requests": "pull_requests"}
+SCHEMAS = {
+    "commits": COMMIT_SCHEMA,
+    "issues": ISSUE_SCHEMA,
+    "pull_requests": PULL_REQUEST_SCHEMA,
+}
+# The column that identifies the rows of each resource, for merging crawls.
+KEYS = {"commits": "hash", "issues": "id", "pull_requests": "id"}
+
+
+def _resources(value: str) -> tuple[str, ...]:
+    """Parse the comma separated --resources argument."""
+    resources = []
+    for name in value.split(","):
+        resource = RESOURCE_ALIASES.get(name.strip(), name.strip())
+        if resource not in RESOURCES:
+            msg = f"unknown resource {name!r}, must be some of issues, prs, commits"
+            raise argparse.ArgumentTypeError(msg)
+        resources.append(resource)
+    return tuple(dict.fromkeys(resources))
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="github-analyser", description="Collect data about GitHub organisations."
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Log the requests made."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    crawl_parser = subparsers.add_parser(
+        "crawl",
+        help="Crawl the repositories of an organisation.",
+        description=(
+            "Crawl the commits, issues and pull requests of the repositories of an "
+            "organisation that changed since the last crawl."
+        ),
+    )
+    crawl_parser.add_argument("org", help="The name of the organisation.")
+    crawl_parser.add_argument(
+        "--resources",
+        type=_resources,
+        default=RESOURCES,
+        help="Comma separated resources to crawl, of issues, prs and commits. "
+        "Defaults to all of them.",
+    )
+    crawl_parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="The number of repositories to crawl in parallel. Defaults to 4.",
+    )
+    crawl_parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="parquet",
+        help="The file format to write. Defaults to parquet.",
+    )
+    crawl_parser.add_argument(
+        "--since",
+        help="Only fetch rows created or updated on or after this ISO 8601 date. "
+        "GitHub filters out older rows where it can, so they are not fetched. The "
+        "rows fetched are merged into the files of earlier crawls, by ID.",
+    )
+    crawl_parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("data"),
+        help="The directory to write to. Defaults to data.",
+    )
+    crawl_parser.add_argument(
+        "--processes",
+        type=int,
+        help="Extract issues and pull requests in a pool of this many processes.",
+    )
+    crawl_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Crawl every repository, ignoring the previous crawl.",
+    )
+    crawl_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Estimate the pages, points and time of the crawl instead of running it.",
+    )
+    archive_group = crawl_parser.add_mutually_exclusive_group()
+    archive_group.add_argument(
+        "--archive",
+        type=Path,
+        help="Also write the raw GraphQL pages to this archive directory.",
+    )
+    archive_group.add_argument(
+        "--replay",
+        type=Path,
+        help="Read the GraphQL pages from this archive directory instead of GitHub.",
+    )
+    return parser
+
+
+def _snapshot_path(org_dir: Path, resource: str, file_format: str) -> Path:
+    """The repos table of the last crawl of a resource.
+
+    The leading underscore keeps `pyarrow.dataset` from reading it as data.
+    """
+    return org_dir / resource / f"_snapshot.{file_format}"
+
+
+def _read_snapshot(path: Path) -> Any:
+    """Read the repos table of the previous crawl, if there is one."""
+    if not path.exists():
+        return None
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path)
+    import pandas as pd
+
+    return pd.read_csv(path)
+
+
+def filter_since(data: Any, resource: str, since: str) -> Any:
+    """Keep the rows of a resource created or updated on or after `since`.
+
+    Args:
+        data: The table of a resource, as returned by its getter, in any output
+            format.
+        resource: One of "commits", "issues" or "pull_requests".
+        since: An ISO 8601 date or timestamp. Naive ones are taken to be in UTC.
+            The timestamps are compared in UTC, as commit dates keep the offset of
+            their author.
+
+    Returns:
+        The rows that changed since `since`, in the same output format.
+    """
+    schema = SCHEMAS[resource]
+    columns = columns_from(data, list(schema))
+    start = parse_timestamp(since)
+    keep = [
+        any(
+            timestamp is not None and parse_timestamp(timestamp) >= start
+            for timestamp in (columns[name][i] for name in SINCE_COLUMNS[resource])
+        )
+        for i in range(len(columns["id"]))
+    ]
+    filtered = {
+        name: [value for value, k in zip(values, keep) if k]
+        for name, values in columns.items()
+    }
+    return to_output(filtered, schema, output_format_of(data))
+
+
+def _merge_part(path: Path, rows: Any, resource: str) -> Any:
+    """The rows of an earlier crawl in a part file, without those that were fetched
+    again, followed by the new rows."""
+    if not path.exists():
+        return rows
+    key = KEYS[resource]
+    schema = SCHEMAS[resource]
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        new = to_output(columns_from(rows, list(schema)), schema, "arrow")
+        old = pq.read_table(path)
+        old = old.filter(pc.invert(pc.is_in(old[key], value_set=new[key])))
+        return pa.concat_tables([old, new], promote_options="default")
+    import pandas as pd
+
+    # Read as text, so the rows kept are written back as they were.
+    old = pd.read_csv(path, dtype=str, keep_default_na=False)
+    new = to_output(columns_from(rows, list(schema)), schema)
+    old = old[~old[key].isin(new[key])]
+    return pd.concat([old, new], ignore_index=True)
+
+
+def _without_repos(repos: Any, names: set[str]) -> Any:
+    """The repos table without the rows of some repos, in the same output format."""
+    if not names:
+        return repos
+    columns = columns_from(repos, list(REPO_SCHEMA))
+    keep = [name not in names for name in columns["name"]]
+    filtered = {
+        name: [value for value, k in zip(values, keep) if k]
+        for name, values in columns.items()
+    }
+    return to_output(filtered, REPO_SCHEMA, output_format_of(repos))
+
+
+def plan(
+    org_name: str,
+    resources: tuple[str, ...] = RESOURCES,
+    file_format: str = "parquet",
+    output_dir: str | Path = "data",
+    full: bool = False,
+) -> dict[str, Any]:
+    """Estimate the cost of `crawl` with the same arguments, see `plan_crawl`."""
+    org_dir = Path(output_dir) / org_name
+    snapshot = {
+        resource: None
+        if full
+        else _read_snapshot(_snapshot_path(org_dir, resource, file_format))
+        for resource in resources
+    }
+    return plan_crawl(org_name, resources=resources, snapshot=snapshot)
+
+
+def _print_plan(estimate: dict[str, Any]) -> None:
+    print(estimate["resources"].to_string(index=False))
+    print(
+        f"{estimate['pages']} pages, {estimate['points']} points of "
+        f"{estimate['remaining']} remaining until {estimate['reset_at']:%H:%M} UTC, "
+        f"over {estimate['windows']} rate limit window(s).\n"
+        f"Suggested --workers {estimate['concurrency']}, taking about "
+        f"{estimate['seconds'] / 60:.0f} minutes."
+    )
+
+
+def crawl(
+    org_name: str,
+    resources: tuple[str, ...] = RESOURCES,
+    workers: int = 4,
+    file_format: str = "parquet",
+    since: str | None = None,
+    output_dir: str | Path = "data",
+    full: bool = False,
+    processes: int | None = None,
+) -> tuple[dict[str, int], dict[str, int]]:
+    """Crawl an organisation and write the results, see the module docstring.
+
+    Returns:
+        tuple: The number of repos written, and the number of repos that failed, for
+        each resource.
+    """
+    org_dir = Path(output_dir) / org_name
+    snapshot = {
+        resource: None
+        if full
+        else _read_snapshot(_snapshot_path(org_dir, resource, file_format))
+        for resource in resources
+    }
+    output = "arrow" if file_format == "parquet" else "pandas"
+
+    def report(resource: str, repo_name: str, done: int, total: int) -> None:
+        print(f"[{done}/{total}] {resource} {repo_name}", file=sys.stderr)
+
+    result = crawl_org(
+        org_name,
+        snapshot=snapshot,
+        resources=resources,
+        max_workers=workers,
+        output=output,
+        progress=report,
+        processes=processes,
+        since=since,
+    )
+    written = {}
+    for resource in resources:
+        for repo_name, data in result[resource].items():
+            part_dir = org_dir / resource / f"repo={repo_name}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            path = part_dir / f"part-0.{file_format}"
+            rows = data
+            if since is not None:
+                # GitHub filtered by updatedAt or commit date, which can be later
+                # than the timestamps of SINCE_COLUMNS.
+                rows = _merge_part(path, filter_since(data, resource, since), resource)
+            save_output(rows, path)
+        written[resource] = len(result[resource])
+        for repo_name, error in result["errors"][resource].items():
+            print(f"{resource} {repo_name} failed: {error}", file=sys.stderr)
+    # The snapshots are written last, so that an interrupted crawl is redone.
+    org_dir.mkdir(parents=True, exist_ok=True)
+    save_output(result["repos"], org_dir / f"repos.{file_format}")
+    for resource in resources:
+        path = _snapshot_path(org_dir, resource, file_format)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        failed = set(result["errors"][resource])
+        save_output(_without_repos(result["repos"], failed), path)
+    return written, {
+        resource: len(errors) for resource, errors in result["errors"].items()
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the `github-analyser` command."""
+    args = _parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    if args.command == "crawl" and args.dry_run:
+        _print_plan(
+            plan(
+                args.org,
+                resources=args.resources,
+                file_format=args.format,
+                output_dir=args.output_dir,
+                full=args.full,
+            )
+        )
+    elif args.command == "crawl":
+        context: Any = nullcontext()
+        if args.archive is not None:
+            context = recording(args.archive)
+        elif args.replay is not None:
+            context = replaying(args.replay)
+        with context:
+            written, failed = crawl(
+                args.org,
+                resources=args.resources,
+                workers=args.workers,
+                file_format=args.format,
+                since=args.since,
+                output_dir=args.output_dir,
+                full=args.full,
+                processes=args.processes,
+            )
+        for resource, count in written.items():
+            print(f"{resource}: {count} repos updated", file=sys.stderr)
+            if failed[resource]:
+                print(
+                    f"{resource}: {failed[resource]} repos failed, to be retried",
+                    file=sys.stderr,
+                )
+        if any(failed.values()):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,88 @@
 from __future__ import annotations
 
+import datetime
 import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
+from github_analyser.dictionaries import LOGINS
+from github_analyser.output import (
+    check_output,
+    columns_from,
+    empty_columns,
+    extend_columns,
+    output_format_of,
+    save_output,
+    to_output,
+)
+from github_analyser.pull_requests import get_pull_request_commits
+from github_analyser.utils import github_timestamp, iter_pages, request_github_graphql
 
-from github_analyser.utils import camel_to_snake, query_with_pagination
+if TYPE_CHECKING:
+    import pandas as pd
 
+COMMIT_SCHEMA = {
+    "id": "string",
+    "hash": "string",
+    "message": "string",
+    "author": "string",
+    "login": "login",
+    "date": "string",
+    "changed_files": "int",
+    "additions": "int",
+    "deletions": "int",
+    "pr_id": "string",
+    "repo_id": "string",
+}
 
-def _get_commits_query(org_name: str, repo_name: str) -> str:
+
+PR_IDS_FROM = ("commits", "pull_requests", None)
+
+# The commits query only asks for cheap fields, so it can fetch large pages.
+COMMITS_PAGE_SIZE = 100
+# The line statistics are expensive for GitHub to compute, so they are fetched
+# separately in smaller batches. `nodes(ids:)` accepts at most 100 IDs.
+COMMIT_STATS_BATCH_SIZE = 50
+MAX_COMMIT_STATS_BATCH_SIZE = 100
+COMMIT_STATS = ("changed_files", "additions", "deletions")
+
+COMMIT_STATS_QUERY = """
+query ($ids: [ID!]!) {
+    nodes(ids: $ids) {
+        ... on Commit {
+            id
+            changedFiles
+            additions
+            deletions
+        }
+    }
+}
+"""
+
+
+def _get_commits_query(
+    org_name: str,
+    repo_name: str,
+    associated_pull_requests: bool = True,
+    since: str | None = None,
+    until: str | None = None,
+) -> str:
+    # Asking every commit for its pull requests is what makes this query expensive,
+    # see the `pr_ids_from` argument of `get_commits`.
+    associated_pull_requests_field = (
+        """associatedPullRequests(first: 5) {
+                                        nodes {
+                                            id
+                                        }
+                                    }"""
+        if associated_pull_requests
+        else ""
+    )
+    window = "".join(
+        f', {name}: "{value}"'
+        for name, value in (("since", since), ("until", until))
+        if value is not None
+    )
     return f"""
     query ($afterCursor: String) {{
         repository(owner: "{org_name}", name: "{repo_name}") {{
@@ -15,7 +90,7 @@ def _get_commits_query(org_name: str, repo_name: str) -> str:
             defaultBranchRef {{
                 target {{
                     ... on Commit {{
-                        history(first: 10, after: $afterCursor) {{
+                        history(first: {COMMITS_PAGE_SIZE}, after: $afterCursor{window}) {{
                             edges {{
                                 node {{
                                     id
@@ -24,15 +99,11 @@ def _get_commits_query(org_name: str, repo_name: str) -> str:
                                     author {{
                                         name
                                         date
-                                    }}
-                                    changedFiles
-                                    additions
-                                    deletions
-                                    associatedPullRequests(first: 5) {{
-                                        nodes {{
-                                            id
+                                        user {{
+                                            login
                                         }}
                                     }}
+                                    {associated_pull_requests_field}
                                 }}
                             }}
                             pageInfo {{
@@ -48,11 +119,176 @@ def _get_commits_query(org_name: str, repo_name: str) -> str:
     """
 
 
+def _commit_columns(nodes: list[dict], repo_id: str | None) -> dict[str, list]:
+    """Extract the columns of the commits frame from commit nodes."""
+    columns = empty_columns(COMMIT_SCHEMA)
+    for node in nodes:
+        columns["id"].append(node["id"])
+        columns["hash"].append(node["oid"])
+        columns["message"].append(node["messageHeadline"])
+        columns["author"].append(node["author"]["name"])
+        user = node["author"]["user"]
+        columns["login"].append(LOGINS.intern(user["login"]) if user else None)
+        columns["date"].append(node["author"]["date"])
+        for name in COMMIT_STATS:
+            columns[name].append(None)
+        if "associatedPullRequests" in node:
+            pull_requests = node["associatedPullRequests"]["nodes"]
+            columns["pr_id"].append(pull_requests[0]["id"] if pull_requests else None)
+        else:
+            columns["pr_id"].append(None)
+        columns["repo_id"].append(repo_id)
+    return columns
+
+
+def _get_commit_ids_query(oids: list[str]) -> str:
+    objects = "\n".join(
+        f'c{i}: object(oid: "{oid}") {{ id }}' for i, oid in enumerate(oids)
+    )
+    return f"""
+    query ($id: ID!) {{
+        node(id: $id) {{
+            ... on Repository {{
+                {objects}
+            }}
+        }}
+    }}
+    """
+
+
+def _resolve_commit_ids(columns: dict[str, list], batch_size: int) -> None:
+    """Look up the node IDs of commits that lack them, by repository and hash.
+
+    Commits added from push events, see `github_analyser.events`, only have a hash.
+    """
+    missing: dict[str, list[str]] = {}
+    for commit_id, oid, repo_id in zip(
+        columns["id"], columns["hash"], columns["repo_id"]
+    ):
+        if commit_id is None and repo_id is not None:
+            missing.setdefault(repo_id, []).append(oid)
+    ids = {}
+    for repo_id, oids in missing.items():
+        unique_oids = list(dict.fromkeys(oids))
+        for start in range(0, len(unique_oids), batch_size):
+            batch = unique_oids[start : start + batch_size]
+            payload = {
+                "query": _get_commit_ids_query(batch),
+                "variables": {"id": repo_id},
+            }
+            node = request_github_graphql(payload)["data"]["node"] or {}
+            for i, oid in enumerate(batch):
+                if node.get(f"c{i}"):
+                    ids[(repo_id, oid)] = node[f"c{i}"]["id"]
+    columns["id"] = [
+        ids.get((repo_id, oid)) if commit_id is None else commit_id
+        for commit_id, oid, repo_id in zip(
+            columns["id"], columns["hash"], columns["repo_id"]
+        )
+    ]
+
+
+def _fetch_commit_stats(
+    commit_ids: list[str], batch_size: int, max_workers: int
+) -> dict[str, tuple[int, int, int]]:
+    """Fetch the line statistics of commits, in batches of `batch_size` IDs.
+
+    Returns:
+        dict: Maps each commit ID to its number of changed files, additions and
+        deletions.
+    """
+    if not 1 <= batch_size <= MAX_COMMIT_STATS_BATCH_SIZE:
+        msg = (
+            f"batch_size must be between 1 and {MAX_COMMIT_STATS_BATCH_SIZE}, "
+            f"got {batch_size}."
+        )
+        raise ValueError(msg)
+    unique_ids = [
+        commit_id for commit_id in dict.fromkeys(commit_ids) if commit_id is not None
+    ]
+    batches = [
+        unique_ids[start : start + batch_size]
+        for start in range(0, len(unique_ids), batch_size)
+    ]
+
+    def fetch(batch: list[str]) -> Any:
+        payload = {"query": COMMIT_STATS_QUERY, "variables": {"ids": batch}}
+        return request_github_graphql(payload)
+
+    if max_workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(fetch, batches))
+    else:
+        responses = [fetch(batch) for batch in batches]
+
+    stats = {}
+    for response in responses:
+        for node in response["data"]["nodes"]:
+            if node:
+                stats[node["id"]] = (
+                    node["changedFiles"],
+                    node["additions"],
+                    node["deletions"],
+                )
+    return stats
+
+
+def _fill_commit_stats(
+    columns: dict[str, list], stats: dict[str, tuple[int, int, int]]
+) -> None:
+    """Set the statistics columns from the output of `_fetch_commit_stats`."""
+    for i, name in enumerate(COMMIT_STATS):
+        columns[name] = [
+            stats[commit_id][i] if commit_id in stats else None
+            for commit_id in columns["id"]
+        ]
+
+
+def add_commit_stats(
+    commits: Any,
+    batch_size: int = COMMIT_STATS_BATCH_SIZE,
+    max_workers: int = 1,
+    categorical: bool = False,
+) -> Any:
+    """Fill in the line statistics of commits fetched with `get_commits(stats=False)`.
+
+    Only the commits that are passed in are looked up, so this can be run for a subset
+    of them, e.g. the commits of a single author, or some time after the commits
+    themselves were fetched. Commits without a node ID, such as those from push
+    events, get it filled in too, looked up by repo_id and hash.
+
+    Args:
+        commits: Commits as returned by `get_commits`, in any output format.
+        batch_size: The number of commits to look up per request, at most 100.
+            Defaults to 50.
+        max_workers: The number of requests to run in parallel. Defaults to 1.
+        categorical: If True, return logins as categoricals backed by the shared
+            dictionaries of `github_analyser.dictionaries`. Defaults to False.
+
+    Returns:
+        The commits in the same output format, with changed_files, additions and
+        deletions filled in.
+    """
+    columns = columns_from(commits, list(COMMIT_SCHEMA))
+    _resolve_commit_ids(columns, batch_size)
+    stats = _fetch_commit_stats(columns["id"], batch_size, max_workers)
+    _fill_commit_stats(columns, stats)
+    return to_output(columns, COMMIT_SCHEMA, output_format_of(commits), categorical)
+
+
 def get_commits(
     org_name: str,
     repo_name: str,
     total_commits_to_fetch: int | None = None,
     save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+    pr_ids_from: str | None = "commits",
+    stats: bool = True,
+    stats_batch_size: int = COMMIT_STATS_BATCH_SIZE,
+    stats_max_workers: int = 1,
+    since: datetime.datetime | str | None = None,
+    until: datetime.datetime | str | None = None,
 ) -> pd.DataFrame:
     """Fetch info about commits from a GitHub repository.
 
@@ -62,13 +298,38 @@ def get_commits(
         total_commits_to_fetch: The total number of commits to fetch.
         save (bool | str, optional): If True, save the data to "data/commits.csv" or
         specify a path. Defaults to False.
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        categorical: If True, return logins as categoricals backed by the shared
+            dictionaries of `github_analyser.dictionaries`. Defaults to False.
+        pr_ids_from: How to find the pull request of each commit. "commits" asks every
+            commit for its associated pull requests, which is the most expensive part
+            of the query. "pull_requests" instead lists the commits and merge commit of
+            every pull request, with `get_pull_request_commits`, and joins them onto
+            the commits locally, which is much cheaper when there are many more commits
+            than pull requests. None leaves pr_id empty. Defaults to "commits".
+        stats: Whether to fetch changed_files, additions and deletions. They are
+            expensive to compute, so they are not part of the paginated commits query
+            but fetched afterwards in batches, see `add_commit_stats`. If False, the
+            columns are left empty and can be filled in later with
+            `add_commit_stats`. Defaults to True.
+        stats_batch_size: The number of commits to fetch statistics for per request,
+            at most 100. Defaults to 50.
+        stats_max_workers: The number of statistics requests to run in parallel.
+            Defaults to 1.
+        since: Only get commits made at or after this datetime or ISO 8601
+            timestamp, naive ones being in UTC. GitHub filters the history by commit
+            date, so older commits are not fetched. Optional, default is None.
+        until: Only get commits made at or before this time. Optional, default is
+            None.
 
     Returns:
         A pandas DataFrame with the following columns:
             - id: The commit node ID.
             - hash: The commit SHA.
             - message: The commit message headline.
-            - author: The author of the commit.
+            - author: The name of the author of the commit.
+            - login: The GitHub login of the author, if they have a GitHub account.
             - date: The date of the commit.
             - changed_files: The number of files changed.
             - additions: The number of line additions.
@@ -76,73 +337,64 @@ def get_commits(
             - pr_id: The ID of the associated pull request, if any.
             - repo_id: The repository node ID.
     """
-    query = _get_commits_query(org_name, repo_name)
+    check_output(output)
+    if pr_ids_from not in PR_IDS_FROM:
+        msg = f"Unknown pr_ids_from {pr_ids_from!r}, must be one of {PR_IDS_FROM}."
+        raise ValueError(msg)
+    query = _get_commits_query(
+        org_name,
+        repo_name,
+        associated_pull_requests=pr_ids_from == "commits",
+        since=github_timestamp(since) if since is not None else None,
+        until=github_timestamp(until) if until is not None else None,
+    )
 
     if total_commits_to_fetch is not None:
-        max_pages_to_fetch = math.ceil(total_commits_to_fetch / 10)
+        max_pages_to_fetch = math.ceil(total_commits_to_fetch / COMMITS_PAGE_SIZE)
     else:
         max_pages_to_fetch = None
 
-    responses = query_with_pagination(
+    columns = empty_columns(COMMIT_SCHEMA)
+    # Each page is extracted while the next one is being fetched.
+    for response in iter_pages(
         query,
         ["data", "repository", "defaultBranchRef", "target", "history"],
         "afterCursor",
         max_pages=max_pages_to_fetch,
-    )
-
-    # extract repo id from the first response
-    repo_id = None
-    if responses:
-        repo_id = responses[0]["data"]["repository"]["id"]
-
-    nodes = []
-    for response in responses:
+    ):
+        repo_id = response["data"]["repository"]["id"]
         default_branch_ref = response["data"]["repository"]["defaultBranchRef"]
         if default_branch_ref is None:
             break
         edges = default_branch_ref["target"]["history"]["edges"]
-        nodes.extend(edge["node"] for edge in edges)
-        if total_commits_to_fetch is not None and len(nodes) >= total_commits_to_fetch:
+        extend_columns(
+            columns, _commit_columns([edge["node"] for edge in edges], repo_id)
+        )
+        num_commits = len(columns["id"])
+        if total_commits_to_fetch is not None and num_commits >= total_commits_to_fetch:
             break
 
     if total_commits_to_fetch is not None:
-        nodes = nodes[:total_commits_to_fetch]
-
-    if not nodes:
-        return pd.DataFrame(
-            columns=[
-                "id",
-                "hash",
-                "message",
-                "author",
-                "date",
-                "changed_files",
-                "additions",
-                "deletions",
-                "pr_id",
-                "repo_id",
-            ]
+        columns = {
+            name: values[:total_commits_to_fetch] for name, values in columns.items()
+        }
+    if pr_ids_from == "pull_requests" and columns["id"]:
+        pr_commits = get_pull_request_commits(org_name, repo_name, output="records")
+        pr_ids: dict[str, str] = {}
+        for pr_commit in pr_commits:
+            # A commit can be in several pull requests, keep the first one.
+            pr_ids.setdefault(pr_commit["hash"], pr_commit["pr_id"])
+        columns["pr_id"] = [pr_ids.get(commit_hash) for commit_hash in columns["hash"]]
+    if stats and columns["id"]:
+        commit_stats = _fetch_commit_stats(
+            columns["id"], stats_batch_size, stats_max_workers
         )
-
-    df = pd.json_normalize(nodes, sep="_")
-    df.rename(
-        columns={
-            "messageHeadline": "message",
-            "author_name": "author",
-            "author_date": "date",
-            "oid": "hash",
-            "associatedPullRequests_nodes": "pr_id",
-        },
-        inplace=True,
-    )
-    df.rename(columns=camel_to_snake, inplace=True)
-    df["pr_id"] = df["pr_id"].apply(lambda x: x[0]["id"] if x else None)
-    # add repo_id to the dataframe
-    df["repo_id"] = repo_id
+        _fill_commit_stats(columns, commit_stats)
+    result = to_output(columns, COMMIT_SCHEMA, output, categorical)
 
     if save:
         if save is True:
             save = f"data/{repo_name}/commits.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    return result
@@ -0,0 +1,236 @@
+"""Crawling the commits, issues and pull requests of a whole organisation.
+
+`crawl_org` lists the repositories of an organisation with `get_repos`, and compares
+each one with a snapshot from an earlier crawl, i.e. the repos table it returned.
+Only the resources of repositories that changed since are fetched again:
+
+- commits: When pushed_at or commit_count changed.
+- issues: When issue_count or issues_updated_at changed.
+- pull_requests: When pull_request_count or pull_requests_updated_at changed.
+
+Repositories that are not in the snapshot are always crawled. A snapshot can be
+given for each resource, as a resource that was left out of a crawl was not fetched
+whatever its snapshot says, and a resource without one is crawled in full. In a large
+organisation where few repositories change from one day to the next, this skips most
+of the crawl. The fetches for different repositories run in parallel threads, with
+`github_analyser.bulk.run_bulk`, so a repository that fails does not stop the others.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from github_analyser.bulk import run_bulk
+from github_analyser.commits import get_commits
+from github_analyser.issues import get_issues
+from github_analyser.output import check_output, columns_from
+from github_analyser.pull_requests import get_pull_requests
+from github_analyser.repos import get_repos
+
+GETTERS: dict[str, Callable[..., Any]] = {
+    "commits": get_commits,
+    "issues": get_issues,
+    "pull_requests": get_pull_requests,
+}
+RESOURCES = tuple(GETTERS)
+# The resources whose getters can extract pages in worker processes. Commits are
+# flat, so extracting them is cheap.
+PROCESS_POOL_RESOURCES = ("issues", "pull_requests")
+
+# The columns of the repos table that change when each resource changes.
+CHANGE_COLUMNS = {
+    "commits": ("pushed_at", "commit_count"),
+    "issues": ("issue_count", "issues_updated_at"),
+    "pull_requests": ("pull_request_count", "pull_requests_updated_at"),
+}
+# The timestamp columns that tell whether a row changed since a date, by resource.
+SINCE_COLUMNS = {
+    "commits": ("date",),
+    "issues": ("created_at", "closed_at", "first_comment_at", "updated_at"),
+    "pull_requests": ("updated_at",),
+}
+_SNAPSHOT_COLUMNS = [
+    "name",
+    *(name for names in CHANGE_COLUMNS.values() for name in names),
+]
+
+
+def _normalise(value: Any) -> Any:
+    """Make values read back from a saved snapshot comparable to fresh ones."""
+    if isinstance(value, float):
+        return int(value)
+    return value
+
+
+def _rows_by_name(repos: Any) -> dict[str, dict[str, Any]]:
+    """The change columns of a repos table, keyed by repo name."""
+    columns = columns_from(repos, _SNAPSHOT_COLUMNS)
+    return {
+        name: {column: _normalise(columns[column][i]) for column in _SNAPSHOT_COLUMNS}
+        for i, name in enumerate(columns["name"])
+    }
+
+
+def changed_resources(
+    current: dict[str, Any],
+    previous: dict[str, Any] | None,
+    resources: tuple[str, ...] = RESOURCES,
+) -> list[str]:
+    """Find which resources of a repository changed between two snapshots.
+
+    Args:
+        current: The row of the repository in the latest repos table.
+        previous: Its row in the snapshot, or None if it was not in it.
+        resources: The resources to check. Defaults to all of `RESOURCES`.
+
+    Returns:
+        list: The resources that changed, in the order of `resources`.
+    """
+    if previous is None:
+        return list(resources)
+    return [
+        resource
+        for resource in resources
+        if any(
+            _normalise(current[column]) != previous[column]
+            for column in CHANGE_COLUMNS[resource]
+        )
+    ]
+
+
+def _previous_rows(
+    snapshot: Any, resources: tuple[str, ...]
+) -> dict[str, dict[str, dict[str, Any]]]:
+    """The snapshot rows of each resource, keyed by repo name."""
+    if not isinstance(snapshot, dict):
+        snapshot = {resource: snapshot for resource in resources}
+    previous: dict[str, dict[str, dict[str, Any]]] = {}
+    for resource in resources:
+        previous[resource] = {}
+        if snapshot.get(resource) is None:
+            continue
+        try:
+            previous[resource] = _rows_by_name(snapshot[resource])
+        except KeyError:
+            logging.warning(
+                "The %s snapshot lacks the change columns, crawling all.", resource
+            )
+    return previous
+
+
+def crawl_org(
+    org_name: str,
+    snapshot: Any = None,
+    resources: tuple[str, ...] = RESOURCES,
+    max_workers: int = 4,
+    output: str = "pandas",
+    categorical: bool = False,
+    progress: Callable[[str, str, int, int], None] | None = None,
+    processes: int | None = None,
+    since: str | None = None,
+) -> dict[str, Any]:
+    """Fetch the commits, issues and pull requests of the repos that changed.
+
+    Args:
+        org_name: The name of the organisation.
+        snapshot: The repos table of an earlier crawl, i.e. `result["repos"]`, in
+            any output format, or as read back from a saved file, or a dictionary of
+            them by resource, in which the resources left out are crawled in full.
+            Optional, default is None (crawl everything).
+        resources: Which of "commits", "issues" and "pull_requests" to fetch.
+            Defaults to all of them.
+        max_workers: The number of repositories to fetch in parallel. Defaults to 4.
+        output: The format of the tables, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        categorical: If True, return logins and labels as categoricals backed by the
+            shared dictionaries of `github_analyser.dictionaries`. Defaults to False.
+        progress: Called with the resource, the repo name, the number of fetches
+            done and the total number of fetches, whenever a fetch finishes.
+            Optional, default is None.
+        processes: If given, extract the pages of issues and pull requests in a
+            shared pool of this many worker processes, see
+            `github_analyser.extraction`. Optional, default is None.
+        since: If given, only fetch the rows updated at or after this ISO 8601 date
+            or timestamp, as the `since` argument of the getters. Optional, default
+            is None.
+
+    Returns:
+        dict: The latest repos table under "repos", to be used as the snapshot of the
+        next crawl, and for each resource a dictionary mapping the names of the
+        repos that changed to their tables. Repos that did not change are left out,
+        as are those that failed, whose exceptions are under "errors", by resource
+        and repo name. A repo that failed should be left out of the next snapshot,
+        so that it is crawled again.
+    """
+    check_output(output)
+    unknown = set(resources) - set(RESOURCES)
+    if unknown:
+        msg = f"Unknown resources {sorted(unknown)}, must be some of {RESOURCES}."
+        raise ValueError(msg)
+
+    repos = get_repos(org_name, output=output, change_columns=True)
+    current = _rows_by_name(repos)
+    previous = _previous_rows(snapshot, resources)
+
+    jobs = [
+        (resource, name)
+        for name, row in current.items()
+        for resource in resources
+        if changed_resources(row, previous[resource].get(name), (resource,))
+    ]
+    logging.info(
+        "Crawling %d of %d repo resources of %s.",
+        len(jobs),
+        len(current) * len(resources),
+        org_name,
+    )
+
+    extra_arguments: dict[str, dict[str, Any]] = {
+        resource: {"processes": processes}
+        if processes and resource in PROCESS_POOL_RESOURCES
+        else {}
+        for resource in resources
+    }
+    if since is not None:
+        for arguments in extra_arguments.values():
+            arguments["since"] = since
+    lock = threading.Lock()
+    done = 0
+
+    def fetch(job: tuple[str, str]) -> Any:
+        nonlocal done
+        resource, name = job
+        try:
+            return GETTERS[resource](
+                org_name,
+                name,
+                output=output,
+                categorical=categorical,
+                **extra_arguments[resource],
+            )
+        finally:
+            if progress is not None:
+                with lock:
+                    done += 1
+                    progress(resource, name, done, len(jobs))
+
+    bulk = run_bulk(fetch, jobs, max_workers=max_workers)
+    result: dict[str, Any] = {"repos": repos}
+    # Return the repos of each resource in the order of the repos table.
+    for resource in resources:
+        result[resource] = {
+            name: bulk.successes[(resource, name)]
+            for name in current
+            if (resource, name) in bulk.successes
+        }
+    result["errors"] = {
+        resource: {
+            name: bulk.failures[(resource, name)]
+            for name in current
+            if (resource, name) in bulk.failures
+        }
+        for resource in resources
+    }
+    return result
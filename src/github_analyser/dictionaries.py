@@ -0,0 +1,106 @@
+"""Session-wide dictionaries that map logins and label names to integer codes.
+
+The same logins turn up over and over again, as authors, commenters, reviewers,
+collaborators and members, and so do label names across issues. The getters pass every
+login through `LOGINS.intern` and every label through `LABELS.intern`, so that each
+distinct string is stored only once per session, and the string gets an integer code
+that stays the same for the rest of the session.
+
+With `categorical=True`, the getters return these columns as pandas categoricals, or
+Arrow/Polars dictionary columns, whose categories are the shared dictionary. Because
+dictionaries only ever grow, a frame built earlier in a session has a prefix of the
+categories of one built later, and the codes of the two agree. To compare or join them
+directly, give both the latest categories:
+
+    issues["author"] = issues["author"].astype(LOGINS.categorical_dtype())
+"""
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+
+class StringDictionary:
+    """A thread-safe mapping between strings and integer codes, that only grows.
+
+    Codes are assigned in order of first appearance, starting from 0. None is never
+    added to the dictionary, and is encoded as -1.
+    """
+
+    def __init__(self) -> None:
+        self._codes: dict[str, int] = {}
+        self._values: list[str] = []
+        self._lock = threading.Lock()
+        self._dtype: Any = None
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._codes
+
+    def _add(self, value: str) -> int:
+        with self._lock:
+            code = self._codes.get(value)
+            if code is None:
+                code = len(self._values)
+                self._values.append(value)
+                self._codes[value] = code
+            return code
+
+    def encode(self, value: str | None) -> int:
+        """Return the code of `value`, adding it to the dictionary if necessary."""
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._add(value)
+        return code
+
+    def encode_many(self, values: Iterable[str | None]) -> list[int]:
+        """Return the codes of all of `values`, see `encode`."""
+        return [self.encode(value) for value in values]
+
+    def intern(self, value: str | None) -> str | None:
+        """Return the dictionary's copy of `value`, adding it if necessary."""
+        if value is None:
+            return None
+        return self._values[self.encode(value)]
+
+    def decode(self, code: int) -> str | None:
+        """Return the string for `code`, or None for -1."""
+        if code == -1:
+            return None
+        return self._values[code]
+
+    def values(self) -> list[str]:
+        """Return a snapshot of all the strings in the dictionary, in code order."""
+        return self._values[: len(self._values)]
+
+    def categorical_dtype(self) -> Any:
+        """Return a pandas CategoricalDtype whose categories are the dictionary."""
+        import pandas as pd
+
+        dtype = self._dtype
+        if dtype is None or len(dtype.categories) != len(self._values):
+            dtype = pd.CategoricalDtype(self.values())
+            self._dtype = dtype
+        return dtype
+
+    def arrow_dictionary(self) -> Any:
+        """Return the dictionary as a pyarrow string Array."""
+        import pyarrow as pa
+
+        return pa.array(self.values(), type=pa.string())
+
+    def clear(self) -> None:
+        """Empty the dictionary. Codes handed out before this become meaningless."""
+        with self._lock:
+            self._codes = {}
+            self._values = []
+            self._dtype = None
+
+
+LOGINS = StringDictionary()
+LABELS = StringDictionary()
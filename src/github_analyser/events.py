@@ -0,0 +1,338 @@
+"""Updating issues, pull requests and commits from archived webhook events.
+
+`EventStore` holds the issues, pull requests and commits of repositories in the
+schemas of `get_issues`, `get_pull_requests` and `get_commits`. It can be seeded with
+the output of those getters, and then kept up to date by replaying webhook payloads,
+without querying the API.
+
+Events are read from JSON lines files, one delivery per line, as an object with the
+event type, i.e. the X-GitHub-Event header, under "event" and the payload under
+"payload":
+
+    {"event": "issues", "payload": {"action": "opened", "issue": {...}, ...}}
+
+The events applied are:
+
+- issues: Adds or updates an issue, or removes it when deleted.
+- issue_comment: Adds the commenter to the comments of an issue or pull request.
+- pull_request: Adds or updates a pull request.
+- pull_request_review: Adds the reviewer to the reviews of a pull request.
+- push: Adds the commits pushed to the default branch. Their node ID and line
+  statistics are not part of the event, so they are left empty, and
+  `add_commit_stats` looks both up by hash.
+
+Events older than the data the store has for an issue or pull request, by
+updated_at, are ignored, as are comments and reviews that were already applied, so
+events delivered twice are only counted once. Comments and reviews that are already
+in the data a row was seeded with, as they were made at or before its updated_at or
+are listed with the same login and time, are ignored too, so the events of an
+archive can overlap with the output of the getters.
+
+Other events are ignored. Events that refer to an issue or pull request the store
+does not have, such as a comment on an issue opened before the archive starts, are
+recorded in `gaps`, for a backfill with the getters.
+"""
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from github_analyser.commits import COMMIT_SCHEMA
+from github_analyser.dictionaries import LABELS, LOGINS
+from github_analyser.issues import ISSUE_SCHEMA
+from github_analyser.output import check_output, columns_from, to_output
+from github_analyser.pull_requests import PULL_REQUEST_SCHEMA
+
+RESOURCES = ("issues", "pull_requests", "commits")
+_SCHEMAS = {
+    "issues": ISSUE_SCHEMA,
+    "pull_requests": PULL_REQUEST_SCHEMA,
+    "commits": COMMIT_SCHEMA,
+}
+
+
+def _login(user: dict | None) -> str | None:
+    return LOGINS.intern(user["login"]) if user else None
+
+
+def _earliest(first: str | None, timestamp: str | None) -> str | None:
+    if first is None or (timestamp is not None and timestamp < first):
+        return timestamp
+    return first
+
+
+def _latest(last: str | None, timestamp: str | None) -> str | None:
+    if last is None or (timestamp is not None and timestamp > last):
+        return timestamp
+    return last
+
+
+class EventStore:
+    """Issues, pull requests and commits of repositories, updated by webhook events.
+
+    Rows are kept per repository, keyed by the node ID of the issue or pull request,
+    and by the hash of the commit.
+    """
+
+    def __init__(self) -> None:
+        # resource -> repo -> key -> row.
+        self._rows: dict[str, dict[str, dict[str, dict[str, Any]]]] = {
+            resource: {} for resource in RESOURCES
+        }
+        # (resource, repo) pairs that had events for rows the store does not have.
+        self.gaps: set[tuple[str, str]] = set()
+        # The IDs of the comments and reviews applied, by kind.
+        self._applied: dict[str, set[int]] = {"comment": set(), "review": set()}
+        # The updated_at of the data each issue or pull request was seeded with, by
+        # node ID. Its comments and reviews up to then are already in the data.
+        self._seeded_at: dict[str, str] = {}
+
+    def _table(self, resource: str, repo: str) -> dict[str, dict[str, Any]]:
+        return self._rows[resource].setdefault(repo, {})
+
+    def _add(self, resource: str, repo: str, data: Any, key: str) -> None:
+        schema = _SCHEMAS[resource]
+        columns = columns_from(data, list(schema))
+        table = self._table(resource, repo)
+        for row in zip(*columns.values()):
+            record = dict(zip(schema, row))
+            table[record[key]] = record
+            if resource != "commits" and record["updated_at"] is not None:
+                self._seeded_at[record[key]] = record["updated_at"]
+        self.gaps.discard((resource, repo))
+
+    def _is_new(
+        self, row: dict[str, Any], kind: str, event_id: int, login: str | None, at: str
+    ) -> bool:
+        """Whether a comment or review is not yet in the row, and mark it applied."""
+        if event_id in self._applied[kind]:
+            return False
+        self._applied[kind].add(event_id)
+        seeded_at = self._seeded_at.get(row["id"])
+        if seeded_at is not None and at <= seeded_at:
+            return False
+        made = zip(row[f"{kind}s"], row[f"{kind}_dates"])
+        return (login, at) not in made
+
+    def add_issues(self, repo: str, issues: Any) -> None:
+        """Add issues, as returned by `get_issues`, of the repository `repo`,
+        replacing any rows for them."""
+        self._add("issues", repo, issues, "id")
+
+    def add_pull_requests(self, repo: str, pull_requests: Any) -> None:
+        """Add pull requests, as returned by `get_pull_requests`, of the repository
+        `repo`, replacing any rows for them."""
+        self._add("pull_requests", repo, pull_requests, "id")
+
+    def add_commits(self, repo: str, commits: Any) -> None:
+        """Add commits, as returned by `get_commits`, of the repository `repo`,
+        replacing any rows for them."""
+        self._add("commits", repo, commits, "hash")
+
+    def _apply_issue(self, repo: str, action: str, issue: dict) -> None:
+        table = self._table("issues", repo)
+        if action == "deleted":
+            table.pop(issue["node_id"], None)
+            return
+        row = table.get(issue["node_id"])
+        if (
+            row is not None
+            and row.get("updated_at") is not None
+            and row["updated_at"] > issue["updated_at"]
+        ):
+            # An older event than the data the store already has.
+            return
+        if row is None:
+            row = {"comments": [], "comment_dates": [], "first_comment_at": None}
+            if issue["comments"]:
+                # The comments made before the event are not in it.
+                self.gaps.add(("issues", repo))
+        row.update(
+            {
+                "id": issue["node_id"],
+                "title": issue["title"],
+                "body": issue["body"],
+                "author": _login(issue["user"]),
+                "created_at": issue["created_at"],
+                "closed_at": issue["closed_at"],
+                "updated_at": issue["updated_at"],
+                "labels": [LABELS.intern(label["name"]) for label in issue["labels"]],
+            }
+        )
+        table[issue["node_id"]] = row
+
+    def _apply_comment(self, repo: str, action: str, payload: dict) -> None:
+        if action != "created":
+            return
+        issue = payload["issue"]
+        resource = "pull_requests" if "pull_request" in issue else "issues"
+        row = self._table(resource, repo).get(issue["node_id"])
+        if row is None:
+            self.gaps.add((resource, repo))
+            return
+        comment = payload["comment"]
+        login = _login(comment["user"])
+        if not self._is_new(
+            row, "comment", comment["id"], login, comment["created_at"]
+        ):
+            return
+        row["comments"] = [*row["comments"], login]
+        row["comment_dates"] = [*row["comment_dates"], comment["created_at"]]
+        row["first_comment_at"] = _earliest(
+            row["first_comment_at"], comment["created_at"]
+        )
+        row["updated_at"] = _latest(row["updated_at"], comment["created_at"])
+        if resource == "pull_requests" and row["total_comments_count"] is not None:
+            row["total_comments_count"] += 1
+
+    def _apply_pull_request(self, repo: str, pull_request: dict) -> None:
+        table = self._table("pull_requests", repo)
+        row = table.get(pull_request["node_id"])
+        if (
+            row is not None
+            and row["updated_at"] is not None
+            and row["updated_at"] > pull_request["updated_at"]
+        ):
+            # An older event than the data the store already has.
+            return
+        if row is None:
+            row = {
+                "comments": [],
+                "comment_dates": [],
+                "reviews": [],
+                "review_dates": [],
+                "first_comment_at": None,
+                "first_review_at": None,
+            }
+            if pull_request.get("comments") or pull_request.get("review_comments"):
+                self.gaps.add(("pull_requests", repo))
+        merged = pull_request["merged"] or pull_request["merged_at"] is not None
+        row.update(
+            {
+                "id": pull_request["node_id"],
+                "author": _login(pull_request["user"]),
+                "changed_files": pull_request.get("changed_files"),
+                "closed": pull_request["state"] == "closed",
+                "closed_at": pull_request["closed_at"],
+                "created_at": pull_request["created_at"],
+                "merged": merged,
+                "merged_at": pull_request["merged_at"],
+                "state": "MERGED" if merged else pull_request["state"].upper(),
+                "updated_at": pull_request["updated_at"],
+                "total_comments_count": pull_request.get("comments", 0)
+                + pull_request.get("review_comments", 0),
+            }
+        )
+        table[pull_request["node_id"]] = row
+
+    def _apply_review(self, repo: str, action: str, payload: dict) -> None:
+        if action != "submitted":
+            return
+        row = self._table("pull_requests", repo).get(payload["pull_request"]["node_id"])
+        if row is None:
+            self.gaps.add(("pull_requests", repo))
+            return
+        review = payload["review"]
+        login = _login(review["user"])
+        if not self._is_new(row, "review", review["id"], login, review["submitted_at"]):
+            return
+        row["reviews"] = [*row["reviews"], login]
+        row["review_dates"] = [*row["review_dates"], review["submitted_at"]]
+        row["first_review_at"] = _earliest(
+            row["first_review_at"], review["submitted_at"]
+        )
+        row["updated_at"] = _latest(row["updated_at"], review["submitted_at"])
+
+    def _apply_push(self, repo: str, payload: dict) -> None:
+        repository = payload["repository"]
+        if payload["ref"] != f"refs/heads/{repository['default_branch']}":
+            return
+        table = self._table("commits", repo)
+        for commit in payload["commits"]:
+            if commit["id"] in table:
+                continue
+            author = commit["author"]
+            username = author.get("username")
+            table[commit["id"]] = {
+                "id": None,
+                "hash": commit["id"],
+                "message": commit["message"].split("\n", 1)[0],
+                "author": author["name"],
+                "login": LOGINS.intern(username) if username else None,
+                "date": commit["timestamp"],
+                "changed_files": None,
+                "additions": None,
+                "deletions": None,
+                "pr_id": None,
+                "repo_id": repository["node_id"],
+            }
+
+    def apply(self, event: str, payload: dict) -> None:
+        """Apply a single webhook event.
+
+        Args:
+            event: The event type, e.g. "issues" or "push".
+            payload: The payload of the event.
+        """
+        if "repository" not in payload:
+            return
+        repo = payload["repository"]["name"]
+        action = payload.get("action", "")
+        if event == "issues":
+            self._apply_issue(repo, action, payload["issue"])
+        elif event == "issue_comment":
+            self._apply_comment(repo, action, payload)
+        elif event == "pull_request":
+            self._apply_pull_request(repo, payload["pull_request"])
+        elif event == "pull_request_review":
+            self._apply_review(repo, action, payload)
+        elif event == "push":
+            self._apply_push(repo, payload)
+
+    def apply_all(self, events: Iterable[dict]) -> int:
+        """Apply events, each a dictionary with keys "event" and "payload", in order.
+
+        Returns:
+            int: The number of events.
+        """
+        count = 0
+        for event in events:
+            self.apply(event["event"], event["payload"])
+            count += 1
+        return count
+
+    def ingest(self, path: str | Path) -> int:
+        """Apply the events of a JSON lines file, see the module docstring.
+
+        Returns:
+            int: The number of events.
+        """
+        with Path(path).open() as f:
+            return self.apply_all(json.loads(line) for line in f if line.strip())
+
+    def repos(self, resource: str) -> list[str]:
+        """The repositories that have any rows of `resource`."""
+        return sorted(repo for repo, rows in self._rows[resource].items() if rows)
+
+    def _output(self, resource: str, repo: str, output: str, categorical: bool) -> Any:
+        check_output(output)
+        schema = _SCHEMAS[resource]
+        rows = list(self._rows[resource].get(repo, {}).values())
+        columns = {name: [row.get(name) for row in rows] for name in schema}
+        return to_output(columns, schema, output, categorical)
+
+    def issues(self, repo: str, output: str = "pandas", categorical: bool = False):
+        """The issues of `repo`, in the schema of `get_issues`."""
+        return self._output("issues", repo, output, categorical)
+
+    def pull_requests(
+        self, repo: str, output: str = "pandas", categorical: bool = False
+    ):
+        """The pull requests of `repo`, in the schema of `get_pull_requests`."""
+        return self._output("pull_requests", repo, output, categorical)
+
+    def commits(self, repo: str, output: str = "pandas", categorical: bool = False):
+        """The commits of `repo`, in the schema of `get_commits`."""
+        return self._output("commits", repo, output, categorical)
@@ -0,0 +1,98 @@
+"""Extracting pages of results in a pool of worker processes.
+
+Turning the nested JSON of a page into columns is plain Python, and so is limited to a
+single core by the GIL however many threads fetch pages. With `processes` set, the
+getters that support it send every page to a shared pool of worker processes as soon
+as it has been fetched. Each worker extracts the page into a pyarrow Table and sends
+it back serialised in the Arrow IPC format, which the parent reads without copying
+the values. The tables of all the pages are then concatenated, again without copying,
+and converted to the requested output format.
+
+The pool is started the first time it is needed and then reused, also by getters
+running in parallel threads, e.g. under `crawl_org`. Worker processes are started
+with the "spawn" method, which is safe in the presence of the fetcher threads.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from github_analyser.output import empty_columns, to_arrow
+
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(processes: int) -> ProcessPoolExecutor:
+    """Return the shared pool of worker processes, starting it if necessary.
+
+    Args:
+        processes: The number of worker processes. If the pool is running with a
+            different number, it is replaced.
+    """
+    global _pool, _pool_size  # noqa: PLW0603
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_size = processes
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the shared pool of worker processes, if it is running."""
+    global _pool, _pool_size  # noqa: PLW0603
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_size = 0
+
+
+def _extract_to_ipc(
+    extractor: Callable[[Any], dict[str, list]], schema: dict[str, str], page: Any
+) -> bytes:
+    """Extract a page into a pyarrow Table, serialised in the Arrow IPC format."""
+    import pyarrow as pa
+
+    table = to_arrow(extractor(page), schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def extract_pages(
+    pages: Iterable[Any],
+    extractor: Callable[[Any], dict[str, list]],
+    schema: dict[str, str],
+    processes: int,
+) -> Any:
+    """Extract pages in the shared pool of worker processes.
+
+    Args:
+        pages: The responses from the GitHub API, e.g. from `iter_pages`. Each one is
+            sent to the pool as soon as it is yielded.
+        extractor: Maps a page to its columns. Must be a module level function, so
+            that it can be sent to the workers.
+        schema: The column kinds of the result, see `arrow_type`.
+        processes: The number of worker processes.
+
+    Returns:
+        pyarrow.Table: The rows of all the pages, in order.
+    """
+    import pyarrow as pa
+
+    pool = get_process_pool(processes)
+    futures = [pool.submit(_extract_to_ipc, extractor, schema, page) for page in pages]
+    tables = [pa.ipc.open_stream(future.result()).read_all() for future in futures]
+    if not tables:
+        return to_arrow(empty_columns(schema), schema)
+    return pa.concat_tables(tables)
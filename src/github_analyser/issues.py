@@ -1,31 +1,63 @@
 from __future__ import annotations
 
+import datetime
 import logging
 from functools import reduce
-
-import pandas as pd
-
-from github_analyser.utils import camel_to_snake, query_with_pagination
-
+from typing import TYPE_CHECKING
+
+from github_analyser.dictionaries import LABELS, LOGINS
+from github_analyser.extraction import extract_pages
+from github_analyser.output import (
+    check_output,
+    empty_columns,
+    extend_columns,
+    save_output,
+    table_to_output,
+    to_output,
+)
+from github_analyser.utils import filter_pages, github_timestamp, iter_pages
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ISSUES_PAGE_SIZE = 100
 MAX_COMMENTS = 100
 MAX_LABELS = 10
 
-
-def _get_issues_query(org_name: str, repo_name: str) -> str:
+ISSUE_SCHEMA = {
+    "id": "string",
+    "title": "string",
+    "body": "string",
+    "author": "login",
+    "created_at": "string",
+    "closed_at": "string",
+    "updated_at": "string",
+    "comments": "list<login>",
+    "comment_dates": "list<string>",
+    "first_comment_at": "string",
+    "labels": "list<label>",
+}
+
+
+def _get_issues_query(org_name: str, repo_name: str, since: str | None = None) -> str:
+    # GitHub filters by updatedAt >= since.
+    filter_by = f', filterBy: {{since: "{since}"}}' if since is not None else ""
     return f"""
 query ($pagination_cursor: String) {{
   repository(owner: "{org_name}", name: "{repo_name}") {{
-    issues(first: 100, after: $pagination_cursor, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+    issues(first: {ISSUES_PAGE_SIZE}, after: $pagination_cursor, orderBy: {{field: UPDATED_AT, direction: DESC}}{filter_by}) {{
       pageInfo {{
         endCursor
         hasNextPage
       }}
       edges {{
         node {{
+          id
           title
           body
           createdAt
           closedAt
+          updatedAt
           author {{
             login
           }}
@@ -64,54 +96,25 @@ def _author_login(node):
         node (dict): The node.
 
     Returns:
-        str: The login of the author, or pd.NA if the author is None.
+        str: The login of the author, or None if the author is None.
     """
     author = node["author"]
     if author is None:
-        return pd.NA
-    return author["login"]
-
+        return None
+    return LOGINS.intern(author["login"])
 
-def get_issues(org_name: str, repo_name: str, save: bool | str = False) -> pd.DataFrame:
-    """Get all issues from a repository.
 
-    Args:
-        org_name (str): The name of the organization.
-        repo_name (str): The name of the repository.
-        save (bool | str, optional): If True, save the data to
-        "data/{repo_name}/issues.csv" or specify a path. Defaults to False.
-
-    Returns:
-        pandas Dataframe: One row per issue.
-    """
-    query = _get_issues_query(org_name, repo_name)
-    pages = query_with_pagination(
-        query, page_info_path=["data", "repository", "issues"]
-    )
-    edges = [
-        reduce(
-            lambda x, key: x[key],
-            ["data", "repository", "issues", "edges"],
-            page,
-        )
-        for page in pages
-    ]
-    flattened_edges = sum(edges, [])
-    nodes = [x["node"] for x in flattened_edges]
-    if not nodes:
-        return pd.DataFrame(
-            columns=[
-                "title",
-                "body",
-                "author",
-                "created_at",
-                "closed_at",
-                "comments",
-                "labels",
-            ]
-        )
+def _issue_columns(nodes: list[dict]) -> dict[str, list]:
+    """Extract the columns of the issues frame from issue nodes."""
+    columns = empty_columns(ISSUE_SCHEMA)
     for node in nodes:
-        node["author"] = _author_login(node)
+        columns["id"].append(node["id"])
+        columns["title"].append(node["title"])
+        columns["body"].append(node["body"])
+        columns["created_at"].append(node["createdAt"])
+        columns["closed_at"].append(node["closedAt"])
+        columns["updated_at"].append(node["updatedAt"])
+        columns["author"].append(_author_login(node))
 
         if node["comments"]["totalCount"] > MAX_COMMENTS:
             logging.warning(
@@ -119,9 +122,18 @@ def get_issues(org_name: str, repo_name: str, save: bool | str = False) -> pd.Da
                 node["title"],
                 MAX_COMMENTS,
             )
-        node["comments"] = [
-            _author_login(edge["node"]) for edge in node["comments"]["edges"]
-        ]
+        columns["comments"].append(
+            [_author_login(edge["node"]) for edge in node["comments"]["edges"]]
+        )
+        columns["comment_dates"].append(
+            [edge["node"]["createdAt"] for edge in node["comments"]["edges"]]
+        )
+        columns["first_comment_at"].append(
+            min(
+                (edge["node"]["createdAt"] for edge in node["comments"]["edges"]),
+                default=None,
+            )
+        )
 
         if node["labels"]["totalCount"] > MAX_LABELS:
             logging.warning(
@@ -129,16 +141,80 @@ def get_issues(org_name: str, repo_name: str, save: bool | str = False) -> pd.Da
                 node["title"],
                 MAX_LABELS,
             )
-        node["labels"] = [edge["node"]["name"] for edge in node["labels"]["edges"]]
+        columns["labels"].append(
+            [LABELS.intern(edge["node"]["name"]) for edge in node["labels"]["edges"]]
+        )
+    return columns
+
+
+def _issue_page_columns(page: dict) -> dict[str, list]:
+    """Extract the columns of the issues frame from a page of the issues query."""
+    edges = reduce(
+        lambda x, key: x[key],
+        ["data", "repository", "issues", "edges"],
+        page,
+    )
+    return _issue_columns([x["node"] for x in edges])
+
+
+def get_issues(
+    org_name: str,
+    repo_name: str,
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+    processes: int | None = None,
+    since: datetime.datetime | str | None = None,
+    until: datetime.datetime | str | None = None,
+) -> pd.DataFrame:
+    """Get all issues from a repository, or those updated in a time window.
+
+    Args:
+        org_name (str): The name of the organization.
+        repo_name (str): The name of the repository.
+        save (bool | str, optional): If True, save the data to
+        "data/{repo_name}/issues.csv" or specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+        categorical (bool, optional): If True, return logins and labels as categoricals
+        backed by the shared dictionaries of `github_analyser.dictionaries`. Defaults to
+        False.
+        processes (int, optional): If given, extract the pages in a pool of this many
+        worker processes, see `github_analyser.extraction`. Defaults to None (extract
+        them in this process).
+        since (datetime | str, optional): Only get issues updated at or after this
+        datetime or ISO 8601 timestamp, naive ones being in UTC. GitHub filters them,
+        so older issues are not fetched. Defaults to None.
+        until (datetime | str, optional): Only get issues last updated at or before
+        this time. Later issues are still fetched, to be dropped. Defaults to None.
 
-    # TODO The columns all have a type of `object`, even though e.g. `createdAt` is a
-    # date and `title` is a string.
-    df = pd.DataFrame(nodes)
-    df.rename(columns=camel_to_snake, inplace=True)
+    Returns:
+        pandas Dataframe: One row per issue.
+    """
+    check_output(output)
+    since = github_timestamp(since) if since is not None else None
+    until = github_timestamp(until) if until is not None else None
+    windowed = since is not None or until is not None
+    query = _get_issues_query(org_name, repo_name, since)
+    pages = iter_pages(query, page_info_path=["data", "repository", "issues"])
+    if windowed:
+        pages = filter_pages(
+            pages, ["data", "repository", "issues", "edges"], since, until
+        )
+    # TODO The dates are kept as strings, even though e.g. `created_at` is a date.
+    if processes:
+        table = extract_pages(pages, _issue_page_columns, ISSUE_SCHEMA, processes)
+        result = table_to_output(table, ISSUE_SCHEMA, output, categorical)
+    else:
+        columns = empty_columns(ISSUE_SCHEMA)
+        # Each page is extracted while the next one is being fetched.
+        for page in pages:
+            extend_columns(columns, _issue_page_columns(page))
+        result = to_output(columns, ISSUE_SCHEMA, output, categorical)
 
     if save:
         if save is True:
             save = f"data/{repo_name}/issues.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    return result
@@ -1,10 +1,22 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
+from github_analyser.bulk import run_bulk
+from github_analyser.output import check_output, save_output
+from github_analyser.utils import request_github_graphql
 
-from github_analyser.utils import camel_to_snake, request_github_graphql
+if TYPE_CHECKING:
+    import pandas as pd
+
+LICENCE_SCHEMA = {
+    "repo_name": "string",
+    "repo_url": "string",
+    "repo_id": "string",
+    "name": "string",
+    "spdx_id": "string",
+}
 
 
 def _get_licence_query(org_name: str, repo_name: str) -> str:
@@ -23,6 +35,35 @@ def _get_licence_query(org_name: str, repo_name: str) -> str:
     """
 
 
+def _licence_record(org_name: str, repo_name: str) -> dict:
+    """Fetch info about the licence of a repository as a dictionary."""
+    query = _get_licence_query(org_name, repo_name)
+
+    response = request_github_graphql({"query": query})
+    repo_id = response["data"]["repository"]["id"]
+    repo_url = response["data"]["repository"]["url"]
+    licence_info = response["data"]["repository"]["licenseInfo"]
+
+    if licence_info is None:
+        return {
+            "repo_name": repo_name,
+            "repo_url": repo_url,
+            "repo_id": repo_id,
+            "name": None,
+            "spdx_id": None,
+        }
+
+    name = licence_info.get("name", "")
+    spdx_id = licence_info.get("spdxId", "")
+    return {
+        "repo_name": repo_name,
+        "repo_url": repo_url,
+        "repo_id": repo_id,
+        "name": name,
+        "spdx_id": spdx_id,
+    }
+
+
 def get_licence(
     org_name: str,
     repo_name: str,
@@ -36,71 +77,68 @@ def get_licence(
     Returns:
         A pandas Series containing the repository name, URL, ID, licence name, and SPDX ID.
     """
-    query = _get_licence_query(org_name, repo_name)
+    import pandas as pd
 
-    response = request_github_graphql({"query": query})
-    repo_id = response["data"]["repository"]["id"]
-    repo_url = response["data"]["repository"]["url"]
-    licence_info = response["data"]["repository"]["licenseInfo"]
-
-    if licence_info is None:
-        return pd.Series(
-            {
-                "repo_name": repo_name,
-                "repo_url": repo_url,
-                "repo_id": repo_id,
-                "name": None,
-                "spdx_id": None,
-            }
-        )
-
-    name = licence_info.get("name", "")
-    spdx_id = licence_info.get("spdxId", "")
-    return pd.Series(
-        {
-            "repo_name": repo_name,
-            "repo_url": repo_url,
-            "repo_id": repo_id,
-            "name": name,
-            "spdx_id": spdx_id,
-        }
-    )
+    return pd.Series(_licence_record(org_name, repo_name))
 
 
 def get_licences(
     org_name: str,
     repo_names: list[str],
     save: bool | str = False,
+    output: str = "pandas",
+    max_workers: int = 4,
+    errors: str = "raise",
 ) -> pd.DataFrame:
     """Get information about licences for multiple repositories within an organization.
 
+    The repositories are fetched in parallel, and one that fails, e.g. because it was
+    deleted or renamed, does not stop the others.
+
     Args:
         org_name: The owner of the repositories.
         repo_names: A list of repository names.
         save (bool | str, optional): If True, save the data to "data/licences.csv".
             If a string, save to that path. Defaults to False.
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        max_workers: The number of repositories to fetch in parallel. Defaults to 4.
+        errors: What to do if any repositories fail. "raise" raises a `BulkError`
+            once all are done, whose `result` holds the partial results, the errors
+            and `retry_failed`. "ignore" leaves them out, logging a warning for each.
+            "return" leaves them out and returns them too. Defaults to "raise".
 
     Returns:
         A pandas DataFrame containing the repository IDs, licence names, and SPDX IDs.
+        With errors="return", a tuple of it and a table of the repositories that
+        failed, see `BulkResult.errors`.
 
     """
     if not isinstance(repo_names, list):
         msg = "`repo_names` must be a list of repository names."
         raise ValueError(msg)
 
-    data = []
-    for repo_name in repo_names:
-        series = get_licence(org_name, repo_name)
-        data.append(series)
+    if errors not in ("raise", "ignore", "return"):
+        msg = f"Unknown errors {errors!r}, must be 'raise', 'ignore' or 'return'."
+        raise ValueError(msg)
 
-    df = pd.DataFrame(data)
-    df.rename(columns=camel_to_snake, inplace=True)
+    check_output(output)
+    records = run_bulk(
+        lambda repo_name: _licence_record(org_name, repo_name),
+        repo_names,
+        max_workers=max_workers,
+    )
+    if errors == "raise":
+        records.raise_for_failures()
+    result = records.table(LICENCE_SCHEMA, output)
 
     if save:
         if save is True:
             if not Path("data").exists():
                 Path("data").mkdir(parents=True, exist_ok=True)
             save = "data/licences.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    if errors == "return":
+        return result, records.errors(output)
+    return result
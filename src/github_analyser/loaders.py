@@ -0,0 +1,287 @@
+"""Loading data saved by `github-analyser crawl` lazily.
+
+The crawl writes one file per repository and resource,
+
+    {data_dir}/{org}/{resource}/repo={repo}/part-0.parquet
+
+which `pyarrow.dataset` reads as a single dataset partitioned by repo. The loaders
+here only read what a query needs: the files of the requested repositories, the
+requested columns, and with Parquet, only the row groups that can match the filters.
+Files are memory mapped, so the operating system pages data in as it is read.
+
+    prs = load_pull_requests(
+        "my-org",
+        since="2025-01-01",
+        columns=["id", "author", "created_at", "merged_at"],
+        authors=team_logins,
+    )
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from github_analyser.crawl import SINCE_COLUMNS
+from github_analyser.output import _to_polars, check_output
+from github_analyser.utils import github_timestamp, parse_timestamp
+
+FILE_FORMATS = ("parquet", "csv")
+
+# The author column of each resource, for the `authors` filter.
+_AUTHOR_COLUMNS = {"commits": "login", "issues": "author", "pull_requests": "author"}
+# The column of each resource `until` applies to, as for the getters.
+_UNTIL_COLUMNS = {
+    "commits": "date",
+    "issues": "updated_at",
+    "pull_requests": "updated_at",
+}
+# Commit dates keep the UTC offset of the author, so they are compared as timestamps.
+# The other timestamps are all in UTC, and compare as strings, which lets Parquet
+# skip row groups by their statistics.
+_OFFSET_RESOURCES = ("commits",)
+
+
+def _dataset(path: Path, file_format: str, timestamps: tuple[str, ...] = ()) -> Any:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    if file_format not in FILE_FORMATS:
+        msg = f"Unknown file format {file_format!r}, must be one of {FILE_FORMATS}."
+        raise ValueError(msg)
+    if not path.exists():
+        msg = f"No saved data at {path}."
+        raise FileNotFoundError(msg)
+    partitioning = None
+    if path.is_dir():
+        partitioning = ds.partitioning(
+            pa.schema([("repo", pa.string())]), flavor="hive"
+        )
+    file_format_ = ds.ParquetFileFormat()
+    if file_format == "csv":
+        # Timestamps are saved as strings, keep them so to compare them with `since`.
+        file_format_ = ds.CsvFileFormat(
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in timestamps}
+            )
+        )
+    return ds.dataset(
+        str(path),
+        format=file_format_,
+        partitioning=partitioning,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def _convert(table: Any, output: str) -> Any:
+    """Convert a pyarrow Table to the requested output format."""
+    if output == "arrow":
+        return table
+    if output == "records":
+        return table.to_pylist()
+    if output == "polars":
+        return _to_polars(table)
+    return table.to_pandas()
+
+
+def _load(
+    resource: str,
+    org_name: str,
+    repo_name: str | list[str] | None,
+    since: str | None,
+    until: str | None,
+    authors: list[str] | None,
+    columns: list[str] | None,
+    filter: Any,
+    data_dir: str | Path,
+    file_format: str,
+    output: str,
+) -> Any:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    check_output(output)
+    timestamps = SINCE_COLUMNS[resource]
+    dataset = _dataset(Path(data_dir) / org_name / resource, file_format, timestamps)
+    utc = pa.timestamp("s", tz="UTC")
+
+    def field(name: str) -> Any:
+        if resource in _OFFSET_RESOURCES:
+            return ds.field(name).cast(utc)
+        return ds.field(name)
+
+    def bound(value: str) -> Any:
+        if resource in _OFFSET_RESOURCES:
+            return pa.scalar(parse_timestamp(value), utc)
+        return github_timestamp(value)
+
+    conditions = []
+    if repo_name is not None:
+        repo_names = [repo_name] if isinstance(repo_name, str) else list(repo_name)
+        conditions.append(ds.field("repo").isin(repo_names))
+    if since is not None:
+        # A row matches if any of its timestamps is in the window.
+        condition = None
+        for name in timestamps:
+            term = field(name) >= bound(since)
+            condition = term if condition is None else condition | term
+        conditions.append(condition)
+    if until is not None:
+        conditions.append(field(_UNTIL_COLUMNS[resource]) <= bound(until))
+    if authors is not None:
+        conditions.append(ds.field(_AUTHOR_COLUMNS[resource]).isin(list(authors)))
+    if filter is not None:
+        conditions.append(filter)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    table = dataset.to_table(columns=columns, filter=expression)
+    return _convert(table, output)
+
+
+def load_issues(
+    org_name: str,
+    repo_name: str | list[str] | None = None,
+    since: str | None = None,
+    columns: list[str] | None = None,
+    until: str | None = None,
+    authors: list[str] | None = None,
+    filter: Any = None,
+    data_dir: str | Path = "data",
+    file_format: str = "parquet",
+    output: str = "pandas",
+) -> Any:
+    """Load saved issues, reading only what is needed.
+
+    Args:
+        org_name: The name of the organisation.
+        repo_name: The repository, or a list of them, to load. Optional, default is
+            None (all of them).
+        since: Only load issues created, closed, first commented on or updated at
+            or after this ISO 8601 date or timestamp. Optional, default is None.
+        columns: The columns to load, of those of `get_issues` and "repo". Optional,
+            default is None (all of them).
+        until: Only load issues last updated at or before this date or timestamp,
+            as `get_issues` does. Optional, default is None.
+        authors: Only load issues opened by these logins. Optional, default is None.
+        filter: Any further condition, as a `pyarrow.dataset` expression, e.g.
+            `pyarrow.dataset.field("closed_at").is_null()`. Optional, default is None.
+        data_dir: The directory the crawl wrote to. Defaults to "data".
+        file_format: "parquet" or "csv". Filters can only skip reading parts of
+            Parquet files. Defaults to "parquet".
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+
+    Returns:
+        The matching issues, with the requested columns.
+    """
+    return _load(
+        "issues",
+        org_name,
+        repo_name,
+        since,
+        until,
+        authors,
+        columns,
+        filter,
+        data_dir,
+        file_format,
+        output,
+    )
+
+
+def load_pull_requests(
+    org_name: str,
+    repo_name: str | list[str] | None = None,
+    since: str | None = None,
+    columns: list[str] | None = None,
+    until: str | None = None,
+    authors: list[str] | None = None,
+    filter: Any = None,
+    data_dir: str | Path = "data",
+    file_format: str = "parquet",
+    output: str = "pandas",
+) -> Any:
+    """Load saved pull requests, reading only what is needed.
+
+    Takes the same arguments as `load_issues`, except that `since` and `until` apply
+    to the updated_at column.
+
+    Returns:
+        The matching pull requests, with the requested columns.
+    """
+    return _load(
+        "pull_requests",
+        org_name,
+        repo_name,
+        since,
+        until,
+        authors,
+        columns,
+        filter,
+        data_dir,
+        file_format,
+        output,
+    )
+
+
+def load_commits(
+    org_name: str,
+    repo_name: str | list[str] | None = None,
+    since: str | None = None,
+    columns: list[str] | None = None,
+    until: str | None = None,
+    authors: list[str] | None = None,
+    filter: Any = None,
+    data_dir: str | Path = "data",
+    file_format: str = "parquet",
+    output: str = "pandas",
+) -> Any:
+    """Load saved commits, reading only what is needed.
+
+    Takes the same arguments as `load_issues`, except that `since` and `until` apply
+    to the date column, compared in UTC, and `authors` to the login column.
+
+    Returns:
+        The matching commits, with the requested columns.
+    """
+    return _load(
+        "commits",
+        org_name,
+        repo_name,
+        since,
+        until,
+        authors,
+        columns,
+        filter,
+        data_dir,
+        file_format,
+        output,
+    )
+
+
+def load_repos(
+    org_name: str,
+    columns: list[str] | None = None,
+    data_dir: str | Path = "data",
+    file_format: str = "parquet",
+    output: str = "pandas",
+) -> Any:
+    """Load the saved repos table of an organisation.
+
+    Args:
+        org_name: The name of the organisation.
+        columns: The columns to load. Optional, default is None (all of them).
+        data_dir: The directory the crawl wrote to. Defaults to "data".
+        file_format: "parquet" or "csv". Defaults to "parquet".
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+
+    Returns:
+        The repos table.
+    """
+    check_output(output)
+    path = Path(data_dir) / org_name / f"repos.{file_format}"
+    dataset = _dataset(path, file_format)
+    return _convert(dataset.to_table(columns=columns), output)
@@ -0,0 +1,221 @@
+"""Latency metrics of pull requests and issues.
+
+The metrics are computed for all rows at once, by parsing the timestamp columns of
+`get_pull_requests` and `get_issues` into datetimes and subtracting them, rather than
+row by row. They are returned as pandas timedeltas:
+
+- time_to_merge: From creation to merge, for merged pull requests.
+- time_to_close: From creation to closing, for closed pull requests and issues.
+- time_to_first_review: From creation to the first submitted review.
+- time_to_first_comment: From creation to the first comment.
+- open_age: From creation to `as_of`, for issues that are still open.
+
+When the source data is a pandas DataFrame, the metrics other than `open_age` are
+cached, keyed by the frame and a hash of the columns they are computed from, so that
+later calls on the same, unchanged frame reuse them. The frame itself is left as it
+is.
+
+`rolling_metric`, `grouped_metric` and `team_metric` summarise a metric over a rolling
+time window, per group (e.g. per repository), and per team.
+"""
+from __future__ import annotations
+
+import datetime
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any
+
+from github_analyser.output import columns_from
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# The metrics of pandas DataFrames, by the id of the frame and the names of the
+# metrics: a weak reference to the frame, the hashes of the columns the metrics were
+# computed from, and the metrics.
+_CACHE: dict[tuple[int, tuple[str, ...]], tuple[Any, Any, pd.DataFrame]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _to_datetime(values: Any) -> pd.DatetimeIndex:
+    import pandas as pd
+
+    return pd.to_datetime(pd.Index(values, dtype=object), utc=True, format="ISO8601")
+
+
+def _metrics(
+    data: Any, durations: dict[str, str], extra_columns: list[str], cache: bool
+) -> pd.DataFrame:
+    """Compute the time from creation to each of the timestamps in `durations`.
+
+    Args:
+        data: The source data, in any output format.
+        durations: Maps the name of each metric to the timestamp column it ends at.
+        extra_columns: Other columns of `data` to include in the result.
+        cache: Whether to cache the metrics of `data`, if it is a pandas DataFrame,
+            and reuse them while its columns are unchanged.
+
+    Returns:
+        pandas.DataFrame: The extra columns, created_at parsed as datetimes, and the
+        metrics.
+    """
+    import pandas as pd
+
+    source_columns = [*extra_columns, "created_at", *durations.values()]
+    key = (id(data), tuple(durations))
+    hashes = None
+    if isinstance(data, pd.DataFrame) and cache:
+        hashes = pd.util.hash_pandas_object(data[source_columns])
+        with _CACHE_LOCK:
+            cached = _CACHE.get(key)
+        if cached is not None and cached[0]() is data and cached[1].equals(hashes):
+            return cached[2].copy()
+
+    columns = columns_from(data, source_columns)
+    result = pd.DataFrame({name: columns[name] for name in extra_columns})
+    created_at = _to_datetime(columns["created_at"])
+    result["created_at"] = created_at
+    for name, end in durations.items():
+        result[name] = _to_datetime(columns[end]) - created_at
+    if isinstance(data, pd.DataFrame):
+        result.index = data.index
+    if hashes is not None:
+        reference = weakref.ref(data, lambda _: _CACHE.pop(key, None))
+        with _CACHE_LOCK:
+            _CACHE[key] = (reference, hashes, result.copy())
+    return result
+
+
+def pull_request_metrics(pull_requests: Any, cache: bool = True) -> pd.DataFrame:
+    """Compute the latency metrics of pull requests.
+
+    Args:
+        pull_requests: Pull requests as returned by `get_pull_requests`, in any output
+            format.
+        cache: If True and `pull_requests` is a pandas DataFrame, cache the metrics,
+            and reuse them while its columns are unchanged. Defaults to True.
+
+    Returns:
+        pandas.DataFrame: One row per pull request, with columns id, author,
+        created_at, time_to_merge, time_to_close, time_to_first_review and
+        time_to_first_comment.
+    """
+    return _metrics(
+        pull_requests,
+        {
+            "time_to_merge": "merged_at",
+            "time_to_close": "closed_at",
+            "time_to_first_review": "first_review_at",
+            "time_to_first_comment": "first_comment_at",
+        },
+        ["id", "author"],
+        cache,
+    )
+
+
+def issue_metrics(
+    issues: Any, as_of: datetime.datetime | None = None, cache: bool = True
+) -> pd.DataFrame:
+    """Compute the latency metrics of issues.
+
+    Args:
+        issues: Issues as returned by `get_issues`, in any output format.
+        as_of: The time to compute the age of open issues at, as a timezone aware
+            datetime. Defaults to now.
+        cache: If True and `issues` is a pandas DataFrame, cache the metrics other
+            than open_age, and reuse them while its columns are unchanged. Defaults
+            to True.
+
+    Returns:
+        pandas.DataFrame: One row per issue, with columns id, author, created_at,
+        time_to_close, time_to_first_comment and open_age.
+    """
+    import pandas as pd
+
+    result = _metrics(
+        issues,
+        {"time_to_close": "closed_at", "time_to_first_comment": "first_comment_at"},
+        ["id", "author"],
+        cache,
+    )
+    if as_of is None:
+        as_of = datetime.datetime.now(datetime.timezone.utc)
+    is_open = result["time_to_close"].isna()
+    result["open_age"] = (pd.Timestamp(as_of) - result["created_at"]).where(is_open)
+    return result
+
+
+def rolling_metric(
+    metrics: pd.DataFrame, metric: str, window: str = "30D", statistic: str = "median"
+) -> pd.Series:
+    """Summarise a metric over a rolling time window.
+
+    Args:
+        metrics: The output of `pull_request_metrics` or `issue_metrics`.
+        metric: The name of the metric, e.g. "time_to_merge".
+        window: The length of the window, as a pandas offset, e.g. "7D". Defaults to
+            "30D".
+        statistic: The statistic to compute over each window, e.g. "mean" or "max".
+            Defaults to "median".
+
+    Returns:
+        pandas.Series: The statistic of the rows created within `window` before each
+        row, indexed by created_at.
+    """
+    import pandas as pd
+
+    seconds = metrics.set_index("created_at")[metric].sort_index().dt.total_seconds()
+    rolled = seconds.rolling(window).agg(statistic)
+    return pd.to_timedelta(rolled, unit="s")
+
+
+def grouped_metric(
+    metrics: pd.DataFrame, metric: str, by: Any, statistic: str = "median"
+) -> pd.Series:
+    """Summarise a metric per group.
+
+    Args:
+        metrics: The output of `pull_request_metrics` or `issue_metrics`, possibly
+            with extra columns, e.g. a repo column added before concatenating the
+            metrics of several repositories.
+        metric: The name of the metric, e.g. "time_to_merge".
+        by: The column or columns to group by, e.g. "repo" or "author".
+        statistic: The statistic to compute for each group, e.g. "mean" or "max".
+            Defaults to "median".
+
+    Returns:
+        pandas.Series: The statistic for each group.
+    """
+    import pandas as pd
+
+    seconds = metrics.assign(_seconds=metrics[metric].dt.total_seconds())
+    statistics = seconds.groupby(by, observed=True)["_seconds"].agg(statistic)
+    return pd.to_timedelta(statistics, unit="s").rename(metric)
+
+
+def team_metric(
+    metrics: pd.DataFrame,
+    metric: str,
+    team_members: Any,
+    statistic: str = "median",
+) -> pd.Series:
+    """Summarise a metric per team of the authors.
+
+    Args:
+        metrics: The output of `pull_request_metrics` or `issue_metrics`.
+        metric: The name of the metric, e.g. "time_to_merge".
+        team_members: The output of `get_all_team_members`, in any output format. An
+            author in several teams counts towards each of them.
+        statistic: The statistic to compute for each team, e.g. "mean" or "max".
+            Defaults to "median".
+
+    Returns:
+        pandas.Series: The statistic for each team slug.
+    """
+    import pandas as pd
+
+    teams = pd.DataFrame(columns_from(team_members, ["team_slug", "login"]))
+    authors = metrics[["author", metric]].astype({"author": object})
+    merged = authors.merge(teams, left_on="author", right_on="login")
+    return grouped_metric(merged, metric, "team_slug", statistic)
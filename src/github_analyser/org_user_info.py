@@ -1,15 +1,22 @@
+from __future__ import annotations
+
 from functools import reduce
 
-import pandas as pd
+from github_analyser.dictionaries import LOGINS
+from github_analyser.output import check_output, empty_columns, save_output, to_output
+from github_analyser.utils import query_with_pagination
+
+ORG_MEMBERS_PAGE_SIZE = 30
 
-from github_analyser.utils import camel_to_snake, query_with_pagination
+ORG_MEMBER_SCHEMA = {"login": "login", "role": "string"}
+ORG_TEAM_SCHEMA = {"name": "string", "slug": "string", "id": "string"}
 
 
 def _get_org_members_query(org_name: str):
     return f"""
     query ($pagination_cursor: String) {{
       organization(login: "{org_name}") {{
-        membersWithRole(first: 30, after: $pagination_cursor) {{
+        membersWithRole(first: {ORG_MEMBERS_PAGE_SIZE}, after: $pagination_cursor) {{
           pageInfo {{
             hasNextPage
             endCursor
@@ -50,17 +57,27 @@ def _get_org_teams_query(org_name: str):
     """
 
 
-def get_org_members(org_name: str, save: bool | str = False):
+def get_org_members(
+    org_name: str,
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+):
     """Get all members from an organisation on GitHub.
 
     Args:
         org_name (str): The name of the organisation.
         save (bool | str, optional): If True, save the data to "data/org_members.csv" or
         specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+        categorical (bool, optional): If True, return logins as categoricals backed by
+        the shared dictionaries of `github_analyser.dictionaries`. Defaults to False.
 
     Returns:
         pandas Dataframe: One row per login, columns login and role.
     """
+    check_output(output)
     pages = query_with_pagination(
         _get_org_members_query(org_name),
         page_info_path=["data", "organization", "membersWithRole"],
@@ -74,29 +91,34 @@ def get_org_members(org_name: str, save: bool | str = False):
         for page in pages
     ]
     flattened_edges = sum(edges, [])
-    df = pd.json_normalize(flattened_edges)
-    df.rename(columns={"node.login": "login"}, inplace=True)
-    df.rename(columns=camel_to_snake, inplace=True)
+    columns = empty_columns(ORG_MEMBER_SCHEMA)
+    for edge in flattened_edges:
+        columns["login"].append(LOGINS.intern(edge["node"]["login"]))
+        columns["role"].append(edge["role"])
+    result = to_output(columns, ORG_MEMBER_SCHEMA, output, categorical)
 
     if save:
         if save is True:
             save = "data/org_members.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    return result
 
 
-def get_org_teams(org_name: str, save: bool | str = False):
+def get_org_teams(org_name: str, save: bool | str = False, output: str = "pandas"):
     """Get all teams from an organisation on GitHub.
 
     Args:
         org_name (str): The name of the organisation.
         save (bool | str, optional): If True, save the data to "data/org_teams.csv" or
         specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
 
     Returns:
         pandas Dataframe: One row per team, with columns name, slug, and id.
     """
+    check_output(output)
     pages = query_with_pagination(
         _get_org_teams_query(org_name),
         page_info_path=["data", "organization", "teams"],
@@ -110,16 +132,16 @@ def get_org_teams(org_name: str, save: bool | str = False):
         for page in pages
     ]
     flattened_edges = sum(edges, [])
-    df = pd.json_normalize(flattened_edges)
-    df.rename(
-        columns={"node.name": "name", "node.slug": "slug", "node.id": "id"},
-        inplace=True,
-    )
-    df.rename(columns=camel_to_snake, inplace=True)
+    columns = empty_columns(ORG_TEAM_SCHEMA)
+    for edge in flattened_edges:
+        columns["name"].append(edge["node"]["name"])
+        columns["slug"].append(edge["node"]["slug"])
+        columns["id"].append(edge["node"]["id"])
+    result = to_output(columns, ORG_TEAM_SCHEMA, output)
 
     if save:
         if save is True:
             save = "data/org_teams.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    return result
@@ -0,0 +1,332 @@
+"""Building the return values of the getters from extracted columns.
+
+The getters extract the fields they need from the GitHub responses into plain Python
+lists, one per column, and then call `to_output` to turn those columns into the format
+the caller asked for. Each getter describes its columns with a schema, a dictionary
+from column name to one of the kinds in `ARROW_TYPES`, so that the Arrow and Polars
+outputs are typed even when a column is empty or all null.
+
+Columns of the kinds "login" and "label" hold strings from the session-wide
+dictionaries in `github_analyser.dictionaries`. They are plain strings by default, and
+categoricals backed by the shared dictionary with `categorical=True`.
+
+pandas, pyarrow and polars are all imported only when a result in that format is
+built.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from github_analyser.dictionaries import LABELS, LOGINS, StringDictionary
+
+OUTPUT_FORMATS = ("pandas", "records", "arrow", "polars")
+
+# Names of the pyarrow type factories for each column kind used in the schemas.
+ARROW_TYPES = {
+    "string": "string",
+    "int": "int64",
+    "float": "float64",
+    "bool": "bool_",
+    "login": "string",
+    "label": "string",
+}
+
+# The shared dictionaries of the dictionary encoded column kinds.
+DICTIONARY_KINDS: dict[str, StringDictionary] = {"login": LOGINS, "label": LABELS}
+
+
+def check_output(output: str) -> None:
+    """Raise a ValueError if `output` is not one of `OUTPUT_FORMATS`."""
+    if output not in OUTPUT_FORMATS:
+        msg = f"Unknown output format {output!r}, must be one of {OUTPUT_FORMATS}."
+        raise ValueError(msg)
+
+
+def empty_columns(schema: dict[str, str]) -> dict[str, list[Any]]:
+    """Return a dictionary with an empty list for every column in `schema`."""
+    return {name: [] for name in schema}
+
+
+def extend_columns(columns: dict[str, list[Any]], more: dict[str, list[Any]]) -> None:
+    """Append the values of `more` to those of `columns`, column by column."""
+    for name, values in more.items():
+        columns[name].extend(values)
+
+
+def arrow_type(kind: str) -> Any:
+    """Return the pyarrow type for a column kind.
+
+    Args:
+        kind: One of the keys of `ARROW_TYPES`, `"list<kind>"` for a list of values,
+            or `"map<string,kind>"` for a mapping from strings to values.
+
+    Returns:
+        pyarrow.DataType: The corresponding Arrow type.
+    """
+    import pyarrow as pa
+
+    if kind.startswith("list<") and kind.endswith(">"):
+        return pa.list_(arrow_type(kind[len("list<") : -1]))
+    if kind.startswith("map<string,") and kind.endswith(">"):
+        return pa.map_(pa.string(), arrow_type(kind[len("map<string,") : -1]))
+    try:
+        return getattr(pa, ARROW_TYPES[kind])()
+    except KeyError as e:
+        msg = f"Unknown column kind {kind!r}."
+        raise ValueError(msg) from e
+
+
+def _dictionary_kind(kind: str) -> tuple[StringDictionary | None, bool]:
+    """Return the shared dictionary of a column kind, if any, and whether the kind is
+    a list of values."""
+    is_list = kind.startswith("list<")
+    if is_list:
+        kind = kind[len("list<") : -1]
+    return DICTIONARY_KINDS.get(kind), is_list
+
+
+def _arrow_dictionary_array(values: list[Any], dictionary: StringDictionary) -> Any:
+    import pyarrow as pa
+
+    indices = pa.array(
+        [None if value is None else dictionary.encode(value) for value in values],
+        type=pa.int32(),
+    )
+    return pa.DictionaryArray.from_arrays(indices, dictionary.arrow_dictionary())
+
+
+def _arrow_column(values: list[Any], kind: str, categorical: bool) -> Any:
+    import pyarrow as pa
+
+    dictionary, is_list = _dictionary_kind(kind)
+    if not categorical or dictionary is None:
+        return pa.array(values, type=arrow_type(kind))
+    if not is_list:
+        return _arrow_dictionary_array(values, dictionary)
+    offsets = [0]
+    flat: list[Any] = []
+    for value in values:
+        flat.extend(value)
+        offsets.append(len(flat))
+    return pa.ListArray.from_arrays(
+        pa.array(offsets, type=pa.int32()), _arrow_dictionary_array(flat, dictionary)
+    )
+
+
+def to_arrow(
+    columns: dict[str, list[Any]], schema: dict[str, str], categorical: bool = False
+) -> Any:
+    """Build a pyarrow Table directly from extracted columns.
+
+    With `categorical=True`, login and label columns are dictionary encoded with the
+    shared dictionaries.
+    """
+    import pyarrow as pa
+
+    return pa.table(
+        {
+            name: _arrow_column(columns[name], kind, categorical)
+            for name, kind in schema.items()
+        }
+    )
+
+
+def _pandas_column(values: list[Any], kind: str, categorical: bool) -> Any:
+    import pandas as pd
+
+    dictionary, is_list = _dictionary_kind(kind)
+    if not categorical or dictionary is None or is_list:
+        # pandas has no categorical lists, so list columns are left as lists of the
+        # interned strings.
+        return values
+    codes = dictionary.encode_many(values)
+    return pd.Categorical.from_codes(codes, dtype=dictionary.categorical_dtype())
+
+
+def to_output(
+    columns: dict[str, list[Any]],
+    schema: dict[str, str],
+    output: str = "pandas",
+    categorical: bool = False,
+) -> Any:
+    """Convert extracted columns to the requested output format.
+
+    Args:
+        columns: One list of values per column, all of the same length.
+        schema: The column kinds, see `arrow_type`. Also determines the column order.
+        output: One of "pandas" (a pandas DataFrame), "records" (a list of
+            dictionaries, one per row), "arrow" (a pyarrow Table) or "polars" (a polars
+            DataFrame). Defaults to "pandas".
+        categorical: Whether to return login and label columns as categoricals whose
+            categories are the shared dictionaries of `github_analyser.dictionaries`.
+            Has no effect on records. Defaults to False.
+
+    Returns:
+        The data in the requested format.
+    """
+    check_output(output)
+    if output == "records":
+        names = list(schema)
+        return [
+            dict(zip(names, row)) for row in zip(*(columns[name] for name in names))
+        ]
+    if output == "pandas":
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                name: _pandas_column(columns[name], kind, categorical)
+                for name, kind in schema.items()
+            },
+            columns=list(schema),
+        )
+    table = to_arrow(columns, schema, categorical)
+    if output == "arrow":
+        return table
+    return _to_polars(table)
+
+
+def _to_polars(table: Any) -> Any:
+    try:
+        import polars as pl
+    except ImportError as e:
+        msg = (
+            'output="polars" requires polars, install it with '
+            "`pip install github-analyser[polars]`."
+        )
+        raise ImportError(msg) from e
+    return pl.from_arrow(table)
+
+
+def table_to_output(
+    table: Any,
+    schema: dict[str, str],
+    output: str = "pandas",
+    categorical: bool = False,
+) -> Any:
+    """Convert a pyarrow Table built by `to_arrow` to the requested output format.
+
+    Columns are converted as a whole, except the list columns of pandas frames, which
+    are turned into lists as `to_output` returns them, and the login and label columns
+    with `categorical=True`, which are encoded with the shared dictionaries.
+
+    Args:
+        table: A pyarrow Table with the columns of `schema`, without dictionary
+            encoding.
+        schema: The column kinds, see `arrow_type`.
+        output: The output format, see `to_output`. Defaults to "pandas".
+        categorical: See `to_output`. Defaults to False.
+
+    Returns:
+        The data in the requested format.
+    """
+    check_output(output)
+    if output == "records":
+        return table.to_pylist()
+    if output == "pandas":
+        import pandas as pd
+
+        data = {}
+        for name, kind in schema.items():
+            column = table.column(name)
+            dictionary, _ = _dictionary_kind(kind)
+            if "<" in kind or (categorical and dictionary is not None):
+                data[name] = _pandas_column(column.to_pylist(), kind, categorical)
+            else:
+                data[name] = column.to_pandas()
+        return pd.DataFrame(data, columns=list(schema))
+    if categorical:
+        for i, (name, kind) in enumerate(schema.items()):
+            if _dictionary_kind(kind)[0] is not None:
+                column = _arrow_column(table.column(name).to_pylist(), kind, True)
+                table = table.set_column(i, name, column)
+    if output == "arrow":
+        return table
+    return _to_polars(table)
+
+
+def output_format_of(data: Any) -> str:
+    """Get the output format of the return value of a getter.
+
+    Args:
+        data: A pandas DataFrame, a list of records, a pyarrow Table or a polars
+            DataFrame.
+
+    Returns:
+        str: One of "pandas", "records", "arrow" or "polars".
+    """
+    if isinstance(data, list):
+        return "records"
+    if hasattr(data, "num_rows"):
+        return "arrow"
+    if hasattr(data, "to_pandas") and hasattr(data, "height"):
+        return "polars"
+    return "pandas"
+
+
+def columns_from(data: Any, names: list[str]) -> dict[str, list[Any]]:
+    """Get columns as lists of Python values from the return value of a getter.
+
+    The inverse of `to_output`, for any of the output formats.
+
+    Args:
+        data: A pandas DataFrame, a list of records, a pyarrow Table or a polars
+            DataFrame.
+        names: The names of the columns to get.
+
+    Returns:
+        dict: One list of values per column.
+    """
+    output = output_format_of(data)
+    if output == "records":
+        return {name: [record[name] for record in data] for name in names}
+    if output == "arrow":
+        return {name: data.column(name).to_pylist() for name in names}
+    if output == "polars":
+        return {name: data[name].to_list() for name in names}
+    # A pandas DataFrame. Missing values are normalised to None.
+    return {
+        name: [None if _is_missing(x) else x for x in data[name].tolist()]
+        for name in names
+    }
+
+
+def _is_missing(value: Any) -> bool:
+    """Whether a scalar value from a pandas column is a missing value."""
+    import pandas as pd
+
+    return pd.api.types.is_scalar(value) and bool(pd.isna(value))
+
+
+def save_output(data: Any, path: str | Path) -> None:
+    """Save the return value of a getter as a CSV file, or a Parquet file if `path`
+    ends in ".parquet".
+
+    Args:
+        data: A pandas DataFrame, a list of records, a pyarrow Table or a polars
+            DataFrame.
+        path: The path of the file.
+    """
+    import pandas as pd
+
+    if Path(path).suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        output = output_format_of(data)
+        if output == "records":
+            data = pa.Table.from_pylist(data)
+        elif output == "pandas":
+            data = pa.Table.from_pandas(data, preserve_index=False)
+        elif output == "polars":
+            data = data.to_arrow()
+        pq.write_table(data, path)
+        return
+
+    if isinstance(data, list):
+        data = pd.DataFrame(data)
+    elif not isinstance(data, pd.DataFrame):
+        # Both pyarrow Tables and polars DataFrames have a to_pandas method.
+        data = data.to_pandas()
+    data.to_csv(path, index=False)
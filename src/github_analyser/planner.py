@@ -0,0 +1,305 @@
+"""Estimating what a crawl will cost before running it.
+
+GitHub charges GraphQL queries in points from an hourly budget. A query that asks
+for `rateLimit(dryRun: true) { cost }` is not run, but GitHub still works out what
+it would cost. `plan_crawl` sends the query of each resource once like this, for the
+largest repository crawled, and multiplies the cost of a page by the number of pages
+the counts in the repos table call for:
+
+    from github_analyser.planner import plan_crawl
+
+    plan = plan_crawl("my-org")
+    print(plan["resources"])
+    print(plan["points"], plan["remaining"], plan["concurrency"], plan["seconds"])
+
+The cost of a page does not depend on how many items it holds, so the estimates are
+upper bounds for repositories whose last page is not full. Wall times are rough, from
+`seconds_per_page`.
+"""
+from __future__ import annotations
+
+import datetime
+import math
+from collections.abc import Callable
+from typing import Any
+
+from github_analyser.commits import (
+    COMMIT_STATS_BATCH_SIZE,
+    COMMIT_STATS_QUERY,
+    COMMITS_PAGE_SIZE,
+    _get_commits_query,
+)
+from github_analyser.crawl import (
+    RESOURCES,
+    _previous_rows,
+    _rows_by_name,
+    changed_resources,
+)
+from github_analyser.issues import ISSUES_PAGE_SIZE, _get_issues_query
+from github_analyser.org_user_info import ORG_MEMBERS_PAGE_SIZE, _get_org_members_query
+from github_analyser.output import check_output, columns_from, empty_columns, to_output
+from github_analyser.pull_requests import (
+    PULL_REQUESTS_PAGE_SIZE,
+    _get_pull_requests_query,
+)
+from github_analyser.repos import REPOS_PAGE_SIZE, _get_repos_query, get_repos
+from github_analyser.utils import parse_timestamp, request_github_graphql
+
+# The resources `plan_crawl` can plan, besides the repos table, which every crawl
+# fetches.
+PLAN_RESOURCES = (*RESOURCES, "members")
+# A rough time to fetch and process one page, in seconds.
+SECONDS_PER_PAGE = 1.0
+MAX_CONCURRENCY = 32
+# GitHub's secondary rate limit on GraphQL points spent per minute.
+MAX_POINTS_PER_MINUTE = 2000
+
+PLAN_SCHEMA = {
+    "resource": "string",
+    "repos": "int",
+    "items": "int",
+    "page_size": "int",
+    "pages": "int",
+    "cost_per_page": "int",
+    "points": "int",
+}
+
+# The count column of the repos table and the page size of each per-repo resource.
+_COUNT_COLUMNS = {
+    "commits": "commit_count",
+    "issues": "issue_count",
+    "pull_requests": "pull_request_count",
+}
+_PAGE_SIZES = {
+    "repos": REPOS_PAGE_SIZE,
+    "members": ORG_MEMBERS_PAGE_SIZE,
+    "commits": COMMITS_PAGE_SIZE,
+    "commit_stats": COMMIT_STATS_BATCH_SIZE,
+    "issues": ISSUES_PAGE_SIZE,
+    "pull_requests": PULL_REQUESTS_PAGE_SIZE,
+}
+_QUERIES: dict[str, Callable[..., str]] = {
+    "commits": _get_commits_query,
+    "issues": _get_issues_query,
+    "pull_requests": _get_pull_requests_query,
+}
+
+
+def _with_dry_run(query: str) -> str:
+    """Add a dry run `rateLimit` field to the top level of a query."""
+    start = query.index("{") + 1
+    field = "rateLimit(dryRun: true) { cost limit remaining resetAt }"
+    return f"{query[:start]}\n{field}\n{query[start:]}"
+
+
+def query_cost(query: str, variables: dict | None = None) -> dict[str, Any]:
+    """Find what a query would cost, without running it.
+
+    Args:
+        query: The GraphQL query.
+        variables: Its variables. Optional, default is None (all null).
+
+    Returns:
+        dict: GitHub's `rateLimit` for the query, with its cost in points under
+        "cost", and the budget under "limit", "remaining" and "resetAt".
+    """
+    payload: dict[str, Any] = {"query": _with_dry_run(query)}
+    if variables is not None:
+        payload["variables"] = variables
+    return request_github_graphql(payload)["data"]["rateLimit"]
+
+
+def _member_count(org_name: str) -> int:
+    query = f"""
+    query {{
+      organization(login: "{org_name}") {{
+        membersWithRole {{
+          totalCount
+        }}
+      }}
+    }}
+    """
+    response = request_github_graphql({"query": query})
+    return response["data"]["organization"]["membersWithRole"]["totalCount"]
+
+
+def _pages(items: int, page_size: int) -> int:
+    """The pages needed for `items`, at least one, which finds there are none."""
+    return max(1, math.ceil(items / page_size))
+
+
+def _concurrency(
+    pages: int,
+    points: int,
+    remaining: int,
+    seconds_left: float,
+    seconds_per_page: float,
+    max_concurrency: int,
+) -> int:
+    """The fewest parallel fetches that spend the budget of this window in time."""
+    pages_now = pages if points <= remaining else pages * remaining // max(points, 1)
+    needed = math.ceil(pages_now * seconds_per_page / max(seconds_left, 1.0))
+    # Spending points faster than this trips the secondary rate limit.
+    points_per_page = points / max(pages, 1)
+    allowed = math.floor(
+        MAX_POINTS_PER_MINUTE * seconds_per_page / 60 / max(points_per_page, 1)
+    )
+    return max(1, min(needed, allowed, max_concurrency))
+
+
+def plan_crawl(
+    org_name: str,
+    resources: tuple[str, ...] = RESOURCES,
+    repos: Any = None,
+    snapshot: Any = None,
+    stats: bool = True,
+    seconds_per_page: float = SECONDS_PER_PAGE,
+    max_concurrency: int = MAX_CONCURRENCY,
+    output: str = "pandas",
+) -> dict[str, Any]:
+    """Estimate the pages, points and time of a crawl of an organisation.
+
+    Args:
+        org_name: The name of the organisation.
+        resources: Which of "commits", "issues", "pull_requests" and "members" the
+            crawl fetches. The repos table is always counted. Defaults to all of
+            `github_analyser.crawl.RESOURCES`.
+        repos: The current repos table of the organisation, with the change columns
+            of `get_repos`, if it has already been fetched. Optional, default is None (fetch it, and count its pages in
+            the estimate).
+        snapshot: The repos table of an earlier crawl, or a dictionary of them by
+            resource, as for `crawl_org`, to only count the repos that changed
+            since. Optional, default is None.
+        stats: Whether commits are fetched with their line statistics, as by
+            default in `get_commits`. Defaults to True.
+        seconds_per_page: The time to fetch and process a page, in seconds.
+            Defaults to `SECONDS_PER_PAGE`.
+        max_concurrency: The most parallel fetches to suggest. Defaults to
+            `MAX_CONCURRENCY`.
+        output: The format of the "resources" table, one of "pandas", "records",
+            "arrow" or "polars". Defaults to "pandas".
+
+    Returns:
+        dict: The estimate, with keys:
+            - resources: A table with a row for each resource, and for the commit
+              statistics, with the repos crawled, the items, the page size, the
+              pages, the cost of a page and the points.
+            - pages: The total number of pages.
+            - points: The total cost in points.
+            - limit: The hourly budget in points.
+            - remaining: The points left in the current window.
+            - reset_at: When the window resets, as a datetime.
+            - fits: Whether the crawl fits in the points left.
+            - windows: The number of budget windows the crawl spans.
+            - concurrency: The suggested number of parallel fetches, the fewest that
+              spend the points of the current window before it resets, within
+              GitHub's limit on points per minute.
+            - seconds: The estimated wall time of the crawl at that concurrency,
+              including waiting for later windows.
+    """
+    check_output(output)
+    unknown = set(resources) - set(PLAN_RESOURCES)
+    if unknown:
+        msg = f"Unknown resources {sorted(unknown)}, must be some of {PLAN_RESOURCES}."
+        raise ValueError(msg)
+
+    fetch_repos = repos is None
+    if fetch_repos:
+        repos = get_repos(org_name, output="records", change_columns=True)
+    current = _rows_by_name(repos)
+    previous = _previous_rows(snapshot, RESOURCES)
+    counts = columns_from(repos, ["name", *_COUNT_COLUMNS.values()])
+
+    rows = empty_columns(PLAN_SCHEMA)
+    budget: dict[str, Any] = {}
+
+    def add(
+        resource: str,
+        repo_count: int,
+        items: int,
+        pages: int,
+        query: str | None,
+        variables: dict | None = None,
+    ) -> None:
+        nonlocal budget
+        cost = 0
+        if query is not None:
+            budget = query_cost(query, variables)
+            cost = budget["cost"]
+        rows["resource"].append(resource)
+        rows["repos"].append(repo_count)
+        rows["items"].append(items)
+        rows["page_size"].append(_PAGE_SIZES[resource])
+        rows["pages"].append(pages)
+        rows["cost_per_page"].append(cost)
+        rows["points"].append(pages * cost)
+
+    repo_pages = _pages(len(current), REPOS_PAGE_SIZE) if fetch_repos else 0
+    repos_query = _get_repos_query(org_name, change_columns=True)
+    add("repos", len(current), len(current), repo_pages, repos_query)
+    if "members" in resources:
+        members = _member_count(org_name)
+        pages = _pages(members, ORG_MEMBERS_PAGE_SIZE)
+        add("members", 0, members, pages, _get_org_members_query(org_name))
+    for resource in RESOURCES:
+        if resource not in resources:
+            continue
+        crawled = [
+            (name, counts[_COUNT_COLUMNS[resource]][i] or 0)
+            for i, name in enumerate(counts["name"])
+            if changed_resources(
+                current[name], previous[resource].get(name), (resource,)
+            )
+        ]
+        items = sum(count for _, count in crawled)
+        pages = sum(_pages(count, _PAGE_SIZES[resource]) for _, count in crawled)
+        # The cost of a page is the same for every repo, so one that has data will do.
+        sample = max(crawled, key=lambda c: c[1])[0] if crawled else None
+        add(
+            resource,
+            len(crawled),
+            items,
+            pages,
+            _QUERIES[resource](org_name, sample) if sample is not None else None,
+        )
+        if resource == "commits" and stats:
+            pages = sum(
+                math.ceil(count / COMMIT_STATS_BATCH_SIZE) for _, count in crawled
+            )
+            add(
+                "commit_stats",
+                len(crawled),
+                items,
+                pages,
+                COMMIT_STATS_QUERY if pages else None,
+                {"ids": []},
+            )
+
+    pages = sum(rows["pages"])
+    points = sum(rows["points"])
+    limit = budget["limit"]
+    remaining = budget["remaining"]
+    reset_at = parse_timestamp(budget["resetAt"])
+    seconds_left = (
+        reset_at - datetime.datetime.now(datetime.timezone.utc)
+    ).total_seconds()
+    concurrency = _concurrency(
+        pages, points, remaining, seconds_left, seconds_per_page, max_concurrency
+    )
+    windows = 1 + max(0, math.ceil((points - remaining) / max(limit, 1)))
+    seconds = pages * seconds_per_page / concurrency
+    if windows > 1:
+        # The last windows start after the current one resets.
+        seconds = max(seconds, max(seconds_left, 0) + (windows - 2) * 3600)
+    return {
+        "resources": to_output(rows, PLAN_SCHEMA, output),
+        "pages": pages,
+        "points": points,
+        "limit": limit,
+        "remaining": remaining,
+        "reset_at": reset_at,
+        "fits": points <= remaining,
+        "windows": windows,
+        "concurrency": concurrency,
+        "seconds": seconds,
+    }
@@ -1,25 +1,73 @@
 from __future__ import annotations
 
-import pandas as pd
+import datetime
+import logging
 
-from github_analyser.utils import camel_to_snake, query_with_pagination
+from github_analyser.dictionaries import LOGINS
+from github_analyser.extraction import extract_pages
+from github_analyser.output import (
+    check_output,
+    empty_columns,
+    extend_columns,
+    save_output,
+    table_to_output,
+    to_output,
+)
+from github_analyser.utils import (
+    filter_pages,
+    github_timestamp,
+    iter_pages,
+    query_with_pagination,
+    updated_before,
+)
 
+PULL_REQUEST_SCHEMA = {
+    "id": "string",
+    "author": "login",
+    "changed_files": "int",
+    "comments": "list<login>",
+    "comment_dates": "list<string>",
+    "closed": "bool",
+    "closed_at": "string",
+    "created_at": "string",
+    "merged": "bool",
+    "merged_at": "string",
+    "state": "string",
+    "updated_at": "string",
+    "total_comments_count": "int",
+    "reviews": "list<login>",
+    "review_dates": "list<string>",
+    "first_comment_at": "string",
+    "first_review_at": "string",
+}
+PULL_REQUEST_COMMIT_SCHEMA = {"pr_id": "string", "hash": "string"}
 
-def _get_pull_requests_query(org_name: str, repo_name: str):
+MAX_PR_COMMITS = 100
+# Every pull request asks for up to 100 comments and 10 reviews, so a page of n pull
+# requests counts as 1 + 2n requests, and GitHub charges a point per 100 of them. A
+# page of 25 costs one point, as a page of 10 did, with 2.5 times fewer pages. Pages
+# are not made larger, as changedFiles is slow to compute and big pages time out.
+PULL_REQUESTS_PAGE_SIZE = 25
+
+
+def _get_pull_requests_query(org_name: str, repo_name: str, newest_first: bool = False):
     """
     Retrieves pull requests data for a given repository.
 
     Args:
         org_name (str): The name of the organisation.
         repo_name (str): The name of the repository.
+        newest_first (bool, optional): Order the pull requests by when they were last
+        updated, newest first. Defaults to False (in order of creation).
 
     Returns:
         str: The query string.
     """
+    order_by = ", orderBy: {field: UPDATED_AT, direction: DESC}" if newest_first else ""
     return f"""
         query ($pagination_cursor: String) {{
             repository(owner: "{org_name}", name: "{repo_name}") {{
-                pullRequests(first: 10, after: $pagination_cursor) {{
+                pullRequests(first: {PULL_REQUESTS_PAGE_SIZE}, after: $pagination_cursor{order_by}) {{
                     pageInfo {{
                         endCursor
                         hasNextPage
@@ -38,6 +86,7 @@ def _get_pull_requests_query(org_name: str, repo_name: str):
                                         author {{
                                             login
                                         }}
+                                        createdAt
                                     }}
                                 }}
                             }}
@@ -56,6 +105,7 @@ def _get_pull_requests_query(org_name: str, repo_name: str):
                                             login
                                         }}
                                         state
+                                        submittedAt
                                     }}
                                 }}
                             }}
@@ -75,19 +125,82 @@ def _get_authors(edge):
         edge (list): A list of edges.
 
     Returns:
-        str: A string containing a comma separated list of the names of the authors.
-        Deleted authors are represented by pd.NA.
+        list: The logins of the authors. Deleted authors are represented by None.
     """
-    authors = [
-        i["node"]["author"]["login"] if i["node"]["author"] is not None else pd.NA
+    return [
+        LOGINS.intern(i["node"]["author"]["login"])
+        if i["node"]["author"] is not None
+        else None
         for i in edge
     ]
-    if len(authors) > 0:
-        return ", ".join(str(a) for a in authors)
-    return ""
 
 
-def get_pull_requests(org_name: str, repo_name: str, save: bool | str = False):
+def _first_timestamp(edges, key):
+    """Get the earliest of the timestamps `key` of the nodes in `edges`, if any.
+
+    Args:
+        edges (list): A list of edges.
+        key (str): The timestamp field of the nodes, e.g. "createdAt".
+
+    Returns:
+        str: The earliest timestamp, or None if there are none.
+    """
+    timestamps = (i["node"][key] for i in edges if i["node"][key] is not None)
+    return min(timestamps, default=None)
+
+
+def _pull_request_columns(nodes: list[dict]) -> dict[str, list]:
+    """Extract the columns of the pull requests frame from pull request nodes."""
+    columns = empty_columns(PULL_REQUEST_SCHEMA)
+    for node in nodes:
+        columns["id"].append(node["id"])
+        author = node["author"]
+        columns["author"].append(
+            LOGINS.intern(author["login"]) if author is not None else None
+        )
+        columns["changed_files"].append(node["changedFiles"])
+        columns["comments"].append(_get_authors(node["comments"]["edges"]))
+        columns["comment_dates"].append(
+            [edge["node"]["createdAt"] for edge in node["comments"]["edges"]]
+        )
+        columns["closed"].append(node["closed"])
+        columns["closed_at"].append(node["closedAt"])
+        columns["created_at"].append(node["createdAt"])
+        columns["merged"].append(node["merged"])
+        columns["merged_at"].append(node["mergedAt"])
+        columns["state"].append(node["state"])
+        columns["updated_at"].append(node["updatedAt"])
+        columns["total_comments_count"].append(node["totalCommentsCount"])
+        columns["reviews"].append(_get_authors(node["reviews"]["edges"]))
+        columns["review_dates"].append(
+            [edge["node"]["submittedAt"] for edge in node["reviews"]["edges"]]
+        )
+        columns["first_comment_at"].append(
+            _first_timestamp(node["comments"]["edges"], "createdAt")
+        )
+        columns["first_review_at"].append(
+            _first_timestamp(node["reviews"]["edges"], "submittedAt")
+        )
+    return columns
+
+
+def _pull_request_page_columns(page: dict) -> dict[str, list]:
+    """Extract the columns of the pull requests frame from a page of the pull requests
+    query."""
+    edges = page["data"]["repository"]["pullRequests"]["edges"]
+    return _pull_request_columns([edge["node"] for edge in edges])
+
+
+def get_pull_requests(
+    org_name: str,
+    repo_name: str,
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+    processes: int | None = None,
+    since: datetime.datetime | str | None = None,
+    until: datetime.datetime | str | None = None,
+):
     """
     Retrieves pull requests data for a given repository and returns it as a pandas DataFrame.
 
@@ -96,50 +209,149 @@ def get_pull_requests(org_name: str, repo_name: str, save: bool | str = False):
         repo_name (str): The name of the repository.
         save (bool | str, optional): If True, save the data to
         "data/{repo_name}/pull_requests.csv" or specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+        categorical (bool, optional): If True, return logins as categoricals backed by
+        the shared dictionaries of `github_analyser.dictionaries`. Defaults to False.
+        processes (int, optional): If given, extract the pages in a pool of this many
+        worker processes, see `github_analyser.extraction`. Defaults to None (extract
+        them in this process).
+        since (datetime | str, optional): Only get pull requests updated at or after
+        this datetime or ISO 8601 timestamp, naive ones being in UTC. The pull
+        requests are then fetched newest first, and no pages are fetched past the
+        first one updated before `since`. Defaults to None.
+        until (datetime | str, optional): Only get pull requests last updated at or
+        before this time. Defaults to None.
 
     Returns:
         pandas.DataFrame: The DataFrame containing pull requests data.
     """
-    query = _get_pull_requests_query(org_name, repo_name)
-    data = query_with_pagination(
+    check_output(output)
+    since = github_timestamp(since) if since is not None else None
+    until = github_timestamp(until) if until is not None else None
+    windowed = since is not None or until is not None
+    query = _get_pull_requests_query(org_name, repo_name, newest_first=windowed)
+    edges_path = ["data", "repository", "pullRequests", "edges"]
+    pages = iter_pages(
         query,
         page_info_path=["data", "repository", "pullRequests"],
+        last_page=updated_before(since, edges_path) if since is not None else None,
     )
-    data_nodes = [
-        edge["node"]
-        for datum in data
-        for edge in datum["data"]["repository"]["pullRequests"]["edges"]
-    ]
-    if not data_nodes:
-        return pd.DataFrame(
-            columns=[
-                "id",
-                "author",
-                "changed_files",
-                "comments",
-                "closed",
-                "closed_at",
-                "created_at",
-                "merged",
-                "merged_at",
-                "state",
-                "updated_at",
-                "total_comments_count",
-                "reviews",
-            ]
+    if windowed:
+        pages = filter_pages(pages, edges_path, since, until)
+    if processes:
+        table = extract_pages(
+            pages, _pull_request_page_columns, PULL_REQUEST_SCHEMA, processes
         )
-    df = pd.json_normalize(data_nodes, sep="_")
-    df["comments"] = df["comments_edges"].apply(_get_authors)
-    df["reviews"] = df["reviews_edges"].apply(_get_authors)
-    df.drop(columns=["comments_edges", "reviews_edges"], inplace=True)
-
-    # rename columns to snake case
-    df.rename(columns={"author_login": "author"}, inplace=True)
-    df.rename(columns=camel_to_snake, inplace=True)
+        result = table_to_output(table, PULL_REQUEST_SCHEMA, output, categorical)
+    else:
+        columns = empty_columns(PULL_REQUEST_SCHEMA)
+        # Each page is extracted while the next one is being fetched.
+        for page in pages:
+            extend_columns(columns, _pull_request_page_columns(page))
+        result = to_output(columns, PULL_REQUEST_SCHEMA, output, categorical)
 
     if save:
         if save is True:
             save = f"data/{repo_name}/pull_requests.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
+
+    return result
+
+
+def _get_pull_request_commits_query(org_name: str, repo_name: str):
+    """
+    Retrieves the commits of the pull requests of a given repository.
+
+    Args:
+        org_name (str): The name of the organisation.
+        repo_name (str): The name of the repository.
+
+    Returns:
+        str: The query string.
+    """
+    return f"""
+        query ($pagination_cursor: String) {{
+            repository(owner: "{org_name}", name: "{repo_name}") {{
+                pullRequests(first: 50, after: $pagination_cursor) {{
+                    pageInfo {{
+                        endCursor
+                        hasNextPage
+                    }}
+                    edges {{
+                        node {{
+                            id
+                            mergeCommit {{
+                                oid
+                            }}
+                            commits(first: {MAX_PR_COMMITS}) {{
+                                totalCount
+                                edges {{
+                                    node {{
+                                        commit {{
+                                            oid
+                                        }}
+                                    }}
+                                }}
+                            }}
+                        }}
+                    }}
+                }}
+            }}
+    }}
+    """
+
+
+def get_pull_request_commits(
+    org_name: str, repo_name: str, save: bool | str = False, output: str = "pandas"
+):
+    """
+    Retrieves the commits of every pull request of a given repository.
+
+    Together with the commits on the pull request's branch, the merge commit of a
+    merged pull request is included, which is the commit that ends up on the base
+    branch for squash merges.
+
+    Args:
+        org_name (str): The name of the organization.
+        repo_name (str): The name of the repository.
+        save (bool | str, optional): If True, save the data to
+        "data/{repo_name}/pull_request_commits.csv" or specify a path. Defaults to
+        False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+
+    Returns:
+        pandas.DataFrame: One row per pull request and commit, with columns pr_id and
+        hash.
+    """
+    check_output(output)
+    query = _get_pull_request_commits_query(org_name, repo_name)
+    data = query_with_pagination(
+        query,
+        page_info_path=["data", "repository", "pullRequests"],
+    )
+    columns = empty_columns(PULL_REQUEST_COMMIT_SCHEMA)
+    for datum in data:
+        for edge in datum["data"]["repository"]["pullRequests"]["edges"]:
+            node = edge["node"]
+            if node["commits"]["totalCount"] > MAX_PR_COMMITS:
+                logging.warning(
+                    "Pull request %s has more than %d commits, some are left out",
+                    node["id"],
+                    MAX_PR_COMMITS,
+                )
+            hashes = [i["node"]["commit"]["oid"] for i in node["commits"]["edges"]]
+            if node["mergeCommit"] is not None:
+                hashes.append(node["mergeCommit"]["oid"])
+            for commit_hash in dict.fromkeys(hashes):
+                columns["pr_id"].append(node["id"])
+                columns["hash"].append(commit_hash)
+    result = to_output(columns, PULL_REQUEST_COMMIT_SCHEMA, output)
+
+    if save:
+        if save is True:
+            save = f"data/{repo_name}/pull_request_commits.csv"
+        save_output(result, save)
 
-    return df
+    return result
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-import pandas as pd
+from typing import TYPE_CHECKING
 
+from github_analyser.dictionaries import LOGINS
+from github_analyser.output import check_output, save_output, to_output
 from github_analyser.utils import request_github_rest
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+CONTRIBUTOR_SCHEMA = {"login": "login", "commits": "int"}
+
 
 def get_repo_contributors(
     org_name: str,
     repo_name: str,
     save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
 ) -> pd.DataFrame:
     """Fetch info about contributors of a repository.
 
@@ -17,24 +26,32 @@ def get_repo_contributors(
         repo_name: The name of the repository.
         save (bool | str, optional): If True, save the data to "data/commits.csv" or
         specify a path. Defaults to False.
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        categorical: If True, return logins as categoricals backed by the shared
+            dictionaries of `github_analyser.dictionaries`. Defaults to False.
 
     Returns:
         A pandas DataFrame with the following columns:
             - login: The GitHub username of the contributor.
             - commits: The total number of commits by the contributor.
     """
+    check_output(output)
     data = request_github_rest(
         "get", f"repos/{org_name}/{repo_name}/contributors?per_page=100"
     )
-    data = [{"login": x["login"], "commits": x["contributions"]} for x in data]
-    df = pd.DataFrame(data)
+    columns = {
+        "login": [LOGINS.intern(x["login"]) for x in data],
+        "commits": [x["contributions"] for x in data],
+    }
+    result = to_output(columns, CONTRIBUTOR_SCHEMA, output, categorical)
 
     if save:
         if save is True:
             save = f"data/{repo_name}/repo_contributors.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,303 @@
+"""Repository statistics from GitHub's REST statistics end points.
+
+GitHub computes these statistics on demand and answers 202 until they are ready, which
+can take several seconds per repository. The getters here request the statistics of
+all the given repositories first, so that GitHub computes them at the same time, and
+then poll the ones that are not ready yet together, see `poll_github_rest`. A
+repository that fails, e.g. because it was deleted or renamed, does not stop the
+others.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+from typing import TYPE_CHECKING, Any
+
+from github_analyser.bulk import BULK_ERROR_SCHEMA
+from github_analyser.dictionaries import LOGINS
+from github_analyser.output import check_output, empty_columns, save_output, to_output
+from github_analyser.utils import poll_github_rest
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CONTRIBUTOR_STATS_SCHEMA = {
+    "repo_name": "string",
+    "login": "login",
+    "week": "string",
+    "commits": "int",
+    "additions": "int",
+    "deletions": "int",
+}
+COMMIT_ACTIVITY_SCHEMA = {
+    "repo_name": "string",
+    "week": "string",
+    "commits": "int",
+    "days": "list<int>",
+}
+PARTICIPATION_SCHEMA = {
+    "repo_name": "string",
+    "weeks_ago": "int",
+    "all": "int",
+    "owner": "int",
+}
+
+
+def _week(timestamp: int) -> str:
+    """The date of the start of a week, given as a Unix timestamp."""
+    date = datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc).date()
+    return date.isoformat()
+
+
+def _check_errors(errors: str) -> None:
+    if errors not in ("raise", "ignore", "return"):
+        msg = f"Unknown errors {errors!r}, must be 'raise', 'ignore' or 'return'."
+        raise ValueError(msg)
+
+
+def _fetch_stats(
+    org_name: str,
+    repo_names: list[str],
+    statistic: str,
+    max_tries: int,
+    max_workers: int,
+    errors: str,
+) -> tuple[dict[str, Any], dict[str, Exception]]:
+    """Fetch one statistic of several repositories, keyed by repository name.
+
+    Repositories whose statistics were still being computed after `max_tries` rounds
+    of polling are left out, as are those that failed, which are returned too, or
+    raised with errors="raise".
+    """
+    end_points = {
+        repo_name: f"repos/{org_name}/{repo_name}/stats/{statistic}"
+        for repo_name in repo_names
+    }
+    responses = poll_github_rest(
+        list(end_points.values()), max_tries=max_tries, max_workers=max_workers
+    )
+    stats = {}
+    failures = {}
+    for repo_name, end_point in end_points.items():
+        response = responses[end_point]
+        if isinstance(response, Exception):
+            logging.warning("Failed on %r: %s", repo_name, response)
+            failures[repo_name] = response
+        elif response is not None:
+            stats[repo_name] = response
+    if failures and errors == "raise":
+        repo_name, error = next(iter(failures.items()))
+        msg = (
+            f"{len(failures)} of {len(end_points)} repositories failed, "
+            f"e.g. {repo_name!r}: {error}"
+        )
+        raise Exception(msg)
+    return stats, failures
+
+
+def _with_errors(
+    result: Any, failures: dict[str, Exception], errors: str, output: str
+) -> Any:
+    """The result, and with errors="return" a table of the repositories that failed,
+    as from `BulkResult.errors`."""
+    if errors != "return":
+        return result
+    columns = empty_columns(BULK_ERROR_SCHEMA)
+    for repo_name, error in failures.items():
+        columns["item"].append(repo_name)
+        columns["error"].append(type(error).__name__)
+        columns["message"].append(str(error))
+    return result, to_output(columns, BULK_ERROR_SCHEMA, output)
+
+
+def get_contributor_stats(
+    org_name: str,
+    repo_names: list[str],
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+    max_tries: int = 10,
+    max_workers: int = 8,
+    errors: str = "ignore",
+) -> pd.DataFrame:
+    """Fetch weekly commits, additions and deletions per contributor of repositories.
+
+    GitHub only computes these for repositories with fewer than 10,000 commits.
+
+    Args:
+        org_name: The owner of the repositories.
+        repo_names: The names of the repositories.
+        save (bool | str, optional): If True, save the data to
+        "data/contributor_stats.csv" or specify a path. Defaults to False.
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        categorical: If True, return logins as categoricals backed by the shared
+            dictionaries of `github_analyser.dictionaries`. Defaults to False.
+        max_tries: The maximum number of rounds of polling for statistics that are
+            being computed. Defaults to 10.
+        max_workers: The number of requests to send in parallel. Defaults to 8.
+        errors: What to do if any repositories fail. "raise" raises an exception
+            once all are done. "ignore" leaves them out, logging a warning for each.
+            "return" leaves them out and returns them too. Defaults to "ignore".
+
+    Returns:
+        A pandas DataFrame with one row per repository, contributor and week in which
+        they were active, with the following columns:
+            - repo_name: The name of the repository.
+            - login: The GitHub username of the contributor.
+            - week: The date of the start of the week.
+            - commits: The number of commits in the week.
+            - additions: The number of line additions in the week.
+            - deletions: The number of line deletions in the week.
+        With errors="return", a tuple of it and a table of the repositories that
+        failed, see `BulkResult.errors`.
+    """
+    check_output(output)
+    _check_errors(errors)
+    stats, failures = _fetch_stats(
+        org_name, repo_names, "contributors", max_tries, max_workers, errors
+    )
+    columns = empty_columns(CONTRIBUTOR_STATS_SCHEMA)
+    for repo_name, contributors in stats.items():
+        for contributor in contributors:
+            author = contributor["author"]
+            login = LOGINS.intern(author["login"]) if author else None
+            for week in contributor["weeks"]:
+                if not (week["c"] or week["a"] or week["d"]):
+                    continue
+                columns["repo_name"].append(repo_name)
+                columns["login"].append(login)
+                columns["week"].append(_week(week["w"]))
+                columns["commits"].append(week["c"])
+                columns["additions"].append(week["a"])
+                columns["deletions"].append(week["d"])
+    result = to_output(columns, CONTRIBUTOR_STATS_SCHEMA, output, categorical)
+
+    if save:
+        if save is True:
+            save = "data/contributor_stats.csv"
+        save_output(result, save)
+
+    return _with_errors(result, failures, errors, output)
+
+
+def get_commit_activity(
+    org_name: str,
+    repo_names: list[str],
+    save: bool | str = False,
+    output: str = "pandas",
+    max_tries: int = 10,
+    max_workers: int = 8,
+    errors: str = "ignore",
+) -> pd.DataFrame:
+    """Fetch the weekly number of commits to repositories over the last year.
+
+    Args:
+        org_name: The owner of the repositories.
+        repo_names: The names of the repositories.
+        save (bool | str, optional): If True, save the data to
+        "data/commit_activity.csv" or specify a path. Defaults to False.
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        max_tries: The maximum number of rounds of polling for statistics that are
+            being computed. Defaults to 10.
+        max_workers: The number of requests to send in parallel. Defaults to 8.
+        errors: What to do if any repositories fail. "raise" raises an exception
+            once all are done. "ignore" leaves them out, logging a warning for each.
+            "return" leaves them out and returns them too. Defaults to "ignore".
+
+    Returns:
+        A pandas DataFrame with one row per repository and week, with the following
+        columns:
+            - repo_name: The name of the repository.
+            - week: The date of the start of the week.
+            - commits: The number of commits in the week.
+            - days: The number of commits on each day of the week, starting on
+              Sunday.
+        With errors="return", a tuple of it and a table of the repositories that
+        failed, see `BulkResult.errors`.
+    """
+    check_output(output)
+    _check_errors(errors)
+    stats, failures = _fetch_stats(
+        org_name, repo_names, "commit_activity", max_tries, max_workers, errors
+    )
+    columns = empty_columns(COMMIT_ACTIVITY_SCHEMA)
+    for repo_name, weeks in stats.items():
+        for week in weeks:
+            columns["repo_name"].append(repo_name)
+            columns["week"].append(_week(week["week"]))
+            columns["commits"].append(week["total"])
+            columns["days"].append(week["days"])
+    result = to_output(columns, COMMIT_ACTIVITY_SCHEMA, output)
+
+    if save:
+        if save is True:
+            save = "data/commit_activity.csv"
+        save_output(result, save)
+
+    return _with_errors(result, failures, errors, output)
+
+
+def get_participation(
+    org_name: str,
+    repo_names: list[str],
+    save: bool | str = False,
+    output: str = "pandas",
+    max_tries: int = 10,
+    max_workers: int = 8,
+    errors: str = "ignore",
+) -> pd.DataFrame:
+    """Fetch the weekly number of commits to repositories by everyone and by their
+    owner, over the last 52 weeks.
+
+    Args:
+        org_name: The owner of the repositories.
+        repo_names: The names of the repositories.
+        save (bool | str, optional): If True, save the data to
+        "data/participation.csv" or specify a path. Defaults to False.
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        max_tries: The maximum number of rounds of polling for statistics that are
+            being computed. Defaults to 10.
+        max_workers: The number of requests to send in parallel. Defaults to 8.
+        errors: What to do if any repositories fail. "raise" raises an exception
+            once all are done. "ignore" leaves them out, logging a warning for each.
+            "return" leaves them out and returns them too. Defaults to "ignore".
+
+    Returns:
+        A pandas DataFrame with one row per repository and week, with the following
+        columns:
+            - repo_name: The name of the repository.
+            - weeks_ago: How many weeks ago the week was, 0 being the current week.
+            - all: The number of commits by everyone.
+            - owner: The number of commits by the owner of the repository.
+        With errors="return", a tuple of it and a table of the repositories that
+        failed, see `BulkResult.errors`.
+    """
+    check_output(output)
+    _check_errors(errors)
+    stats, failures = _fetch_stats(
+        org_name, repo_names, "participation", max_tries, max_workers, errors
+    )
+    columns = empty_columns(PARTICIPATION_SCHEMA)
+    for repo_name, participation in stats.items():
+        if not participation:
+            # An empty repository.
+            continue
+        num_weeks = len(participation["all"])
+        for i, (total, owner) in enumerate(
+            zip(participation["all"], participation["owner"])
+        ):
+            columns["repo_name"].append(repo_name)
+            columns["weeks_ago"].append(num_weeks - 1 - i)
+            columns["all"].append(total)
+            columns["owner"].append(owner)
+    result = to_output(columns, PARTICIPATION_SCHEMA, output)
+
+    if save:
+        if save is True:
+            save = "data/participation.csv"
+        save_output(result, save)
+
+    return _with_errors(result, failures, errors, output)
@@ -1,8 +1,12 @@
+from __future__ import annotations
+
 from functools import reduce
 
-import pandas as pd
+from github_analyser.dictionaries import LOGINS
+from github_analyser.output import check_output, save_output, to_output
+from github_analyser.utils import query_with_pagination
 
-from github_analyser.utils import camel_to_snake, query_with_pagination
+COLLABORATOR_SCHEMA = {"login": "login"}
 
 
 def _get_repo_collaborators(org_name: str, repo_name: str):
@@ -35,7 +39,13 @@ def _get_repo_collaborators(org_name: str, repo_name: str):
     """
 
 
-def get_repo_collaborators(org_name: str, repo_name: str, save: bool | str = False):
+def get_repo_collaborators(
+    org_name: str,
+    repo_name: str,
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+):
     """
     Retrieves collaborators for a given repository.
 
@@ -44,10 +54,15 @@ def get_repo_collaborators(org_name: str, repo_name: str, save: bool | str = Fal
         repo_name (str): The name of the repository.
         save (bool | str, optional): If True, save the data to
         "data/{repo_name}/collaborators.csv" or specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+        categorical (bool, optional): If True, return logins as categoricals backed by
+        the shared dictionaries of `github_analyser.dictionaries`. Defaults to False.
 
     Returns:
         pandas.DataFrame: The DataFrame containing the collaborators.
     """
+    check_output(output)
     query = _get_repo_collaborators(org_name, repo_name)
     data = query_with_pagination(
         query,
@@ -62,15 +77,14 @@ def get_repo_collaborators(org_name: str, repo_name: str, save: bool | str = Fal
         for page in data
     ]
     flattened_edges = sum(edges, [])
-    df = pd.json_normalize(flattened_edges)
-
-    # rename columns to snake case
-    df.rename(columns={"node.login": "login"}, inplace=True)
-    df.rename(columns=camel_to_snake, inplace=True)
+    columns = {
+        "login": [LOGINS.intern(edge["node"]["login"]) for edge in flattened_edges]
+    }
+    result = to_output(columns, COLLABORATOR_SCHEMA, output, categorical)
 
     if save:
         if save is True:
             save = f"data/{repo_name}/collaborators.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    return result
@@ -2,16 +2,71 @@ from __future__ import annotations
 
 from functools import reduce
 
-import pandas as pd
+from github_analyser.output import check_output, empty_columns, save_output, to_output
+from github_analyser.utils import query_with_pagination
 
-from github_analyser.utils import camel_to_snake, query_with_pagination
+REPOS_PAGE_SIZE = 100
 
+REPO_SCHEMA = {
+    "id": "string",
+    "name": "string",
+    "updated_at": "string",
+    "url": "string",
+    "is_private": "bool",
+    "is_archived": "bool",
+    "is_fork": "bool",
+    "languages": "map<string,float>",
+    "pushed_at": "string",
+    "commit_count": "int",
+    "issue_count": "int",
+    "issues_updated_at": "string",
+    "pull_request_count": "int",
+    "pull_requests_updated_at": "string",
+}
+# The columns that tell whether the commits, issues or pull requests of a repo
+# changed, besides pushed_at, see `github_analyser.crawl`.
+REPO_CHANGE_COLUMNS = (
+    "commit_count",
+    "issue_count",
+    "issues_updated_at",
+    "pull_request_count",
+    "pull_requests_updated_at",
+)
 
-def _get_repos_query(org_name: str):
+
+# The fields of the change columns, see `get_repos`. Counting the commits of the
+# default branch and looking up the latest issue and pull request make the query
+# several times as expensive.
+_CHANGE_FIELDS = """
+              defaultBranchRef {
+                target {
+                  ... on Commit {
+                    history {
+                      totalCount
+                    }
+                  }
+                }
+              }
+              issues(first: 1, orderBy: {field: UPDATED_AT, direction: DESC}) {
+                totalCount
+                nodes {
+                  updatedAt
+                }
+              }
+              pullRequests(first: 1, orderBy: {field: UPDATED_AT, direction: DESC}) {
+                totalCount
+                nodes {
+                  updatedAt
+                }
+              }"""
+
+
+def _get_repos_query(org_name: str, change_columns: bool = False):
+    change_fields = _CHANGE_FIELDS if change_columns else ""
     return f"""
     query ($pagination_cursor: String) {{
       organization(login: "{org_name}") {{
-        repositories(first: 100, after: $pagination_cursor, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+        repositories(first: {REPOS_PAGE_SIZE}, after: $pagination_cursor, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
           pageInfo {{
             endCursor
             hasNextPage
@@ -25,6 +80,7 @@ def _get_repos_query(org_name: str):
               isPrivate
               isArchived
               isFork
+              pushedAt{change_fields}
               languages(first: 10) {{
                 totalSize
                 edges {{
@@ -42,20 +98,81 @@ def _get_repos_query(org_name: str):
     """
 
 
-def get_repos(org_name: str, save: bool | str = False):
+def _repo_columns(nodes: list[dict], change_columns: bool = True) -> dict[str, list]:
+    """Extract the columns of the repos frame from repository nodes."""
+    columns = empty_columns(REPO_SCHEMA)
+    for node in nodes:
+        columns["id"].append(node["id"])
+        columns["name"].append(node["name"])
+        columns["updated_at"].append(node["updatedAt"])
+        columns["url"].append(node["url"])
+        columns["is_private"].append(node["isPrivate"])
+        columns["is_archived"].append(node["isArchived"])
+        columns["is_fork"].append(node["isFork"])
+        total_size = node["languages"]["totalSize"]
+        if node["isPrivate"]:
+            # TODO For whatever reason the languages field is not returned for private
+            # repos. This is a temporary fix.
+            columns["languages"].append(None)
+        else:
+            columns["languages"].append(
+                {
+                    x["node"]["name"]: x["size"] / total_size
+                    for x in node["languages"]["edges"]
+                }
+            )
+        columns["pushed_at"].append(node["pushedAt"])
+        if not change_columns:
+            for name in REPO_CHANGE_COLUMNS:
+                columns[name].append(None)
+            continue
+        default_branch_ref = node["defaultBranchRef"]
+        columns["commit_count"].append(
+            default_branch_ref["target"]["history"]["totalCount"]
+            if default_branch_ref
+            else None
+        )
+        for name, connection in [
+            ("issue", node["issues"]),
+            ("pull_request", node["pullRequests"]),
+        ]:
+            columns[f"{name}_count"].append(connection["totalCount"])
+            latest = connection["nodes"]
+            columns[f"{name}s_updated_at"].append(
+                latest[0]["updatedAt"] if latest else None
+            )
+    return columns
+
+
+def get_repos(
+    org_name: str,
+    save: bool | str = False,
+    output: str = "pandas",
+    change_columns: bool = False,
+):
     """Get all repositories from an organisation on GitHub.
 
     Args:
         org_name (str): The name of the organisation.
         save (bool | str, optional): If True, save the data to "data/repos.csv" or
         specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+        change_columns (bool, optional): Whether to fill in the columns of
+        `REPO_CHANGE_COLUMNS`, which make the query several times as expensive. Defaults
+        to False (leave them null).
 
     Returns:
         pandas Dataframe: One row per repo, with columns id, name, updated_at, url,
-        is_private, is_archived, is_fork, and languages.
+        is_private, is_archived, is_fork, languages, pushed_at, commit_count (on the
+        default branch), issue_count, issues_updated_at (of the most recently updated
+        issue), pull_request_count and pull_requests_updated_at. The last six tell
+        whether the commits, issues and pull requests of a repo have changed, see
+        `github_analyser.crawl`.
     """
+    check_output(output)
     pages = query_with_pagination(
-        _get_repos_query(org_name),
+        _get_repos_query(org_name, change_columns),
         page_info_path=["data", "organization", "repositories"],
     )
     edges = [
@@ -68,23 +185,11 @@ def get_repos(org_name: str, save: bool | str = False):
     ]
     flattened_edges = sum(edges, [])
     nodes = [x["node"] for x in flattened_edges]
-    for node in nodes:
-        total_size = node["languages"]["totalSize"]
-        if node["isPrivate"]:
-            # TODO For whatever reason the languages field is not returned for private
-            # repos. This is a temporary fix.
-            node["languages"] = pd.NA
-        else:
-            node["languages"] = {
-                x["node"]["name"]: x["size"] / total_size
-                for x in node["languages"]["edges"]
-            }
-    df = pd.DataFrame(nodes)
-    df.rename(columns=camel_to_snake, inplace=True)
+    result = to_output(_repo_columns(nodes, change_columns), REPO_SCHEMA, output)
 
     if save:
         if save is True:
             save = "data/repos.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
 
-    return df
+    return result
@@ -0,0 +1,364 @@
+"""Crawling the most valuable repositories first, within the rate limit budget.
+
+`CrawlScheduler` keeps a priority queue of (resource, repo) jobs. A job's priority
+grows with how recently the repository was updated, how stale the stored data of the
+resource is, and the weights given to the repository and the resource:
+
+    weight * (1 + staleness in days) / (1 + days since updated_at)
+
+`run` estimates the points of each job, as `github_analyser.planner` does, and runs
+the highest priority jobs that fit in the points left in the current rate limit
+window, skipping over jobs too large for what is left. The other jobs stay queued
+for the next window, as do jobs that fail, until they have failed `max_attempts`
+times, when they are dropped into `failures`:
+
+    from github_analyser.repos import get_repos
+    from github_analyser.scheduler import CrawlScheduler
+
+    scheduler = CrawlScheduler("my-org")
+    scheduler.add(
+        get_repos("my-org", change_columns=True), weights={"important-repo": 10}
+    )
+    results = scheduler.run()  # Spends the points left in this window.
+    results = scheduler.run_all()  # Waits for later windows until the queue is empty.
+"""
+from __future__ import annotations
+
+import datetime
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any
+
+from github_analyser import crawl
+from github_analyser.commits import COMMIT_STATS_BATCH_SIZE, COMMIT_STATS_QUERY
+from github_analyser.crawl import RESOURCES
+from github_analyser.output import check_output, columns_from
+from github_analyser.planner import _COUNT_COLUMNS, _PAGE_SIZES, _QUERIES, query_cost
+from github_analyser.utils import parse_timestamp, request_github_graphql
+
+# The staleness of data that was never crawled, in days.
+NEVER_CRAWLED_DAYS = 365.0
+# The times a job is run before it is dropped, e.g. for a repo that was deleted.
+MAX_ATTEMPTS = 3
+
+_RATE_LIMIT_QUERY = """
+query {
+    rateLimit {
+        limit
+        remaining
+        resetAt
+    }
+}
+"""
+
+
+def _to_datetime(value: datetime.datetime | str | None) -> datetime.datetime | None:
+    return None if value is None else parse_timestamp(value)
+
+
+def _days(since: datetime.datetime | None, now: datetime.datetime) -> float | None:
+    if since is None:
+        return None
+    return max(0.0, (now - since).total_seconds() / 86400)
+
+
+def job_priority(
+    updated_at: datetime.datetime | str | None,
+    crawled_at: datetime.datetime | str | None,
+    weight: float = 1.0,
+    now: datetime.datetime | None = None,
+) -> float:
+    """The priority of crawling a resource of a repository, see the module docstring.
+
+    Args:
+        updated_at: When the repository was last updated.
+        crawled_at: When the resource of the repository was last crawled, None if it
+            never was.
+        weight: The weight of the job. Defaults to 1.
+        now: The current time. Optional, default is now.
+
+    Returns:
+        float: The priority, higher is more urgent.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    age = _days(_to_datetime(updated_at), now)
+    staleness = _days(_to_datetime(crawled_at), now)
+    if staleness is None:
+        staleness = NEVER_CRAWLED_DAYS
+    if age is None:
+        age = NEVER_CRAWLED_DAYS
+    return weight * (1 + staleness) / (1 + age)
+
+
+def rate_limit() -> dict[str, Any]:
+    """The GraphQL rate limit budget, with "limit", "remaining" and "resetAt"."""
+    return request_github_graphql({"query": _RATE_LIMIT_QUERY})["data"]["rateLimit"]
+
+
+class CrawlScheduler:
+    """A priority queue of (resource, repo) crawl jobs, run within the budget.
+
+    Args:
+        org_name: The name of the organisation.
+        max_workers: The number of jobs to run in parallel. Defaults to 4.
+        max_attempts: The times a job is run before it is dropped into `failures`.
+            Defaults to `MAX_ATTEMPTS`.
+        stats: Whether commits are fetched with their line statistics, as by default
+            in `get_commits`, for the estimates. Defaults to True.
+        output: The format of the tables, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        categorical: If True, return logins and labels as categoricals. Defaults to
+            False.
+
+    Attributes:
+        failures: The exceptions of the jobs that failed `max_attempts` times, by
+            resource and repo name, as in the "errors" of `crawl_org`.
+    """
+
+    def __init__(
+        self,
+        org_name: str,
+        max_workers: int = 4,
+        max_attempts: int = MAX_ATTEMPTS,
+        stats: bool = True,
+        output: str = "pandas",
+        categorical: bool = False,
+    ) -> None:
+        check_output(output)
+        self.org_name = org_name
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.stats = stats
+        self.output = output
+        self.categorical = categorical
+        # Entries are (-priority, sequence number, resource, repo). The sequence
+        # number breaks ties in order of adding, and marks entries of jobs that were
+        # added again since as stale.
+        self._heap: list[tuple[float, int, str, str]] = []
+        self._counter = itertools.count()
+        self._jobs: dict[tuple[str, str], int] = {}
+        self._items: dict[tuple[str, str], int] = {}
+        # The times each queued job has failed.
+        self._attempts: dict[tuple[str, str], int] = {}
+        self.failures: dict[str, dict[str, Exception]] = {
+            resource: {} for resource in RESOURCES
+        }
+        # The number of jobs the last call of `run` ran.
+        self._ran = 0
+        # The cost of a page of each resource, and of a batch of commit statistics.
+        self._page_costs: dict[str, int] = {}
+        # The budget of the last window `run` looked up.
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset_at: datetime.datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _push(self, priority: float, resource: str, repo: str) -> None:
+        sequence = next(self._counter)
+        self._jobs[(resource, repo)] = sequence
+        heapq.heappush(self._heap, (-priority, sequence, resource, repo))
+
+    def _pop(self) -> tuple[float, str, str] | None:
+        while self._heap:
+            priority, sequence, resource, repo = heapq.heappop(self._heap)
+            if self._jobs.get((resource, repo)) == sequence:
+                del self._jobs[(resource, repo)]
+                return -priority, resource, repo
+        return None
+
+    def add(
+        self,
+        repos: Any,
+        resources: tuple[str, ...] = RESOURCES,
+        crawled_at: dict[tuple[str, str], datetime.datetime | str] | None = None,
+        weights: dict[str, float] | None = None,
+        resource_weights: dict[str, float] | None = None,
+        now: datetime.datetime | None = None,
+    ) -> int:
+        """Queue jobs for the resources of repositories.
+
+        Jobs already queued are queued again with their new priority. Jobs that
+        failed are queued again with all their attempts.
+
+        Args:
+            repos: The repos to crawl, as returned by `get_repos` with the change
+                columns, in any output format.
+            resources: Which of "commits", "issues" and "pull_requests" to crawl.
+                Defaults to all of them.
+            crawled_at: When each (resource, repo) was last crawled. Jobs that are
+                not in it were never crawled. Optional, default is None.
+            weights: Weights of repositories, by name, 1 for those not in it.
+                Optional, default is None.
+            resource_weights: Weights of resources, 1 for those not in it. Optional,
+                default is None.
+            now: The current time. Optional, default is now.
+
+        Returns:
+            int: The number of jobs queued.
+        """
+        unknown = set(resources) - set(RESOURCES)
+        if unknown:
+            msg = f"Unknown resources {sorted(unknown)}, must be some of {RESOURCES}."
+            raise ValueError(msg)
+        crawled_at = crawled_at or {}
+        weights = weights or {}
+        resource_weights = resource_weights or {}
+        columns = columns_from(repos, ["name", "updated_at", *_COUNT_COLUMNS.values()])
+        count = 0
+        for i, repo in enumerate(columns["name"]):
+            for resource in resources:
+                priority = job_priority(
+                    columns["updated_at"][i],
+                    crawled_at.get((resource, repo)),
+                    weights.get(repo, 1.0) * resource_weights.get(resource, 1.0),
+                    now,
+                )
+                self._items[(resource, repo)] = int(
+                    columns[_COUNT_COLUMNS[resource]][i] or 0
+                )
+                self._attempts.pop((resource, repo), None)
+                self.failures[resource].pop(repo, None)
+                self._push(priority, resource, repo)
+                count += 1
+        return count
+
+    def pending(self) -> list[tuple[str, str]]:
+        """The queued (resource, repo) jobs, highest priority first."""
+        return [
+            (resource, repo)
+            for _, sequence, resource, repo in sorted(self._heap)
+            if self._jobs.get((resource, repo)) == sequence
+        ]
+
+    def _page_cost(self, resource: str, repo: str) -> int:
+        if resource not in self._page_costs:
+            query = _QUERIES[resource](self.org_name, repo)
+            self._page_costs[resource] = query_cost(query)["cost"]
+        return self._page_costs[resource]
+
+    def estimate(self, resource: str, repo: str) -> int:
+        """The estimated points of a queued or added job."""
+        items = self._items.get((resource, repo), 0)
+        pages = max(1, math.ceil(items / _PAGE_SIZES[resource]))
+        points = pages * self._page_cost(resource, repo)
+        if resource == "commits" and self.stats and items:
+            if "commit_stats" not in self._page_costs:
+                cost = query_cost(COMMIT_STATS_QUERY, {"ids": []})["cost"]
+                self._page_costs["commit_stats"] = cost
+            batches = math.ceil(items / COMMIT_STATS_BATCH_SIZE)
+            points += batches * self._page_costs["commit_stats"]
+        return points
+
+    def run(self, budget: int | None = None) -> dict[str, dict[str, Any]]:
+        """Run the highest priority jobs that fit in the budget.
+
+        Args:
+            budget: The points to spend. Optional, default is None (the points left
+                in the current rate limit window).
+
+        Returns:
+            dict: For each resource, a dictionary mapping the names of the repos
+            crawled to their tables. Jobs that were deferred stay queued, as do jobs
+            that failed fewer than `max_attempts` times.
+        """
+        if budget is None:
+            limits = rate_limit()
+            budget = limits["remaining"]
+            self.limit = limits["limit"]
+            self.remaining = limits["remaining"]
+            self.reset_at = _to_datetime(limits["resetAt"])
+        selected = []
+        deferred = []
+        while (job := self._pop()) is not None:
+            priority, resource, repo = job
+            points = self.estimate(resource, repo)
+            if points <= budget:
+                budget -= points
+                selected.append(job)
+            else:
+                deferred.append(job)
+        for priority, resource, repo in deferred:
+            self._push(priority, resource, repo)
+        logging.info(
+            "Running %d crawl jobs, deferring %d.", len(selected), len(deferred)
+        )
+        self._ran = len(selected)
+
+        results: dict[str, dict[str, Any]] = {resource: {} for resource in RESOURCES}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures: dict[Future, tuple[float, str, str]] = {
+                executor.submit(
+                    crawl.GETTERS[resource],
+                    self.org_name,
+                    repo,
+                    output=self.output,
+                    categorical=self.categorical,
+                ): (priority, resource, repo)
+                for priority, resource, repo in selected
+            }
+            for future in as_completed(futures):
+                priority, resource, repo = futures[future]
+                try:
+                    results[resource][repo] = future.result()
+                except Exception as e:
+                    logging.exception("Crawling %s of %s failed.", resource, repo)
+                    self._fail(priority, resource, repo, e)
+                else:
+                    self._attempts.pop((resource, repo), None)
+        return results
+
+    def _fail(
+        self, priority: float, resource: str, repo: str, error: Exception
+    ) -> None:
+        """Queue a failed job again, or drop it once it has used all its attempts."""
+        attempts = self._attempts.get((resource, repo), 0) + 1
+        if attempts < self.max_attempts:
+            self._attempts[(resource, repo)] = attempts
+            self._push(priority, resource, repo)
+            return
+        logging.warning(
+            "Dropping %s of %s after %d failed attempts.", resource, repo, attempts
+        )
+        self._attempts.pop((resource, repo), None)
+        self.failures[resource][repo] = error
+
+    def run_all(
+        self, sleep: Callable[[float], None] = time.sleep
+    ) -> dict[str, dict[str, Any]]:
+        """Run jobs window after window, waiting for each reset, until none are left.
+
+        Stops early, leaving the rest queued, if a window makes no progress: if all
+        the jobs it ran failed, or if a whole window's budget runs none of the jobs
+        left, as they would never fit.
+
+        Args:
+            sleep: Called with the seconds to wait for the next window. Defaults to
+                `time.sleep`.
+
+        Returns:
+            dict: The results of all the windows, as for `run`.
+        """
+        results: dict[str, dict[str, Any]] = {resource: {} for resource in RESOURCES}
+        while self:
+            succeeded = 0
+            for resource, tables in self.run().items():
+                results[resource].update(tables)
+                succeeded += len(tables)
+            if not succeeded and (self._ran or self.remaining == self.limit):
+                logging.warning(
+                    "%d crawl jobs made no progress in a window.", len(self)
+                )
+                break
+            if self and self.reset_at is not None:
+                now = datetime.datetime.now(datetime.timezone.utc)
+                wait = (self.reset_at - now).total_seconds()
+                logging.info("%d crawl jobs left, waiting %.0f s.", len(self), wait)
+                sleep(max(wait, 0) + 1)
+        return results
@@ -0,0 +1,247 @@
+"""Org-wide retrieval of issues and pull requests through GitHub's search.
+
+A single search covers every repository of an organisation, so finding what changed
+in a time window takes a few requests instead of a crawl of every repository. GitHub
+only returns the first 1,000 results of a search, so windows with more results are
+split in half until every part is under the cap.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+from typing import TYPE_CHECKING
+
+from github_analyser.dictionaries import LOGINS
+from github_analyser.output import check_output, empty_columns, save_output, to_output
+from github_analyser.utils import (
+    parse_timestamp,
+    query_with_pagination,
+    request_github_graphql,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# GitHub returns at most this many results for any search.
+MAX_SEARCH_RESULTS = 1000
+SEARCH_KINDS = {"issue": "is:issue", "pull_request": "is:pr", None: ""}
+
+SEARCH_SCHEMA = {
+    "id": "string",
+    "type": "string",
+    "repo_name": "string",
+    "number": "int",
+    "title": "string",
+    "url": "string",
+    "author": "login",
+    "state": "string",
+    "created_at": "string",
+    "updated_at": "string",
+    "closed_at": "string",
+    "merged_at": "string",
+}
+
+_TYPES = {"Issue": "issue", "PullRequest": "pull_request"}
+
+
+def _get_search_count_query(search: str) -> str:
+    return f"""
+    query {{
+        search(type: ISSUE, query: {json.dumps(search)}) {{
+            issueCount
+        }}
+    }}
+    """
+
+
+def _get_search_query(search: str) -> str:
+    return f"""
+    query ($pagination_cursor: String) {{
+        search(
+            type: ISSUE
+            query: {json.dumps(search)}
+            first: 100
+            after: $pagination_cursor
+        ) {{
+            pageInfo {{
+                endCursor
+                hasNextPage
+            }}
+            nodes {{
+                __typename
+                ... on Issue {{
+                    id
+                    number
+                    title
+                    url
+                    state
+                    createdAt
+                    updatedAt
+                    closedAt
+                    author {{
+                        login
+                    }}
+                    repository {{
+                        name
+                    }}
+                }}
+                ... on PullRequest {{
+                    id
+                    number
+                    title
+                    url
+                    state
+                    createdAt
+                    updatedAt
+                    closedAt
+                    mergedAt
+                    author {{
+                        login
+                    }}
+                    repository {{
+                        name
+                    }}
+                }}
+            }}
+        }}
+    }}
+    """
+
+
+def _to_datetime(value: datetime.datetime | str) -> datetime.datetime:
+    """Parse a timestamp, taking naive ones to be in UTC, to whole seconds."""
+    return parse_timestamp(value).replace(microsecond=0)
+
+
+def _search_string(
+    org_name: str, kind: str | None, start: datetime.datetime, end: datetime.datetime
+) -> str:
+    """The search for items of `org_name` updated between `start` and `end`,
+    inclusive."""
+    updated = f"{start:%Y-%m-%dT%H:%M:%SZ}..{end:%Y-%m-%dT%H:%M:%SZ}"
+    qualifiers = [f"org:{org_name}", SEARCH_KINDS[kind], f"updated:{updated}"]
+    return " ".join(q for q in qualifiers if q) + " sort:updated-asc"
+
+
+def _split_by_count(
+    org_name: str, kind: str | None, start: datetime.datetime, end: datetime.datetime
+) -> list[str]:
+    """Split the time window into searches of at most `MAX_SEARCH_RESULTS` results.
+
+    Returns:
+        list: The searches in chronological order, leaving out empty ones.
+    """
+    one_second = datetime.timedelta(seconds=1)
+    searches = []
+    windows = [(start, end)]
+    while windows:
+        start, end = windows.pop()
+        search = _search_string(org_name, kind, start, end)
+        response = request_github_graphql({"query": _get_search_count_query(search)})
+        count = response["data"]["search"]["issueCount"]
+        if count > MAX_SEARCH_RESULTS and end - start >= one_second:
+            middle = start + (end - start) // 2
+            middle = middle.replace(microsecond=0)
+            # The later half is popped last, so that searches come out in order.
+            windows.append((middle + one_second, end))
+            windows.append((start, middle))
+            continue
+        if count > MAX_SEARCH_RESULTS:
+            logging.warning(
+                "%d results updated at %s, only the first %d can be fetched.",
+                count,
+                start,
+                MAX_SEARCH_RESULTS,
+            )
+        if count:
+            searches.append(search)
+    return searches
+
+
+def get_updated_issues_and_pull_requests(
+    org_name: str,
+    since: datetime.datetime | str,
+    until: datetime.datetime | str | None = None,
+    kind: str | None = None,
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+) -> pd.DataFrame:
+    """Fetch the issues and pull requests of an organisation updated in a time window.
+
+    Uses GitHub's search, splitting the window as needed to stay under its cap of
+    1,000 results per search. For the comments, reviews and labels of the items, fetch
+    their repositories with `get_issues` or `get_pull_requests`.
+
+    Args:
+        org_name: The name of the organisation.
+        since: The start of the window, as a datetime or an ISO 8601 string. Naive
+            datetimes are taken to be in UTC.
+        until: The end of the window. Optional, default is now.
+        kind: "issue" or "pull_request" to only fetch one kind of item. Optional,
+            default is None (both).
+        save (bool | str, optional): If True, save the data to "data/updated.csv" or
+        specify a path. Defaults to False.
+        output: The format of the return value, one of "pandas", "records", "arrow" or
+            "polars". Defaults to "pandas".
+        categorical: If True, return logins as categoricals backed by the shared
+            dictionaries of `github_analyser.dictionaries`. Defaults to False.
+
+    Returns:
+        A pandas DataFrame, in order of updated_at, with the following columns:
+            - id: The issue or pull request ID.
+            - type: "issue" or "pull_request".
+            - repo_name: The name of the repository.
+            - number: The issue or pull request number.
+            - title: The title.
+            - url: The URL.
+            - author: The login of the author, None for deleted users.
+            - state: The state, e.g. "OPEN", "CLOSED" or "MERGED".
+            - created_at: The date and time of creation.
+            - updated_at: The date and time of the last update.
+            - closed_at: The date and time of closing, if closed.
+            - merged_at: The date and time of merging, for merged pull requests.
+    """
+    check_output(output)
+    if kind not in SEARCH_KINDS:
+        msg = f"Unknown kind {kind!r}, must be one of {tuple(SEARCH_KINDS)}."
+        raise ValueError(msg)
+    start = _to_datetime(since)
+    end = _to_datetime(
+        until if until is not None else datetime.datetime.now(datetime.timezone.utc)
+    )
+
+    columns = empty_columns(SEARCH_SCHEMA)
+    seen = set()
+    for search in _split_by_count(org_name, kind, start, end):
+        responses = query_with_pagination(_get_search_query(search), ["data", "search"])
+        for response in responses:
+            for node in response["data"]["search"]["nodes"]:
+                # Items updated during the crawl can turn up in two windows.
+                if node["id"] in seen:
+                    continue
+                seen.add(node["id"])
+                author = node["author"]
+                columns["id"].append(node["id"])
+                columns["type"].append(_TYPES[node["__typename"]])
+                columns["repo_name"].append(node["repository"]["name"])
+                columns["number"].append(node["number"])
+                columns["title"].append(node["title"])
+                columns["url"].append(node["url"])
+                columns["author"].append(
+                    LOGINS.intern(author["login"]) if author else None
+                )
+                columns["state"].append(node["state"])
+                columns["created_at"].append(node["createdAt"])
+                columns["updated_at"].append(node["updatedAt"])
+                columns["closed_at"].append(node["closedAt"])
+                columns["merged_at"].append(node.get("mergedAt"))
+    result = to_output(columns, SEARCH_SCHEMA, output, categorical)
+
+    if save:
+        if save is True:
+            save = "data/updated.csv"
+        save_output(result, save)
+
+    return result
@@ -1,8 +1,16 @@
+from __future__ import annotations
+
 from functools import reduce
 
-import pandas as pd
+from github_analyser.dictionaries import LOGINS
+from github_analyser.output import check_output, empty_columns, save_output, to_output
+from github_analyser.utils import query_with_pagination
+
+TEAM_MEMBER_SCHEMA = {"login": "login"}
+ALL_TEAM_MEMBERS_SCHEMA = {"team_slug": "string", "login": "login", "role": "string"}
 
-from github_analyser.utils import camel_to_snake, query_with_pagination
+MEMBERS_PAGE_SIZE = 100
+TEAMS_PAGE_SIZE = 50
 
 
 def _get_team_members_query(org_name: str, team_slug: str):
@@ -10,13 +18,14 @@ def _get_team_members_query(org_name: str, team_slug: str):
     query ($pagination_cursor: String) {{
       organization(login: "{org_name}") {{
         team(slug: "{team_slug}") {{
-          members(first: 30, after: $pagination_cursor) {{
+          members(first: {MEMBERS_PAGE_SIZE}, after: $pagination_cursor) {{
             pageInfo {{
               hasNextPage
               endCursor
             }}
             totalCount
             edges {{
+              role
               node {{
                 login
               }}
@@ -28,7 +37,13 @@ def _get_team_members_query(org_name: str, team_slug: str):
     """
 
 
-def get_team_members(org_name: str, team_slug: str, save: bool | str = False):
+def get_team_members(
+    org_name: str,
+    team_slug: str,
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+):
     """Get all members of a team within an organisation on GitHub.
 
     Args:
@@ -36,10 +51,15 @@ def get_team_members(org_name: str, team_slug: str, save: bool | str = False):
         team_slug (str): The slug of the team.
         save (bool | str, optional): If True, save the data to "data/org_teams.csv" or
         specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+        categorical (bool, optional): If True, return logins as categoricals backed by
+        the shared dictionaries of `github_analyser.dictionaries`. Defaults to False.
 
     Returns:
         pandas Dataframe: One row per user, columns login.
     """
+    check_output(output)
     pages = query_with_pagination(
         _get_team_members_query(org_name, team_slug),
         page_info_path=["data", "organization", "team", "members"],
@@ -53,13 +73,113 @@ def get_team_members(org_name: str, team_slug: str, save: bool | str = False):
         for page in pages
     ]
     flattened_edges = sum(edges, [])
-    df = pd.json_normalize(flattened_edges)
-    df.rename(columns={"node.login": "login"}, inplace=True)
-    df.rename(columns=camel_to_snake, inplace=True)
+    columns = {
+        "login": [LOGINS.intern(edge["node"]["login"]) for edge in flattened_edges]
+    }
+    result = to_output(columns, TEAM_MEMBER_SCHEMA, output, categorical)
 
     if save:
         if save is True:
             save = "data/org_teams.csv"
-        df.to_csv(save, index=False)
+        save_output(result, save)
+
+    return result
+
+
+def _get_teams_with_members_query(org_name: str):
+    return f"""
+    query ($pagination_cursor: String) {{
+      organization(login: "{org_name}") {{
+        teams(first: {TEAMS_PAGE_SIZE}, after: $pagination_cursor) {{
+          pageInfo {{
+            hasNextPage
+            endCursor
+          }}
+          edges {{
+            node {{
+              slug
+              members(first: {MEMBERS_PAGE_SIZE}) {{
+                pageInfo {{
+                  hasNextPage
+                  endCursor
+                }}
+                edges {{
+                  role
+                  node {{
+                    login
+                  }}
+                }}
+              }}
+            }}
+          }}
+        }}
+      }}
+    }}
+    """
+
+
+def _add_team_members(columns: dict[str, list], team_slug: str, edges: list[dict]):
+    """Append the member edges of a team to the columns of the team members frame."""
+    for edge in edges:
+        columns["team_slug"].append(team_slug)
+        columns["login"].append(LOGINS.intern(edge["node"]["login"]))
+        columns["role"].append(edge["role"])
+
+
+def get_all_team_members(
+    org_name: str,
+    save: bool | str = False,
+    output: str = "pandas",
+    categorical: bool = False,
+):
+    """Get the members of every team within an organisation on GitHub.
+
+    The teams are fetched together with their first page of members, and only teams
+    with more members than fit on that page need further requests. This is much
+    cheaper than calling `get_team_members` for every team.
+
+    Args:
+        org_name (str): The name of the organisation.
+        save (bool | str, optional): If True, save the data to "data/team_members.csv"
+        or specify a path. Defaults to False.
+        output (str, optional): The format of the return value, one of "pandas",
+        "records", "arrow" or "polars". Defaults to "pandas".
+        categorical (bool, optional): If True, return logins as categoricals backed by
+        the shared dictionaries of `github_analyser.dictionaries`. Defaults to False.
+
+    Returns:
+        pandas Dataframe: One row per team membership, with columns team_slug, login
+        and role.
+    """
+    check_output(output)
+    pages = query_with_pagination(
+        _get_teams_with_members_query(org_name),
+        page_info_path=["data", "organization", "teams"],
+    )
+    columns = empty_columns(ALL_TEAM_MEMBERS_SCHEMA)
+    for page in pages:
+        for team_edge in page["data"]["organization"]["teams"]["edges"]:
+            team = team_edge["node"]
+            _add_team_members(columns, team["slug"], team["members"]["edges"])
+            if not team["members"]["pageInfo"]["hasNextPage"]:
+                continue
+            # Only the teams that did not fit in the first page need their own queries.
+            member_pages = query_with_pagination(
+                _get_team_members_query(org_name, team["slug"]),
+                page_info_path=["data", "organization", "team", "members"],
+                start_cursor=team["members"]["pageInfo"]["endCursor"],
+            )
+            for member_page in member_pages:
+                _add_team_members(
+                    columns,
+                    team["slug"],
+                    member_page["data"]["organization"]["team"]["members"]["edges"],
+                )
+    result = to_output(columns, ALL_TEAM_MEMBERS_SCHEMA, output, categorical)
+
+    if save:
+        if save is True:
+            save = "data/team_members.csv"
+        save_output(result, save)
 
-    return df
+    return result
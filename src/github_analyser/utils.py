@@ -1,18 +1,293 @@
 """Utility functions."""
 from __future__ import annotations
 
+import datetime
+import hashlib
+import json
 import logging
 import os
+import queue
+import random
 import re
+import threading
 import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 from typing import Any
 
 import requests
 
+from github_analyser.archive import record_page, replay_page
+
+# Typed loosely, as it is None when orjson is not installed.
+orjson: Any
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 GITHUB_API_URL_GRAPHQL = "https://api.github.com/graphql"
 GITHUB_API_URL_REST = "https://api.github.com"
 
+# Responses from GitHub are large and compress well, so always ask for compression.
+ACCEPT_ENCODING = "gzip, deflate"
+# Responses larger than this are expected to arrive compressed.
+MIN_COMPRESSED_SIZE = 1024
+
+_warned_uncompressed = False
+
+# Requests that fail with one of these codes, or with a 403 for hitting a secondary
+# rate limit, are retried after a backoff.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+MAX_BACKOFF = 60.0
+
+# The number of pages `iter_pages` fetches ahead of the caller by default.
+PREFETCH_PAGES = 2
+
+
+class _Call:
+    """A request in flight, and its outcome once it has finished."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that have the same key.
+
+    While a call for a key is running, other calls with the same key wait for it to
+    finish and get its result, or its exception, instead of running again. Calls made
+    after it has finished run anew, so nothing is cached.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """Run `func`, or wait for the call of it already running for `key`.
+
+        Args:
+            key: Identifies the call, e.g. a hash of the request.
+            func: The function to run, taking no arguments.
+
+        Returns:
+            The return value of `func`. Every caller sharing a call gets the same
+            object, so it must not be modified.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+# Identical requests that are in flight at the same time, e.g. from several threads of
+# a crawl, share a single round trip to GitHub.
+_in_flight = SingleFlight()
+
+
+class ConcurrencyController:
+    """Limit the number of requests in flight, adapting the limit to GitHub's load.
+
+    The limit follows additive increase, multiplicative decrease: every healthy
+    response raises it by 1 / limit, i.e. by about one per round of requests, and
+    every response that signals overload (a secondary rate limit, 429 or 5xx) cuts it
+    by `decrease`, at most once per `cooldown` seconds so that a burst of failures
+    counts as one. Over time the limit settles around the highest concurrency
+    GitHub tolerates.
+
+    Args:
+        initial: The starting limit. Defaults to 4.
+        minimum: The lowest the limit can go. Defaults to 1.
+        maximum: The highest the limit can go. Defaults to 32.
+        decrease: The factor to cut the limit by on overload. Defaults to 0.5.
+        cooldown: The minimum number of seconds between cuts. Defaults to 1.0.
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        minimum: float = 1,
+        maximum: float = 32,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = -float("inf")
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> float:
+        """The current limit on requests in flight."""
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests in flight."""
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent, and count it as in flight."""
+        with self._condition:
+            while self._in_flight >= max(1, int(self._limit)):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, healthy: bool) -> None:
+        """Count a request as finished, and adapt the limit to its outcome.
+
+        Args:
+            healthy: False if the response signalled that GitHub is overloaded.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if healthy:
+                self._limit = min(self.maximum, self._limit + 1 / self._limit)
+            else:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._limit = max(self.minimum, self._limit * self.decrease)
+            self._condition.notify_all()
+
+
+# Shared by all requests of the session.
+CONTROLLER = ConcurrencyController()
+
+
+def _is_overloaded(response: requests.Response) -> bool:
+    """Whether a response asks us to back off and try again."""
+    if response.status_code in RETRY_STATUS_CODES:
+        return True
+    if response.status_code == 403:
+        # A primary rate limit also returns 403, but retrying would not help.
+        return "Retry-After" in response.headers or (
+            b"secondary rate limit" in response.content.lower()
+        )
+    return False
+
+
+def _backoff(attempt: int, response: requests.Response) -> float:
+    """The number of seconds to wait before retrying a request."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None and retry_after.isdigit():
+        return float(retry_after)
+    # Full jitter, so that parallel requests that failed together do not all retry
+    # at the same time.
+    return random.uniform(0, min(MAX_BACKOFF, BACKOFF_BASE * 2**attempt))
+
+
+def _send(
+    request_func: Callable[..., requests.Response],
+    url: str,
+    payload: Any,
+    headers: Any,
+) -> requests.Response:
+    """Send a request within the limits of `CONTROLLER`, retrying with backoff if
+    GitHub is overloaded.
+
+    Returns:
+        The last response, which may still be a failure after `MAX_RETRIES` retries.
+    """
+    attempt = 0
+    while True:
+        CONTROLLER.acquire()
+        healthy = False
+        try:
+            response = request_func(url, json=payload, headers=headers)
+            healthy = not _is_overloaded(response)
+        finally:
+            CONTROLLER.release(healthy)
+        if healthy or attempt >= MAX_RETRIES:
+            return response
+        delay = _backoff(attempt, response)
+        logging.warning(
+            "GitHub returned %d, retrying in %.1f seconds.",
+            response.status_code,
+            delay,
+        )
+        time.sleep(delay)
+        attempt += 1
+
+
+def _request_key(method: str, url: str, payload: Any, headers: Any) -> str:
+    """Identify a request by its method, URL, payload and headers, including the
+    token."""
+    request = json.dumps(
+        [method, url, payload, sorted(headers.items())], sort_keys=True, default=str
+    )
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+def decode_json(content: bytes) -> Any:
+    """Decode a JSON response body.
+
+    Uses orjson, decoding straight from the raw bytes, if it is installed, and the
+    standard library decoder otherwise.
+
+    Args:
+        content: The raw body of the response.
+
+    Returns:
+        The parsed JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _auth_headers(headers: Any | None) -> Any:
+    """Add the authorisation and content encoding headers to `headers`."""
+    if headers is None:
+        headers = {}
+    github_token = os.environ["GITHUB_TOKEN"]
+    headers["Authorization"] = f"Bearer {github_token}"
+    headers.setdefault("Accept-Encoding", ACCEPT_ENCODING)
+    return headers
+
+
+def _check_compressed(response: requests.Response) -> None:
+    """Warn once if a large response was transferred without compression."""
+    global _warned_uncompressed  # noqa: PLW0603
+    if (
+        not _warned_uncompressed
+        and len(response.content) > MIN_COMPRESSED_SIZE
+        and not response.headers.get("Content-Encoding")
+    ):
+        _warned_uncompressed = True
+        logging.warning(
+            "GitHub returned %d bytes without compression, despite requesting %s.",
+            len(response.content),
+            ACCEPT_ENCODING,
+        )
+
 
 def request_github_rest(
     method: str,
@@ -35,88 +310,176 @@ def request_github_rest(
         sleep_time: The time to sleep between tries. Optional, default is 1.0.
 
     Returns:
-        The response from the GitHub API as parsed JSON.
+        The response from the GitHub API as parsed JSON. Concurrent GET requests for
+        the same URL, headers and token share one request and get the same object,
+        which must not be modified.
     """
-    if headers is None:
-        headers = {}
-    github_token = os.environ["GITHUB_TOKEN"]
-    headers["Authorization"] = f"Bearer {github_token}"
-    request_func = getattr(requests, method)
+    headers = _auth_headers(headers)
     url = f"{GITHUB_API_URL_REST}/{end_point}"
-    response = request_func(url, json=payload, headers=headers)
+    if method.lower() != "get":
+        return _request_rest(method, url, payload, headers, max_tries, sleep_time)
+    key = _request_key(method.lower(), url, payload, headers)
+    return _in_flight.do(
+        key,
+        lambda: _request_rest(method, url, payload, headers, max_tries, sleep_time),
+    )
+
+
+def _request_rest(
+    method: str,
+    url: str,
+    payload: Any,
+    headers: Any,
+    max_tries: int,
+    sleep_time: float,
+) -> Any:
+    request_func = getattr(requests, method)
+    response = _send(request_func, url, payload, headers)
     counter = 0
     while response.status_code == 202 and counter < max_tries:
         # This is GitHub's way of saying "I'm working on it, come back later".
         time.sleep(sleep_time)
-        response = request_func(url, json=payload, headers=headers)
+        response = _send(request_func, url, payload, headers)
         counter += 1
     if response.status_code != 200:
         msg = f"GitHub query failed by code {response.status_code}."
         raise Exception(msg)
-    return response.json()
+    _check_compressed(response)
+    return decode_json(response.content)
+
+
+def poll_github_rest(
+    end_points: list[str],
+    max_tries: int = 10,
+    sleep_time: float = 1.0,
+    max_sleep_time: float = 30.0,
+    max_workers: int = 8,
+) -> dict[str, Any]:
+    """GET several REST end points that may answer 202 while computing the data.
+
+    All the end points are requested at once, which starts the computation for every
+    one of them, and then the ones that answered 202 are polled again together, with a
+    backoff that grows between rounds. The waits for the end points thus overlap,
+    instead of adding up as they would with `request_github_rest`.
+
+    Assumes that the GitHub token is set in the environment variable GITHUB_TOKEN.
+
+    Args:
+        end_points: The end points to query, e.g. "repos/my-org/my-repo/stats/
+            participation".
+        max_tries: The maximum number of rounds of polling. Optional, default is 10.
+        sleep_time: The time to sleep before the first round of polling. It doubles,
+            with jitter, every round. Optional, default is 1.0.
+        max_sleep_time: The longest to sleep between rounds. Optional, default is
+            30.0.
+        max_workers: The number of requests to send in parallel. Optional, default
+            is 8.
+
+    Returns:
+        dict: Maps every end point to its response as parsed JSON, None if it was
+        still computing after `max_tries` rounds, an empty list if it had no
+        content, or an exception if it failed, e.g. with 404 for a repository that
+        was deleted. One end point failing does not lose the responses of the others.
+    """
+    headers = _auth_headers(None)
+
+    def get(end_point: str) -> requests.Response:
+        url = f"{GITHUB_API_URL_REST}/{end_point}"
+        return _send(requests.get, url, None, headers)
+
+    results: dict[str, Any] = {end_point: None for end_point in end_points}
+    pending = list(dict.fromkeys(end_points))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for attempt in range(max_tries + 1):
+            if attempt > 0:
+                delay = min(max_sleep_time, sleep_time * 2 ** (attempt - 1))
+                time.sleep(random.uniform(delay / 2, delay))
+            still_pending = []
+            for end_point, response in zip(pending, executor.map(get, pending)):
+                if response.status_code == 202:
+                    still_pending.append(end_point)
+                elif response.status_code == 204:
+                    results[end_point] = []
+                elif response.status_code == 200:
+                    _check_compressed(response)
+                    results[end_point] = decode_json(response.content)
+                else:
+                    msg = (
+                        f"GitHub query for {end_point} failed by code "
+                        f"{response.status_code}."
+                    )
+                    results[end_point] = Exception(msg)
+            pending = still_pending
+            if not pending:
+                break
+            logging.debug("%d end points still computing.", len(pending))
+    if pending:
+        logging.warning(
+            "GitHub was still computing %d end points after %d tries: %s",
+            len(pending),
+            max_tries,
+            pending,
+        )
+    return results
 
 
 def request_github_graphql(payload: Any, headers: Any | None = None) -> Any:
     """Run an authenticated query against the GitHub API.
 
     Assumes that the GitHub token is set in the environment variable GITHUB_TOKEN.
+    Requests are throttled by `CONTROLLER`, and retried with backoff if GitHub
+    responds that it is overloaded.
 
     Args:
         payload: The query to run.
         headers: Any additional headers to pass to the request.
 
     Returns:
-        The response from the GitHub API as parsed JSON.
+        The response from the GitHub API as parsed JSON. Concurrent calls with the
+        same payload, headers and token share one request and get the same object,
+        which must not be modified. While an archive is replaying, see
+        `github_analyser.archive`, the response is read from it instead.
     """
-    if headers is None:
-        headers = {}
-    github_token = os.environ["GITHUB_TOKEN"]
-    headers["Authorization"] = f"Bearer {github_token}"
-    response = requests.post(GITHUB_API_URL_GRAPHQL, json=payload, headers=headers)
+    archived = replay_page(payload)
+    if archived is not None:
+        return archived
+    headers = _auth_headers(headers)
+    key = _request_key("post", GITHUB_API_URL_GRAPHQL, payload, headers)
+    return _in_flight.do(key, lambda: _request_graphql(payload, headers))
+
+
+def _request_graphql(payload: Any, headers: Any) -> Any:
+    response = _send(requests.post, GITHUB_API_URL_GRAPHQL, payload, headers)
     if response.status_code != 200:
         msg = f"GitHub query failed by code {response.status_code}."
         raise Exception(msg)
-    data = response.json()
+    _check_compressed(response)
+    data = decode_json(response.content)
     if "errors" in data:
         msg = f"GitHub GraphQL query returned errors: {data['errors']}"
         raise Exception(msg)
+    record_page(payload, data)
     return data
 
 
-def query_with_pagination(
-    query, page_info_path=None, cursor_variable_name="pagination_cursor", max_pages=None
-) -> list[Any]:
-    """Run a query with pagination.
-
-    Args:
-        query: The query to run.
-        page_info_path: The path to the page info object in the response, on which we
-            are paginating. This should be a list of keys, e.g.
-            `["data", "repository", "issues"]`, would mean that
-            `response["data"]["repository"]["issues"]["pageInfo"]` is the block from
-            which we get the value for next cursor. By default, this is None, which
-            means no pagination is done and the return value will be a list of length 1.
-        cursor_variable_name: The name of the cursor variable in the query.
-            "pagination_cursor" by default.
-        max_pages: The maximum number of pages to fetch. Optional, default is None
-            (fetch all pages).
-
-    Returns:
-        A list of responses from the GitHub API as JSON.
-    """
-    if page_info_path is None:
-        # There is no pagination to do.
-        return [request_github_graphql({"query": query})]
+def _pages(
+    query: str,
+    page_info_path: list[str],
+    cursor_variable_name: str,
+    max_pages: int | None,
+    start_cursor: str | None,
+    last_page: Callable[[Any], bool] | None = None,
+) -> Iterator[Any]:
+    """Fetch the pages of a query one after the other, see `iter_pages`."""
     has_next_page = True
-    end_cursor = None
-    return_value = []
+    end_cursor = start_cursor
     page_counter = 0
     while has_next_page:
         page_counter += 1
         logging.debug("Requesting page %s", page_counter)
         payload = {"query": query, "variables": {cursor_variable_name: end_cursor}}
         data = request_github_graphql(payload)
-        return_value.append(data)
+        yield data
         try:
             pagination = reduce(
                 lambda d, key: d[key] if d is not None else None,
@@ -135,7 +498,223 @@ def query_with_pagination(
         if max_pages is not None and page_counter >= max_pages:
             logging.warning("Reached maximum number of pages %s.", max_pages)
             break
-    return return_value
+        if last_page is not None and last_page(data):
+            break
+
+
+_DONE = object()
+
+
+def _put(pages: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Put `item` in `pages`, waiting for space unless `stop` is set first."""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+        except queue.Full:
+            continue
+        return True
+    return False
+
+
+def iter_pages(
+    query: str,
+    page_info_path: list[str],
+    cursor_variable_name: str = "pagination_cursor",
+    max_pages: int | None = None,
+    start_cursor: str | None = None,
+    prefetch: int = PREFETCH_PAGES,
+    last_page: Callable[[Any], bool] | None = None,
+) -> Iterator[Any]:
+    """Iterate over the pages of a query, fetching the next ones in the background.
+
+    The cursor of each page is needed for the next, so the pages are fetched one after
+    the other, but a fetcher thread requests and decodes page N + 1 while the caller
+    is still processing page N. At most `prefetch` pages wait for the caller, so a
+    slow caller holds the fetcher back instead of piling up pages in memory.
+
+    Args:
+        query: The query to run.
+        page_info_path: The path to the page info object in the response, see
+            `query_with_pagination`.
+        cursor_variable_name: The name of the cursor variable in the query.
+            "pagination_cursor" by default.
+        max_pages: The maximum number of pages to fetch. Optional, default is None
+            (fetch all pages).
+        start_cursor: The cursor to start paginating from. Optional, default is None
+            (start from the beginning).
+        prefetch: The number of pages to fetch ahead. 0 fetches each page only when
+            the caller asks for it, without a thread. Defaults to `PREFETCH_PAGES`.
+        last_page: Called with each page, before the next one is fetched. If it
+            returns True, the page is the last one. Optional, default is None.
+
+    Yields:
+        The responses from the GitHub API as JSON, in order. If a request fails, the
+        exception is raised once the pages before it have been yielded.
+    """
+    pages = _pages(
+        query, page_info_path, cursor_variable_name, max_pages, start_cursor, last_page
+    )
+    if prefetch <= 0:
+        yield from pages
+        return
+
+    fetched: queue.Queue = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def fetch() -> None:
+        try:
+            for page in pages:
+                if not _put(fetched, page, stop):
+                    return
+        except BaseException as e:
+            _put(fetched, e, stop)
+            return
+        _put(fetched, _DONE, stop)
+
+    fetcher = threading.Thread(target=fetch, daemon=True)
+    fetcher.start()
+    try:
+        while True:
+            item = fetched.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Lets the fetcher finish if the caller stops iterating early.
+        stop.set()
+
+
+def query_with_pagination(
+    query,
+    page_info_path=None,
+    cursor_variable_name="pagination_cursor",
+    max_pages=None,
+    start_cursor=None,
+) -> list[Any]:
+    """Run a query with pagination.
+
+    Args:
+        query: The query to run.
+        page_info_path: The path to the page info object in the response, on which we
+            are paginating. This should be a list of keys, e.g.
+            `["data", "repository", "issues"]`, would mean that
+            `response["data"]["repository"]["issues"]["pageInfo"]` is the block from
+            which we get the value for next cursor. By default, this is None, which
+            means no pagination is done and the return value will be a list of length 1.
+        cursor_variable_name: The name of the cursor variable in the query.
+            "pagination_cursor" by default.
+        max_pages: The maximum number of pages to fetch. Optional, default is None
+            (fetch all pages).
+        start_cursor: The cursor to start paginating from, e.g. the end cursor of a
+            page fetched earlier by another query. Optional, default is None (start
+            from the beginning).
+
+    Returns:
+        A list of responses from the GitHub API as JSON.
+    """
+    if page_info_path is None:
+        # There is no pagination to do.
+        return [request_github_graphql({"query": query})]
+    return list(
+        _pages(query, page_info_path, cursor_variable_name, max_pages, start_cursor)
+    )
+
+
+def parse_timestamp(value: datetime.datetime | str) -> datetime.datetime:
+    """Parse a timestamp into a datetime in UTC.
+
+    Unlike `datetime.datetime.fromisoformat` before Python 3.11, this accepts the
+    trailing "Z" of GitHub's timestamps.
+
+    Args:
+        value: A datetime or an ISO 8601 date or timestamp. Naive ones are taken to be
+            in UTC.
+
+    Returns:
+        datetime: The timestamp, timezone aware and in UTC.
+    """
+    if isinstance(value, str):
+        if value.endswith(("Z", "z")):
+            value = f"{value[:-1]}+00:00"
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def github_timestamp(value: datetime.datetime | str) -> str:
+    """Format a timestamp as GitHub does, e.g. "2024-01-31T12:00:00Z".
+
+    Args:
+        value: A datetime or an ISO 8601 date or timestamp. Naive ones are taken to be
+            in UTC.
+
+    Returns:
+        str: The timestamp in UTC, to whole seconds, which compares as a string with
+        the timestamps in GitHub's responses.
+    """
+    return f"{parse_timestamp(value):%Y-%m-%dT%H:%M:%SZ}"
+
+
+def updated_before(since: str, edges_path: list[str]) -> Callable[[Any], bool]:
+    """Whether the last node of a page was updated before `since`.
+
+    For `last_page` of `iter_pages`, to stop paginating through nodes in descending
+    order of updatedAt once they are older than `since`.
+
+    Args:
+        since: A timestamp, as from `github_timestamp`.
+        edges_path: The path to the edges in each page, whose nodes have updatedAt.
+
+    Returns:
+        The check, which is called with a page.
+    """
+
+    def check(page: Any) -> bool:
+        edges = reduce(lambda d, key: d[key], edges_path, page)
+        return bool(edges) and edges[-1]["node"]["updatedAt"] < since
+
+    return check
+
+
+def filter_pages(
+    pages: Iterable[Any],
+    edges_path: list[str],
+    since: str | None = None,
+    until: str | None = None,
+) -> Iterator[Any]:
+    """Keep the edges of pages whose nodes were updated in a time window.
+
+    Args:
+        pages: The responses from the GitHub API, e.g. from `iter_pages`.
+        edges_path: The path to the edges in each page, e.g.
+            `["data", "repository", "issues", "edges"]`. Their nodes must have
+            updatedAt.
+        since: Drop nodes updated before this timestamp, as from `github_timestamp`.
+            Optional, default is None.
+        until: Drop nodes updated after this timestamp. Optional, default is None.
+
+    Yields:
+        Copies of the pages, with only the edges in the window. The pages themselves
+        are not modified, as they can be shared by concurrent requests.
+    """
+    for page in pages:
+        edges = reduce(lambda d, key: d[key], edges_path, page)
+        kept = [
+            edge
+            for edge in edges
+            if (since is None or edge["node"]["updatedAt"] >= since)
+            and (until is None or edge["node"]["updatedAt"] <= until)
+        ]
+        filtered = dict(page)
+        parent = filtered
+        for key in edges_path[:-1]:
+            parent[key] = dict(parent[key])
+            parent = parent[key]
+        parent[edges_path[-1]] = kept
+        yield filtered
 
 
 def camel_to_snake(name):
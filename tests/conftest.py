@@ -1,4 +1,7 @@
 """Pytest configuration file."""
+from __future__ import annotations
+
+from typing import Any
 from unittest.mock import patch
 
 import pytest
@@ -8,6 +11,15 @@ from github_analyser.utils import GITHUB_API_URL_GRAPHQL
 from .mock_github import request_to_response
 
 
+def null_columns(
+    schema: dict[str, str], rows: int, **values: list[Any]
+) -> dict[str, list[Any]]:
+    """Columns of a table with `rows` rows, null except for those in `values`."""
+    columns: dict[str, list[Any]] = {name: [None] * rows for name in schema}
+    columns.update(values)
+    return columns
+
+
 @pytest.fixture(scope="session")
 def mock_github():
     with patch(
@@ -22,3 +34,12 @@ def mock_github():
                 json=response,
             )
         yield rsps
+
+
+@pytest.fixture()
+def _github_token():
+    """Set a token, for tests that mock the requests themselves."""
+    with patch.dict(
+        "github_analyser.utils.os.environ", {"GITHUB_TOKEN": "a token for tests"}
+    ):
+        yield
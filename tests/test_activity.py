@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from github_analyser.activity import ActivityAggregator, period_of
+
+ISSUES: list[dict[str, Any]] = [
+    {
+        "id": "I_1",
+        "author": "mhauru",
+        "created_at": "2024-02-29T12:11:12Z",
+        "comments": ["mhauru", "rwood-97", None],
+        "comment_dates": ["2024-02-29T13:00:00Z", "2024-03-01T09:00:00Z", None],
+    },
+    {
+        "id": "I_2",
+        "author": None,
+        "created_at": "2024-01-16T14:58:06Z",
+        "comments": ["mastoffel"],
+        "comment_dates": ["2024-01-17T09:00:00Z"],
+    },
+]
+PULL_REQUESTS = [
+    {
+        "id": "PR_1",
+        "author": "mastoffel",
+        "created_at": "2024-02-01T10:00:00Z",
+        "comments": [],
+        "comment_dates": [],
+        "reviews": ["mhauru", "mhauru"],
+        "review_dates": ["2024-02-01T11:00:00Z", "2024-03-02T11:00:00Z"],
+    },
+]
+COMMITS: list[dict[str, Any]] = [
+    {"hash": "abc", "login": "mhauru", "date": "2024-02-02T10:00:00+01:00"},
+    {"hash": "def", "login": None, "date": "2024-02-03T10:00:00Z"},
+]
+
+
+def _rows(aggregator):
+    return {
+        (row["login"], row["repo"], row["period"]): row
+        for row in aggregator.to_output("records")
+    }
+
+
+def test_period_of():
+    assert period_of("2024-02-29T12:11:12Z", "day") == "2024-02-29"
+    assert period_of("2024-02-29T12:11:12Z", "week") == "2024-W09"
+    assert period_of("2024-02-29T12:11:12Z", "month") == "2024-02"
+    assert period_of("2024-02-29T12:11:12Z", "year") == "2024"
+    # It is already 2026 in UTC.
+    assert period_of("2025-12-31T23:30:00-05:00", "year") == "2026"
+    assert period_of("2025-12-31T23:30:00-05:00", "month") == "2026-01"
+    with pytest.raises(ValueError, match="Unknown period"):
+        period_of("2024-02-29T12:11:12Z", "fortnight")
+
+
+def test_activity_aggregator():
+    aggregator = ActivityAggregator()
+    aggregator.add_issues("repo-a", ISSUES)
+    aggregator.add_pull_requests("repo-a", PULL_REQUESTS)
+    aggregator.add_commits("repo-b", COMMITS)
+    rows = _rows(aggregator)
+    assert len(rows) == 6
+    mhauru = rows[("mhauru", "repo-a", "2024-02")]
+    assert mhauru["issues_opened"] == 1
+    assert mhauru["comments"] == 1
+    assert mhauru["reviews"] == 1
+    # Comments and reviews count in the period they were made.
+    assert rows[("rwood-97", "repo-a", "2024-03")]["comments"] == 1
+    assert rows[("mhauru", "repo-a", "2024-03")]["reviews"] == 1
+    assert rows[("mastoffel", "repo-a", "2024-02")]["prs_authored"] == 1
+    assert rows[("mastoffel", "repo-a", "2024-01")]["comments"] == 1
+    assert rows[("mhauru", "repo-b", "2024-02")]["commits"] == 1
+
+
+def test_activity_aggregator_replaces_updated_items(tmp_path):
+    aggregator = ActivityAggregator()
+    aggregator.add_issues("repo-a", ISSUES)
+    # The same issue arrives again, with a comment from a new user.
+    updated = dict(
+        ISSUES[0],
+        comments=["mhauru", "rwood-97", "mastoffel"],
+        comment_dates=[*ISSUES[0]["comment_dates"][:2], "2024-02-29T15:00:00Z"],
+    )
+    aggregator.add_issues("repo-a", [updated])
+    rows = _rows(aggregator)
+    assert rows[("mhauru", "repo-a", "2024-02")]["issues_opened"] == 1
+    assert rows[("mastoffel", "repo-a", "2024-02")]["comments"] == 1
+
+    path = tmp_path / "activity.json"
+    aggregator.save(path)
+    loaded = ActivityAggregator.load(path)
+    assert loaded.to_output("records") == aggregator.to_output("records")
+    frame = loaded.to_output()
+    assert list(frame.columns[:3]) == ["login", "repo", "period"]
+
+
+def test_commits_without_ids():
+    aggregator = ActivityAggregator()
+    # Commits from push events have no node ID, only a hash.
+    commits = [{**commit, "id": None, "login": "mhauru"} for commit in COMMITS]
+    aggregator.add_commits("repo", commits)
+    aggregator.add_commits("repo", commits[:1])
+    assert _rows(aggregator)[("mhauru", "repo", "2024-02")]["commits"] == 2
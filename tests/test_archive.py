@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import datetime
+from unittest.mock import patch
+
+import pytest
+from github_analyser.archive import PageArchive, recording, replaying
+from github_analyser.issues import get_issues
+
+
+def test_page_archive(tmp_path):
+    archive = PageArchive(tmp_path)
+    payload = {"query": "query { a }", "variables": {"cursor": None}}
+    first = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    archive.record(payload, {"data": 1}, fetched_at=first)
+    archive.record(payload, {"data": 2}, fetched_at=first.replace(year=2025))
+    assert archive.replay(payload) == {"data": 2}
+    assert archive.replay(payload, as_of=first) == {"data": 1}
+    with pytest.raises(KeyError):
+        archive.replay(payload, as_of=first.replace(year=2023))
+    with pytest.raises(KeyError):
+        archive.replay({"query": "query { b }"})
+
+
+def test_record_and_replay_getter(mock_github, tmp_path):  # noqa: ARG001
+    with recording(tmp_path):
+        issues = get_issues(
+            "alan-turing-institute", "github-analyser", output="records"
+        )
+    assert list(tmp_path.rglob("*.json.zst"))
+
+    with replaying(tmp_path), patch("requests.post") as post:
+        replayed = get_issues(
+            "alan-turing-institute", "github-analyser", output="records"
+        )
+    post.assert_not_called()
+    assert replayed == issues
+
+    with replaying(tmp_path), pytest.raises(KeyError):
+        get_issues("alan-turing-institute", "another-repo")
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from github_analyser import licences
+from github_analyser.bulk import BulkError, run_bulk
+from github_analyser.licences import get_licences
+
+
+def test_run_bulk_isolates_failures():
+    flaky = {"b"}
+
+    def func(item):
+        if item in flaky:
+            msg = f"{item} is broken"
+            raise ValueError(msg)
+        return {"item": item}
+
+    result = run_bulk(func, ["a", "b", "c", "a"], max_workers=2)
+    assert not result.ok
+    assert list(result.successes) == ["a", "c"]
+    assert result.errors(output="records") == [
+        {"item": "b", "error": "ValueError", "message": "b is broken"}
+    ]
+    assert result.table({"item": "string"}, output="records") == [
+        {"item": "a"},
+        {"item": "c"},
+    ]
+    with pytest.raises(BulkError, match="1 of 3 items failed") as error:
+        result.raise_for_failures()
+    assert error.value.result is result
+
+    flaky.clear()
+    retried = result.retry_failed()
+    assert retried.ok
+    assert set(retried.successes) == {"a", "b", "c"}
+
+
+def _licence_record(org_name, repo_name):  # noqa: ARG001
+    if repo_name == "deleted":
+        msg = "Could not resolve to a Repository"
+        raise Exception(msg)
+    return {
+        "repo_name": repo_name,
+        "repo_url": f"https://github.com/org/{repo_name}",
+        "repo_id": repo_name.upper(),
+        "name": "MIT License",
+        "spdx_id": "MIT",
+    }
+
+
+def test_get_licences_keeps_partial_results():
+    with patch.object(licences, "_licence_record", side_effect=_licence_record):
+        with pytest.raises(BulkError) as error:
+            get_licences("org", ["one", "deleted", "two"])
+        assert list(error.value.result.successes) == ["one", "two"]
+
+        result = get_licences(
+            "org", ["one", "deleted", "two"], errors="ignore", output="records"
+        )
+    assert [record["repo_name"] for record in result] == ["one", "two"]
+
+
+def test_get_licences_returns_errors():
+    with patch.object(licences, "_licence_record", side_effect=_licence_record):
+        result, errors = get_licences(
+            "org", ["one", "deleted", "two"], errors="return", output="records"
+        )
+    assert [record["repo_name"] for record in result] == ["one", "two"]
+    assert [error["item"] for error in errors] == ["deleted"]
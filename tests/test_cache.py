@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from github_analyser.cache import ResultCache, memoise
+from github_analyser.repos import get_repos
+
+
+def _counting_getter():
+    calls = []
+
+    def get_things(
+        org_name: str,
+        repo_name: str,
+        save: bool | str = False,  # noqa: ARG001
+        output: str = "records",  # noqa: ARG001
+    ):
+        calls.append((org_name, repo_name))
+        return [{"org": org_name, "repo": repo_name, "n": len(calls)}]
+
+    return get_things, calls
+
+
+def test_memoise_returns_cached_copies():
+    cache = ResultCache()
+    get_things, calls = _counting_getter()
+    cached = memoise(get_things, cache=cache)
+    first = cached("org", "repo")
+    first[0]["n"] = 100
+    assert cached("org", repo_name="repo") == [{"org": "org", "repo": "repo", "n": 1}]
+    assert cached("org", "other") == [{"org": "org", "repo": "other", "n": 2}]
+    assert len(calls) == 2
+    # Saving always runs the getter, and refreshes the cache.
+    assert cached("org", "repo", save="things.csv")[0]["n"] == 3
+    assert cached("org", "repo")[0]["n"] == 3
+
+
+def test_memoise_expiry_and_invalidation():
+    cache = ResultCache()
+    get_things, calls = _counting_getter()
+    cached = memoise(get_things, ttl=0, cache=cache)
+    cached("org", "repo")
+    cached("org", "repo")
+    assert len(calls) == 2
+
+    cached = memoise(get_things, cache=cache)
+    cached("org", "repo")
+    cached("org", "other")
+    cached("another-org", "repo")
+    assert cache.invalidate(resource="repos") == 0
+    assert cache.invalidate(org="org", repo="repo", resource="things") == 1
+    assert cache.invalidate(org="org") == 1
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_memoise_evicts_least_recently_used():
+    get_things, calls = _counting_getter()
+    cache = ResultCache()
+    cached = memoise(get_things, cache=cache)
+    cached("org", "a")
+    cache.max_bytes = cache.size * 2
+    cached("org", "b")
+    cached("org", "a")
+    cached("org", "c")
+    assert len(cache) == 2
+    cached("org", "a")
+    cached("org", "c")
+    assert len(calls) == 3
+    cached("org", "b")
+    assert len(calls) == 4
+
+
+def test_memoise_get_repos(mock_github):
+    cached_get_repos = memoise(get_repos, cache=ResultCache())
+    repos = cached_get_repos("alan-turing-institute")
+    num_calls = len(mock_github.calls)
+    repos["extra"] = 1
+    again = cached_get_repos("alan-turing-institute")
+    assert len(mock_github.calls) == num_calls
+    assert "extra" not in again.columns
+    assert list(again["name"]) == list(repos["name"])
+
+
+def test_memoise_copies_list_values():
+    def get_issues(org_name, repo_name):  # noqa: ARG001
+        return [{"id": "I_1", "comments": ["mhauru"], "languages": {"Python": 1.0}}]
+
+    cached = memoise(get_issues, cache=ResultCache())
+    (issue,) = cached("org", "repo")
+    issue["comments"].append("rwood-97")
+    issue["languages"]["C"] = 0.5
+    (again,) = cached("org", "repo")
+    assert again["comments"] == ["mhauru"]
+    assert again["languages"] == {"Python": 1.0}
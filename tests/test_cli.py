@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from github_analyser import crawl
+from github_analyser.cli import _merge_part, filter_since, main
+from github_analyser.commits import COMMIT_SCHEMA
+from github_analyser.issues import ISSUE_SCHEMA
+from github_analyser.output import empty_columns, save_output, to_output
+
+from .conftest import null_columns
+
+
+def _get_issues(org_name, repo_name, output, categorical, since=None):  # noqa: ARG001
+    columns = null_columns(
+        ISSUE_SCHEMA,
+        2,
+        id=[f"{repo_name}-1", f"{repo_name}-2"],
+        created_at=["2023-06-01T10:00:00Z", "2024-02-01T10:00:00Z"],
+        comments=[[], []],
+        labels=[[], []],
+    )
+    return to_output(columns, ISSUE_SCHEMA, output, categorical)
+
+
+def test_crawl_command(mock_github, tmp_path, capsys):  # noqa: ARG001
+    args = [
+        "crawl",
+        "alan-turing-institute",
+        "--resources",
+        "issues",
+        "--since",
+        "2024-01-01",
+        "--output-dir",
+        str(tmp_path),
+    ]
+    with patch.dict(crawl.GETTERS, {"issues": _get_issues}):
+        assert main(args) == 0
+        assert "issues: 10 repos updated" in capsys.readouterr().err
+        org_dir = tmp_path / "alan-turing-institute"
+        assert pq.read_table(org_dir / "repos.parquet").num_rows == 10
+        part = org_dir / "issues" / "repo=Yaaaay" / "part-0.parquet"
+        assert pq.read_table(part).column("id").to_pylist() == ["Yaaaay-2"]
+
+        # Nothing has changed since, so the second crawl skips every repo.
+        assert main(args) == 0
+        assert "issues: 0 repos updated" in capsys.readouterr().err
+
+
+def test_crawl_command_unknown_resource(capsys):
+    with pytest.raises(SystemExit):
+        main(["crawl", "my-org", "--resources", "stars"])
+    assert "unknown resource 'stars'" in capsys.readouterr().err
+
+
+def test_crawl_command_new_resource(mock_github, tmp_path, capsys):  # noqa: ARG001
+    def get_commits(org_name, repo_name, output, categorical):  # noqa: ARG001
+        return to_output(empty_columns(COMMIT_SCHEMA), COMMIT_SCHEMA, output)
+
+    args = ["crawl", "alan-turing-institute", "--output-dir", str(tmp_path)]
+    getters = {"issues": _get_issues, "commits": get_commits}
+    with patch.dict(crawl.GETTERS, getters):
+        assert main([*args, "--resources", "issues"]) == 0
+        capsys.readouterr()
+        # The commits were never crawled, so the snapshot of issues does not apply.
+        assert main([*args, "--resources", "issues,commits"]) == 0
+    err = capsys.readouterr().err
+    assert "issues: 0 repos updated" in err
+    assert "commits: 10 repos updated" in err
+
+
+def test_crawl_command_retries_failures(mock_github, tmp_path, capsys):  # noqa: ARG001
+    def get_issues(org_name, repo_name, output, categorical):
+        if repo_name == "Yaaaay":
+            msg = "Something went wrong"
+            raise RuntimeError(msg)
+        return _get_issues(org_name, repo_name, output, categorical)
+
+    args = [
+        "crawl",
+        "alan-turing-institute",
+        "--resources",
+        "issues",
+        "--output-dir",
+        str(tmp_path),
+    ]
+    with patch.dict(crawl.GETTERS, {"issues": get_issues}):
+        assert main(args) == 1
+    err = capsys.readouterr().err
+    assert "issues Yaaaay failed: Something went wrong" in err
+    assert "issues: 9 repos updated" in err
+    org_dir = tmp_path / "alan-turing-institute"
+    snapshot = pq.read_table(org_dir / "issues" / "_snapshot.parquet")
+    assert "Yaaaay" not in snapshot.column("name").to_pylist()
+
+    # The next crawl retries the repo that failed, and only it.
+    with patch.dict(crawl.GETTERS, {"issues": _get_issues}):
+        assert main(args) == 0
+    assert "issues: 1 repos updated" in capsys.readouterr().err
+    assert (org_dir / "issues" / "repo=Yaaaay" / "part-0.parquet").exists()
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "csv"])
+def test_merge_part_keeps_earlier_rows(tmp_path, file_format):
+    path = tmp_path / f"part-0.{file_format}"
+    save_output(_get_issues("org", "repo", "pandas", False), path)
+    # A later crawl, with a later --since, fetched an update of repo-2 and a new issue.
+    issues = _get_issues("org", "repo", "records", False)
+    issues[0].update({"id": "repo-3", "created_at": "2024-03-01T10:00:00Z"})
+    issues[1]["updated_at"] = "2024-03-01T11:00:00Z"
+    save_output(_merge_part(path, issues, "issues"), path)
+    merged = pd.read_parquet(path) if file_format == "parquet" else pd.read_csv(path)
+    assert list(merged["id"]) == ["repo-1", "repo-3", "repo-2"]
+    assert list(merged["updated_at"].fillna("")) == ["", "", "2024-03-01T11:00:00Z"]
+
+
+def test_filter_since_keeps_updated_issues():
+    issues = _get_issues("org", "repo", "records", False)
+    # The first issue is older than the window, but was updated in it.
+    issues[0]["updated_at"] = "2024-03-01T10:00:00Z"
+    kept = filter_since(issues, "issues", "2024-01-01")
+    assert [issue["id"] for issue in kept] == ["repo-1", "repo-2"]
+    # In UTC, the window starts half an hour before the first issue was updated.
+    kept = filter_since(issues, "issues", "2024-03-01T10:30:00+01:00")
+    assert [issue["id"] for issue in kept] == ["repo-1"]
+
+
+def test_filter_since_compares_commit_dates_in_utc():
+    columns = null_columns(
+        COMMIT_SCHEMA,
+        2,
+        id=["a", "b"],
+        # In UTC, a is from 2026 and b from 2025, the opposite of how they sort as text.
+        date=["2025-12-31T23:30:00-05:00", "2026-01-01T00:30:00+01:00"],
+    )
+    commits = to_output(columns, COMMIT_SCHEMA, "records")
+    kept = filter_since(commits, "commits", "2026-01-01")
+    assert [commit["id"] for commit in kept] == ["a"]
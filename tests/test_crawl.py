@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from github_analyser import crawl
+from github_analyser.crawl import changed_resources, crawl_org
+
+
+def _fake_getters():
+    calls = []
+
+    def getter(resource):
+        def get(org_name, repo_name, output, categorical):  # noqa: ARG001
+            calls.append((resource, repo_name))
+            return [{"resource": resource, "repo": repo_name}]
+
+        return get
+
+    return {resource: getter(resource) for resource in crawl.RESOURCES}, calls
+
+
+def test_changed_resources():
+    previous = {
+        "name": "repo",
+        "pushed_at": "2024-01-01T00:00:00Z",
+        "commit_count": 10,
+        "issue_count": 3,
+        "issues_updated_at": "2024-01-01T00:00:00Z",
+        "pull_request_count": 0,
+        "pull_requests_updated_at": None,
+    }
+    assert changed_resources(previous, None) == ["commits", "issues", "pull_requests"]
+    # Counts read back from a CSV file are floats.
+    assert changed_resources({**previous, "commit_count": 10.0}, previous) == []
+    current = {**previous, "issues_updated_at": "2024-01-02T00:00:00Z"}
+    assert changed_resources(current, previous) == ["issues"]
+    current = {**previous, "pushed_at": "2024-01-02T00:00:00Z", "commit_count": 11}
+    assert changed_resources(current, previous, ("commits", "issues")) == ["commits"]
+
+
+def test_crawl_org_skips_unchanged_repos(mock_github):  # noqa: ARG001
+    getters, calls = _fake_getters()
+    with patch.dict(crawl.GETTERS, getters):
+        first = crawl_org("alan-turing-institute", output="records")
+        assert len(calls) == 30
+        assert len(first["issues"]) == 10
+
+        calls.clear()
+        snapshot = first["repos"]
+        snapshot[0] = {**snapshot[0], "commit_count": 41}
+        snapshot[1] = {**snapshot[1], "issues_updated_at": None}
+        second = crawl_org("alan-turing-institute", snapshot=snapshot, output="records")
+    assert sorted(calls) == [
+        ("commits", snapshot[0]["name"]),
+        ("issues", snapshot[1]["name"]),
+    ]
+    assert list(second["commits"]) == [snapshot[0]["name"]]
+    assert second["pull_requests"] == {}
+
+
+def test_crawl_org_unknown_resource():
+    with pytest.raises(ValueError, match="Unknown resources"):
+        crawl_org("alan-turing-institute", resources=("stars",))
+
+
+def test_crawl_org_snapshot_by_resource(mock_github):  # noqa: ARG001
+    getters, calls = _fake_getters()
+    with patch.dict(crawl.GETTERS, getters):
+        first = crawl_org("alan-turing-institute", resources=("issues",))
+        calls.clear()
+        # Commits have no snapshot, so they are crawled in full.
+        crawl_org(
+            "alan-turing-institute",
+            snapshot={"issues": first["repos"]},
+            resources=("issues", "commits"),
+        )
+    assert len(calls) == 10
+    assert {resource for resource, _ in calls} == {"commits"}
+
+
+def test_crawl_org_keeps_going_on_failures(mock_github):  # noqa: ARG001
+    getters, calls = _fake_getters()
+    get_issues = getters["issues"]
+
+    def failing(org_name, repo_name, output, categorical):
+        if repo_name == "Yaaaay":
+            msg = "Something went wrong"
+            raise RuntimeError(msg)
+        return get_issues(org_name, repo_name, output, categorical)
+
+    with patch.dict(crawl.GETTERS, {**getters, "issues": failing}):
+        result = crawl_org("alan-turing-institute", output="records")
+    assert len(result["issues"]) == 9
+    assert "Yaaaay" not in result["issues"]
+    assert list(result["errors"]["issues"]) == ["Yaaaay"]
+    assert isinstance(result["errors"]["issues"]["Yaaaay"], RuntimeError)
+    assert result["errors"]["commits"] == {}
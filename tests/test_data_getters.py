@@ -1,7 +1,19 @@
-from github_analyser.commits import get_commits
+import datetime
+from typing import Any
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from github_analyser import utils
+from github_analyser.commits import COMMIT_SCHEMA, add_commit_stats, get_commits
+from github_analyser.dictionaries import LOGINS
+from github_analyser.extraction import shutdown_process_pool
 from github_analyser.issues import get_issues
 from github_analyser.pull_requests import get_pull_requests
 from github_analyser.repos import get_repos
+from github_analyser.search import get_updated_issues_and_pull_requests
+from github_analyser.team_user_info import get_all_team_members
 
 
 def test_get_repos(mock_github):  # noqa: ARG001
@@ -16,24 +28,38 @@ def test_get_repos(mock_github):  # noqa: ARG001
         "is_private",
         "is_archived",
         "is_fork",
+        "pushed_at",
+        "commit_count",
+        "issue_count",
+        "issues_updated_at",
+        "pull_request_count",
+        "pull_requests_updated_at",
     }
     assert "github-analyser" in repos.loc[:, "name"].values
     assert (
         "https://github.com/alan-turing-institute/github-analyser"
         in repos.loc[:, "url"].values
     )
+    # The change columns are only filled in when asked for.
+    assert repos["commit_count"].isna().all()
+    repos = get_repos("alan-turing-institute", output="records", change_columns=True)
+    assert all(repo["issue_count"] is not None for repo in repos)
 
 
 def test_get_issues(mock_github):  # noqa: ARG001
     issues = get_issues("alan-turing-institute", "github-analyser")
     assert len(issues) == 3
     assert set(issues.columns) == {
+        "id",
         "title",
         "body",
         "author",
         "created_at",
         "closed_at",
+        "updated_at",
         "comments",
+        "comment_dates",
+        "first_comment_at",
         "labels",
     }
     assert "Markus needs new socks" in issues.loc[:, "title"].values
@@ -42,6 +68,7 @@ def test_get_issues(mock_github):  # noqa: ARG001
     assert "2024-02-29T12:11:12Z" in issues.loc[:, "created_at"].values
     assert "2024-02-23T16:49:59Z" in issues.loc[:, "closed_at"].values
     assert ["mhauru", "rwood-97"] == issues.loc[2, "comments"]
+    assert len(issues.loc[2, "comment_dates"]) == 2
     assert ["help needed", "anatomy"] == issues.loc[2, "labels"]
 
 
@@ -53,6 +80,7 @@ def test_get_commits_empty_repo(mock_github):  # noqa: ARG001
         "hash",
         "message",
         "author",
+        "login",
         "date",
         "changed_files",
         "additions",
@@ -70,6 +98,7 @@ def test_get_pull_requests_empty_repo(mock_github):  # noqa: ARG001
         "author",
         "changed_files",
         "comments",
+        "comment_dates",
         "closed",
         "closed_at",
         "created_at",
@@ -79,6 +108,9 @@ def test_get_pull_requests_empty_repo(mock_github):  # noqa: ARG001
         "updated_at",
         "total_comments_count",
         "reviews",
+        "review_dates",
+        "first_comment_at",
+        "first_review_at",
     }
 
 
@@ -86,11 +118,202 @@ def test_get_issues_empty_repo(mock_github):  # noqa: ARG001
     issues = get_issues("alan-turing-institute", "empty-repo")
     assert len(issues) == 0
     assert set(issues.columns) == {
+        "id",
         "title",
         "body",
         "author",
         "created_at",
         "closed_at",
+        "updated_at",
         "comments",
+        "comment_dates",
+        "first_comment_at",
         "labels",
     }
+
+
+def test_get_issues_output_formats(mock_github):  # noqa: ARG001
+    records = get_issues("alan-turing-institute", "github-analyser", output="records")
+    assert len(records) == 3
+    assert records[0]["title"] == "Markus needs new socks"
+    assert records[2]["labels"] == ["help needed", "anatomy"]
+
+    table = get_issues("alan-turing-institute", "github-analyser", output="arrow")
+    assert table.num_rows == 3
+    assert str(table.schema.field("comments").type) == "list<item: string>"
+    assert table.column("author").to_pylist() == ["mhauru", "mhauru", "mastoffel"]
+
+
+def test_get_repos_polars(mock_github):  # noqa: ARG001
+    pytest.importorskip("polars")
+    repos = get_repos("alan-turing-institute", output="polars")
+    assert repos.height == 10
+    assert repos["name"].to_list()[-1] == "Yaaaay"
+
+
+def test_get_commits_empty_repo_arrow(mock_github):  # noqa: ARG001
+    table = get_commits("alan-turing-institute", "empty-repo", output="arrow")
+    assert table.num_rows == 0
+    assert str(table.schema.field("additions").type) == "int64"
+
+
+def test_unknown_output_format(mock_github):  # noqa: ARG001
+    with pytest.raises(ValueError, match="Unknown output format"):
+        get_repos("alan-turing-institute", output="xml")
+
+
+def test_get_issues_categorical(mock_github):  # noqa: ARG001
+    issues = get_issues("alan-turing-institute", "github-analyser", categorical=True)
+    assert isinstance(issues["author"].dtype, pd.CategoricalDtype)
+    assert list(issues["author"]) == ["mhauru", "mhauru", "mastoffel"]
+    codes = issues["author"].cat.codes
+    assert codes[0] == codes[1] == LOGINS.encode("mhauru")
+
+    table = get_issues(
+        "alan-turing-institute", "github-analyser", output="arrow", categorical=True
+    )
+    assert pa.types.is_dictionary(table.schema.field("author").type)
+    labels = table.column("labels").combine_chunks()
+    assert pa.types.is_dictionary(labels.type.value_type)
+    assert labels.to_pylist()[2] == ["help needed", "anatomy"]
+
+
+def test_get_all_team_members(mock_github):  # noqa: ARG001
+    members = get_all_team_members("alan-turing-institute", output="records")
+    assert members == [
+        {"team_slug": "research-engineering", "login": "mhauru", "role": "MAINTAINER"},
+        {"team_slug": "research-engineering", "login": "mastoffel", "role": "MEMBER"},
+        {"team_slug": "sock-enthusiasts", "login": "mhauru", "role": "MEMBER"},
+        {"team_slug": "sock-enthusiasts", "login": "rwood-97", "role": "MEMBER"},
+    ]
+
+
+def test_get_commits_pr_ids_from_pull_requests(mock_github):  # noqa: ARG001
+    commits = get_commits(
+        "alan-turing-institute",
+        "small-repo",
+        pr_ids_from="pull_requests",
+        stats_batch_size=2,
+    )
+    assert list(commits["hash"]) == ["3abcdef", "2abcdef", "1abcdef"]
+    assert list(commits["pr_id"]) == ["PR_squashed", None, "PR_merged"]
+    assert list(commits["login"]) == ["mhauru", None, "mastoffel"]
+    assert list(commits["additions"]) == [30, 20, 10]
+
+
+def test_add_commit_stats_later(mock_github):  # noqa: ARG001
+    commits = get_commits(
+        "alan-turing-institute",
+        "small-repo",
+        pr_ids_from=None,
+        stats=False,
+        output="records",
+    )
+    assert [commit["additions"] for commit in commits] == [None, None, None]
+    commits = add_commit_stats(commits, batch_size=2, max_workers=2)
+    assert [commit["additions"] for commit in commits] == [30, 20, 10]
+    assert [commit["changed_files"] for commit in commits] == [3, 2, 1]
+    assert [commit["pr_id"] for commit in commits] == [None, None, None]
+
+
+def test_add_commit_stats_without_ids(mock_github):  # noqa: ARG001
+    # As added from a push event, see github_analyser.events.
+    commit: dict[str, Any] = {name: None for name in COMMIT_SCHEMA}
+    commit.update({"hash": "1abcdef", "repo_id": "R_small"})
+    (commit,) = add_commit_stats([commit])
+    assert commit["id"] == "C_kwDOK5PAAd1"
+    assert commit["additions"] == 10
+
+
+def test_get_updated_issues_and_pull_requests(mock_github):  # noqa: ARG001
+    updated = get_updated_issues_and_pull_requests(
+        "alan-turing-institute",
+        since="2024-01-01T00:00:00Z",
+        until=datetime.datetime(2024, 1, 3),
+        output="records",
+    )
+    assert [item["id"] for item in updated] == ["I_search1", "PR_search2", "I_search3"]
+    assert [item["type"] for item in updated] == ["issue", "pull_request", "issue"]
+    assert updated[0]["merged_at"] is None
+    assert updated[1]["author"] is None
+    assert updated[2]["repo_name"] == "b"
+
+
+@pytest.mark.parametrize("output", ["pandas", "records", "arrow"])
+def test_get_issues_in_worker_processes(mock_github, output):  # noqa: ARG001
+    expected = get_issues("alan-turing-institute", "github-analyser", output=output)
+    try:
+        issues = get_issues(
+            "alan-turing-institute", "github-analyser", output=output, processes=2
+        )
+    finally:
+        shutdown_process_pool()
+    if output == "pandas":
+        pd.testing.assert_frame_equal(issues, expected)
+    else:
+        assert issues == expected
+
+
+def test_get_pull_requests_in_worker_processes_categorical(
+    mock_github,  # noqa: ARG001
+):
+    try:
+        prs = get_pull_requests(
+            "alan-turing-institute",
+            "empty-repo",
+            output="arrow",
+            categorical=True,
+            processes=1,
+        )
+    finally:
+        shutdown_process_pool()
+    assert prs.num_rows == 0
+    assert pa.types.is_dictionary(prs.schema.field("author").type)
+
+
+def _pull_request_node(number, updated_at):
+    return {
+        "id": f"PR_{number}",
+        "author": {"login": "alice"},
+        "changedFiles": 1,
+        "comments": {"edges": []},
+        "closed": False,
+        "closedAt": None,
+        "createdAt": "2023-01-01T00:00:00Z",
+        "merged": False,
+        "mergedAt": None,
+        "state": "OPEN",
+        "updatedAt": updated_at,
+        "totalCommentsCount": 0,
+        "reviews": {"edges": []},
+    }
+
+
+def test_get_pull_requests_since():
+    page = {
+        "data": {
+            "repository": {
+                "pullRequests": {
+                    "pageInfo": {"endCursor": "next", "hasNextPage": True},
+                    "totalCount": 30,
+                    "edges": [
+                        {"node": _pull_request_node(3, "2024-03-01T00:00:00Z")},
+                        {"node": _pull_request_node(2, "2024-02-01T00:00:00Z")},
+                        {"node": _pull_request_node(1, "2024-01-01T00:00:00Z")},
+                    ],
+                }
+            }
+        }
+    }
+    with patch.object(utils, "request_github_graphql", return_value=page) as request:
+        pull_requests = get_pull_requests(
+            "org",
+            "repo",
+            output="records",
+            since=datetime.datetime(2024, 1, 15),
+            until="2024-02-15",
+        )
+    assert [pr["id"] for pr in pull_requests] == ["PR_2"]
+    # The pages after the first pull request updated before `since` are not fetched.
+    request.assert_called_once()
+    assert "orderBy: {field: UPDATED_AT" in request.call_args[0][0]["query"]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pandas as pd
+from github_analyser.dictionaries import StringDictionary
+
+
+def test_string_dictionary():
+    dictionary = StringDictionary()
+    assert dictionary.encode_many(["mhauru", "mastoffel", "mhauru", None]) == [
+        0,
+        1,
+        0,
+        -1,
+    ]
+    assert len(dictionary) == 2
+    assert "mastoffel" in dictionary
+    assert dictionary.decode(1) == "mastoffel"
+    assert dictionary.decode(-1) is None
+    login = "".join(["mh", "auru"])
+    assert dictionary.intern(login) is dictionary.decode(0)
+    assert dictionary.intern(None) is None
+
+
+def test_categorical_dtype_grows():
+    dictionary = StringDictionary()
+    dictionary.encode("a")
+    dtype = dictionary.categorical_dtype()
+    assert dictionary.categorical_dtype() is dtype
+    dictionary.encode("b")
+    assert list(dictionary.categorical_dtype().categories) == ["a", "b"]
+    early = pd.Series(pd.Categorical.from_codes([0], dtype=dtype))
+    aligned = early.astype(dictionary.categorical_dtype())
+    assert list(aligned.cat.codes) == [0]
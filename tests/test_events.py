@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+
+from github_analyser.events import EventStore
+
+REPOSITORY = {"name": "repo", "node_id": "R_1", "default_branch": "main"}
+ISSUE = {
+    "node_id": "I_1",
+    "title": "A bug",
+    "body": "It is broken.",
+    "user": {"login": "mhauru"},
+    "created_at": "2024-02-01T10:00:00Z",
+    "closed_at": None,
+    "updated_at": "2024-02-01T10:00:00Z",
+    "comments": 0,
+    "labels": [{"name": "bug"}],
+}
+PULL_REQUEST = {
+    "node_id": "PR_1",
+    "user": {"login": "mastoffel"},
+    "changed_files": 2,
+    "state": "open",
+    "closed_at": None,
+    "created_at": "2024-02-02T10:00:00Z",
+    "merged": False,
+    "merged_at": None,
+    "updated_at": "2024-02-02T10:00:00Z",
+    "comments": 0,
+    "review_comments": 0,
+}
+EVENTS = [
+    {
+        "event": "issues",
+        "payload": {"action": "opened", "issue": ISSUE, "repository": REPOSITORY},
+    },
+    {
+        "event": "issue_comment",
+        "payload": {
+            "action": "created",
+            "issue": ISSUE,
+            "comment": {
+                "id": 1,
+                "user": {"login": "rwood-97"},
+                "created_at": "2024-02-01T11:00:00Z",
+            },
+            "repository": REPOSITORY,
+        },
+    },
+    {
+        "event": "issues",
+        "payload": {
+            "action": "closed",
+            "issue": {
+                **ISSUE,
+                "closed_at": "2024-02-03T10:00:00Z",
+                "updated_at": "2024-02-03T10:00:00Z",
+                "comments": 1,
+            },
+            "repository": REPOSITORY,
+        },
+    },
+    {
+        "event": "pull_request",
+        "payload": {
+            "action": "opened",
+            "pull_request": PULL_REQUEST,
+            "repository": REPOSITORY,
+        },
+    },
+    {
+        "event": "pull_request_review",
+        "payload": {
+            "action": "submitted",
+            "pull_request": PULL_REQUEST,
+            "review": {
+                "id": 2,
+                "user": {"login": "mhauru"},
+                "submitted_at": "2024-02-02T12:00:00Z",
+            },
+            "repository": REPOSITORY,
+        },
+    },
+    {
+        "event": "pull_request",
+        "payload": {
+            "action": "closed",
+            "pull_request": {
+                **PULL_REQUEST,
+                "state": "closed",
+                "merged": True,
+                "closed_at": "2024-02-03T10:00:00Z",
+                "merged_at": "2024-02-03T10:00:00Z",
+                "updated_at": "2024-02-03T10:00:00Z",
+            },
+            "repository": REPOSITORY,
+        },
+    },
+    {
+        "event": "push",
+        "payload": {
+            "ref": "refs/heads/main",
+            "commits": [
+                {
+                    "id": "abc123",
+                    "message": "Fix the bug\n\nIt was broken.",
+                    "author": {"name": "Markus", "username": "mhauru"},
+                    "timestamp": "2024-02-03T10:00:00Z",
+                }
+            ],
+            "repository": REPOSITORY,
+        },
+    },
+    {
+        "event": "push",
+        "payload": {
+            "ref": "refs/heads/feature",
+            "commits": [
+                {
+                    "id": "def456",
+                    "message": "Work in progress",
+                    "author": {"name": "Markus", "username": "mhauru"},
+                    "timestamp": "2024-02-03T11:00:00Z",
+                }
+            ],
+            "repository": REPOSITORY,
+        },
+    },
+]
+
+
+def test_ingest_events(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in EVENTS) + "\n")
+    store = EventStore()
+    assert store.ingest(path) == len(EVENTS)
+    assert store.gaps == set()
+
+    (issue,) = store.issues("repo", output="records")
+    assert issue["closed_at"] == "2024-02-03T10:00:00Z"
+    assert issue["comments"] == ["rwood-97"]
+    assert issue["first_comment_at"] == "2024-02-01T11:00:00Z"
+    assert issue["labels"] == ["bug"]
+
+    (pull_request,) = store.pull_requests("repo", output="records")
+    assert pull_request["state"] == "MERGED"
+    assert pull_request["closed"]
+    assert pull_request["reviews"] == ["mhauru"]
+    assert pull_request["first_review_at"] == "2024-02-02T12:00:00Z"
+
+    commits = store.commits("repo")
+    assert list(commits["hash"]) == ["abc123"]
+    assert list(commits["message"]) == ["Fix the bug"]
+    assert list(commits["login"]) == ["mhauru"]
+
+
+def test_events_for_unknown_items_are_gaps():
+    store = EventStore()
+    store.apply_all(EVENTS[1:2] + EVENTS[4:5])
+    assert store.gaps == {("issues", "repo"), ("pull_requests", "repo")}
+    store.add_issues("repo", store.issues("repo"))
+    assert store.gaps == {("pull_requests", "repo")}
+    # Seeding with a getter's output and replaying the events brings it up to date.
+    store.add_pull_requests(
+        "repo",
+        [
+            {
+                "id": "PR_1",
+                "author": "mastoffel",
+                "changed_files": 2,
+                "comments": [],
+                "comment_dates": [],
+                "closed": False,
+                "closed_at": None,
+                "created_at": "2024-02-02T10:00:00Z",
+                "merged": False,
+                "merged_at": None,
+                "state": "OPEN",
+                "updated_at": "2024-02-02T10:00:00Z",
+                "total_comments_count": 0,
+                "reviews": [],
+                "review_dates": [],
+                "first_comment_at": None,
+                "first_review_at": None,
+            }
+        ],
+    )
+    store.apply_all(EVENTS[4:6])
+    (pull_request,) = store.pull_requests("repo", output="records")
+    assert pull_request["reviews"] == ["mhauru"]
+    assert pull_request["merged"]
+    # Stale events do not overwrite newer data.
+    store.apply_all(EVENTS[3:4])
+    assert store.pull_requests("repo", output="records")[0]["merged"]
+
+
+def test_events_are_applied_once():
+    store = EventStore()
+    # Redelivered comments and reviews, and stale issue events, change nothing.
+    store.apply_all(EVENTS[:6] + EVENTS[1:2] + EVENTS[4:5] + EVENTS[0:1])
+    (issue,) = store.issues("repo", output="records")
+    assert issue["comments"] == ["rwood-97"]
+    assert issue["closed_at"] == "2024-02-03T10:00:00Z"
+    (pull_request,) = store.pull_requests("repo", output="records")
+    assert pull_request["reviews"] == ["mhauru"]
+
+
+def _comment(comment_id, login, created_at):
+    return {
+        "event": "issue_comment",
+        "payload": {
+            "action": "created",
+            "issue": ISSUE,
+            "comment": {
+                "id": comment_id,
+                "user": {"login": login},
+                "created_at": created_at,
+            },
+            "repository": REPOSITORY,
+        },
+    }
+
+
+def test_events_overlapping_the_seeded_data():
+    store = EventStore()
+    store.apply(
+        "issues", {"action": "opened", "issue": ISSUE, "repository": REPOSITORY}
+    )
+    issues = store.issues("repo", output="records")
+    # As from get_issues, after bob commented.
+    issues[0].update(
+        {
+            "comments": ["bob"],
+            "comment_dates": ["2024-02-01T10:30:00Z"],
+            "first_comment_at": "2024-02-01T10:30:00Z",
+            "updated_at": "2024-02-01T10:30:00Z",
+        }
+    )
+    store = EventStore()
+    store.add_issues("repo", issues)
+    store.apply_all(
+        [
+            _comment(3, "bob", "2024-02-01T10:30:00Z"),
+            _comment(4, "rwood-97", "2024-02-01T12:00:00Z"),
+        ]
+    )
+    (issue,) = store.issues("repo", output="records")
+    assert issue["comments"] == ["bob", "rwood-97"]
+    assert issue["comment_dates"] == ["2024-02-01T10:30:00Z", "2024-02-01T12:00:00Z"]
+    assert issue["updated_at"] == "2024-02-01T12:00:00Z"
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import github_analyser
+
+# Modules that must not be loaded just by importing the package or its submodules.
+HEAVY_MODULES = ("pandas", "pyarrow", "numpy")
+
+
+def _modules_loaded_by(statement: str) -> set[str]:
+    code = f"{statement}\nimport sys\nprint(' '.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+def test_submodule_imports_are_light():
+    statement = "\n".join(
+        f"import github_analyser.{name}" for name in sorted(github_analyser._SUBMODULES)
+    )
+    loaded = _modules_loaded_by(statement)
+    for module in HEAVY_MODULES:
+        assert module not in loaded
+
+
+def test_lazy_submodule_attribute():
+    loaded = _modules_loaded_by(
+        "import github_analyser\nassert github_analyser.issues.get_issues"
+    )
+    assert "github_analyser.issues" in loaded
+    assert "pandas" not in loaded
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import pyarrow.dataset as ds
+import pytest
+from github_analyser.commits import COMMIT_SCHEMA
+from github_analyser.issues import ISSUE_SCHEMA
+from github_analyser.loaders import load_commits, load_issues, load_repos
+from github_analyser.output import save_output, to_output
+
+from .conftest import null_columns
+
+
+def _issues(repo_name, created_at):
+    columns = null_columns(
+        ISSUE_SCHEMA,
+        len(created_at),
+        id=[f"{repo_name}-{i}" for i in range(len(created_at))],
+        author=["alice", "bob"][: len(created_at)],
+        created_at=created_at,
+        updated_at=created_at,
+        comments=[[] for _ in created_at],
+        labels=[[] for _ in created_at],
+    )
+    return to_output(columns, ISSUE_SCHEMA, "arrow")
+
+
+@pytest.fixture(params=["parquet", "csv"])
+def data_dir(request, tmp_path):
+    file_format = request.param
+    for repo_name in ("one", "two"):
+        part_dir = tmp_path / "org" / "issues" / f"repo={repo_name}"
+        part_dir.mkdir(parents=True)
+        issues = _issues(repo_name, ["2023-06-01T10:00:00Z", "2024-02-01T10:00:00Z"])
+        save_output(issues, part_dir / f"part-0.{file_format}")
+    save_output(
+        to_output({"name": ["one", "two"]}, {"name": "string"}, "arrow"),
+        tmp_path / "org" / f"repos.{file_format}",
+    )
+    return tmp_path, file_format
+
+
+def test_load_issues(data_dir):
+    path, file_format = data_dir
+    issues = load_issues(
+        "org", data_dir=path, file_format=file_format, output="records"
+    )
+    assert len(issues) == 4
+    assert {issue["repo"] for issue in issues} == {"one", "two"}
+
+
+def test_load_issues_filters(data_dir):
+    path, file_format = data_dir
+    issues = load_issues(
+        "org",
+        "two",
+        since="2024-01-01",
+        columns=["id", "created_at"],
+        data_dir=path,
+        file_format=file_format,
+        output="records",
+    )
+    assert issues == [{"id": "two-1", "created_at": "2024-02-01T10:00:00Z"}]
+
+    issues = load_issues(
+        "org",
+        until="2024-01-01",
+        authors=["alice"],
+        filter=ds.field("repo") == "one",
+        columns=["id"],
+        data_dir=path,
+        file_format=file_format,
+        output="records",
+    )
+    assert issues == [{"id": "one-0"}]
+
+    # As for get_issues, until includes issues updated exactly then.
+    issues = load_issues(
+        "org",
+        "one",
+        until="2024-02-01T10:00:00Z",
+        columns=["id"],
+        data_dir=path,
+        file_format=file_format,
+        output="records",
+    )
+    assert issues == [{"id": "one-0"}, {"id": "one-1"}]
+
+
+def test_load_commits_compares_dates_in_utc(tmp_path):
+    # In UTC, a is from 2023 and b from 2024, the opposite of how they sort as text.
+    columns = null_columns(
+        COMMIT_SCHEMA,
+        2,
+        hash=["a", "b"],
+        date=["2024-01-01T00:30:00+01:00", "2023-12-31T23:45:00-01:00"],
+    )
+    part_dir = tmp_path / "org" / "commits" / "repo=one"
+    part_dir.mkdir(parents=True)
+    save_output(to_output(columns, COMMIT_SCHEMA, "arrow"), part_dir / "part-0.parquet")
+    since = load_commits("org", since="2024-01-01", data_dir=tmp_path, output="records")
+    assert [commit["hash"] for commit in since] == ["b"]
+    until = load_commits(
+        "org", until="2023-12-31T23:30:00Z", data_dir=tmp_path, output="records"
+    )
+    assert [commit["hash"] for commit in until] == ["a"]
+    until = load_commits("org", until="2024-01-01", data_dir=tmp_path, output="records")
+    assert [commit["hash"] for commit in until] == ["a"]
+
+
+def test_load_repos(data_dir):
+    path, file_format = data_dir
+    repos = load_repos("org", data_dir=path, file_format=file_format)
+    assert list(repos["name"]) == ["one", "two"]
+
+
+def test_load_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_issues("org", data_dir=tmp_path)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import datetime
+
+import pandas as pd
+from github_analyser.metrics import (
+    grouped_metric,
+    issue_metrics,
+    pull_request_metrics,
+    rolling_metric,
+    team_metric,
+)
+
+PULL_REQUESTS = pd.DataFrame(
+    {
+        "id": ["PR_1", "PR_2", "PR_3"],
+        "author": ["mhauru", "mastoffel", "mhauru"],
+        "created_at": [
+            "2024-02-01T10:00:00Z",
+            "2024-02-02T10:00:00Z",
+            "2024-02-20T10:00:00Z",
+        ],
+        "merged_at": ["2024-02-01T12:00:00Z", None, "2024-02-21T10:00:00Z"],
+        "closed_at": ["2024-02-01T12:00:00Z", "2024-02-03T10:00:00Z", None],
+        "first_review_at": ["2024-02-01T11:00:00Z", None, "2024-02-20T10:30:00Z"],
+        "first_comment_at": [None, "2024-02-02T10:05:00Z", None],
+    }
+)
+ISSUES = [
+    {
+        "id": "I_1",
+        "author": "mhauru",
+        "created_at": "2024-02-27T12:00:00Z",
+        "closed_at": None,
+        "first_comment_at": "2024-02-28T12:00:00Z",
+    },
+    {
+        "id": "I_2",
+        "author": "mastoffel",
+        "created_at": "2024-02-01T12:00:00Z",
+        "closed_at": "2024-02-02T12:00:00Z",
+        "first_comment_at": None,
+    },
+]
+
+
+def test_pull_request_metrics():
+    prs = PULL_REQUESTS.copy()
+    metrics = pull_request_metrics(prs)
+    assert metrics.loc[0, "time_to_merge"] == pd.Timedelta(hours=2)
+    assert pd.isna(metrics.loc[1, "time_to_merge"])
+    assert metrics.loc[1, "time_to_close"] == pd.Timedelta(days=1)
+    assert metrics.loc[2, "time_to_first_review"] == pd.Timedelta(minutes=30)
+    assert metrics.loc[1, "time_to_first_comment"] == pd.Timedelta(minutes=5)
+    # The source frame is left as it is.
+    assert list(prs.columns) == list(PULL_REQUESTS.columns)
+    # The metrics are cached, but not reused once the source frame changes.
+    metrics.loc[0, "time_to_merge"] = pd.Timedelta(hours=3)
+    assert pull_request_metrics(prs).loc[0, "time_to_merge"] == pd.Timedelta(hours=2)
+    prs.loc[0, "merged_at"] = "2024-02-01T14:00:00Z"
+    assert pull_request_metrics(prs).loc[0, "time_to_merge"] == pd.Timedelta(hours=4)
+
+
+def test_issue_metrics():
+    as_of = datetime.datetime(2024, 3, 1, 12, tzinfo=datetime.timezone.utc)
+    metrics = issue_metrics(ISSUES, as_of=as_of)
+    assert metrics.loc[0, "open_age"] == pd.Timedelta(days=3)
+    assert pd.isna(metrics.loc[1, "open_age"])
+    assert metrics.loc[1, "time_to_close"] == pd.Timedelta(days=1)
+    assert metrics.loc[0, "time_to_first_comment"] == pd.Timedelta(days=1)
+
+
+def test_summaries():
+    metrics = pull_request_metrics(PULL_REQUESTS, cache=False)
+    rolling = rolling_metric(metrics, "time_to_first_review", window="7D")
+    assert rolling.iloc[-1] == pd.Timedelta(minutes=30)
+    by_author = grouped_metric(metrics, "time_to_merge", "author", statistic="mean")
+    assert by_author["mhauru"] == pd.Timedelta(hours=13)
+    team_members = [
+        {"team_slug": "research", "login": "mhauru"},
+        {"team_slug": "research", "login": "mastoffel"},
+        {"team_slug": "socks", "login": "mastoffel"},
+    ]
+    by_team = team_metric(metrics, "time_to_close", team_members, statistic="max")
+    assert by_team["research"] == pd.Timedelta(days=1)
+    assert by_team["socks"] == pd.Timedelta(days=1)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import datetime
+from unittest.mock import patch
+
+import pytest
+from github_analyser import planner
+from github_analyser.output import to_output
+from github_analyser.planner import _with_dry_run, plan_crawl
+from github_analyser.repos import REPO_SCHEMA
+
+from .conftest import null_columns
+
+COSTS = {"repositories": 1, "issues": 2, "pullRequests": 1, "history": 1, "nodes": 1}
+
+
+def _repos(counts):
+    columns = null_columns(
+        REPO_SCHEMA, len(counts), name=list(counts), issue_count=list(counts.values())
+    )
+    return to_output(columns, REPO_SCHEMA, "records")
+
+
+def _request(payload):
+    query = payload["query"]
+    assert "rateLimit(dryRun: true)" in query
+    cost = next(cost for name, cost in COSTS.items() if f"{name}(" in query)
+    reset_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+        minutes=30
+    )
+    return {
+        "data": {
+            "rateLimit": {
+                "cost": cost,
+                "limit": 5000,
+                "remaining": 100,
+                "resetAt": f"{reset_at:%Y-%m-%dT%H:%M:%SZ}",
+            }
+        }
+    }
+
+
+def test_with_dry_run():
+    query = _with_dry_run("query ($cursor: String) { viewer { login } }")
+    assert query.startswith("query ($cursor: String) {\nrateLimit(dryRun: true)")
+
+
+def test_plan_crawl():
+    repos = _repos({"one": 250, "two": 0})
+    with patch.object(planner, "request_github_graphql", side_effect=_request):
+        estimate = plan_crawl(
+            "org", resources=("issues",), repos=repos, output="records"
+        )
+    assert estimate["resources"] == [
+        {
+            "resource": "repos",
+            "repos": 2,
+            "items": 2,
+            "page_size": 100,
+            "pages": 0,
+            "cost_per_page": 1,
+            "points": 0,
+        },
+        {
+            "resource": "issues",
+            "repos": 2,
+            "items": 250,
+            "page_size": 100,
+            "pages": 4,
+            "cost_per_page": 2,
+            "points": 8,
+        },
+    ]
+    assert estimate["points"] == 8
+    assert estimate["fits"]
+    assert estimate["windows"] == 1
+    assert estimate["concurrency"] == 1
+
+    # Only the repos that changed since the snapshot are counted.
+    snapshot = _repos({"one": 250, "two": 0})
+    with patch.object(planner, "request_github_graphql", side_effect=_request):
+        estimate = plan_crawl(
+            "org",
+            resources=("issues",),
+            repos=_repos({"one": 250, "two": 1}),
+            snapshot=snapshot,
+        )
+    assert estimate["pages"] == 1
+    assert list(estimate["resources"]["repos"]) == [2, 1]
+
+
+def test_plan_crawl_over_budget():
+    repos = _repos({str(i): 10_000 for i in range(10)})
+    with patch.object(planner, "request_github_graphql", side_effect=_request):
+        estimate = plan_crawl("org", resources=("issues",), repos=repos)
+    assert estimate["points"] == 2000
+    assert not estimate["fits"]
+    assert estimate["windows"] == 2
+    assert estimate["seconds"] >= 25 * 60
+
+
+def test_plan_crawl_unknown_resource():
+    with pytest.raises(ValueError, match="Unknown resources"):
+        plan_crawl("org", resources=("wikis",), repos=_repos({}))
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import pytest
+from github_analyser import utils
+from github_analyser.repo_stats import (
+    get_commit_activity,
+    get_contributor_stats,
+    get_participation,
+)
+
+CONTRIBUTORS = [
+    {
+        "author": {"login": "mhauru"},
+        "total": 3,
+        "weeks": [
+            {"w": 1706400000, "a": 10, "d": 2, "c": 2},
+            {"w": 1707004800, "a": 0, "d": 0, "c": 0},
+            {"w": 1707609600, "a": 5, "d": 1, "c": 1},
+        ],
+    },
+]
+
+
+class _FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.content = json.dumps(data).encode()
+        self.headers = {"Content-Encoding": "gzip"}
+
+
+def _fake_stats(data_by_repo, num_computing):
+    """Fake GitHub answering 202 to the first `num_computing` requests per repo."""
+    calls = []
+
+    def get(url, **kwargs):  # noqa: ARG001
+        repo_name = url.split("/")[-3]
+        calls.append(repo_name)
+        if calls.count(repo_name) <= num_computing:
+            return _FakeResponse(202, {})
+        return _FakeResponse(200, data_by_repo[repo_name])
+
+    return get, calls
+
+
+@pytest.mark.usefixtures("_github_token")
+def test_get_contributor_stats_polls_repos_together():
+    get, calls = _fake_stats({"one": CONTRIBUTORS, "two": []}, num_computing=2)
+    sleeps: list[float] = []
+    with patch.object(utils.requests, "get", side_effect=get), patch.object(
+        utils.time, "sleep", side_effect=sleeps.append
+    ):
+        stats = get_contributor_stats("org", ["one", "two"], output="records")
+    # Both repos are requested in each round, with one sleep per round.
+    assert sorted(calls[:2]) == ["one", "two"]
+    assert sorted(calls[2:4]) == ["one", "two"]
+    assert len(sleeps) == 2
+    assert stats == [
+        {
+            "repo_name": "one",
+            "login": "mhauru",
+            "week": "2024-01-28",
+            "commits": 2,
+            "additions": 10,
+            "deletions": 2,
+        },
+        {
+            "repo_name": "one",
+            "login": "mhauru",
+            "week": "2024-02-11",
+            "commits": 1,
+            "additions": 5,
+            "deletions": 1,
+        },
+    ]
+
+
+@pytest.mark.usefixtures("_github_token")
+def test_get_stats_gives_up_after_max_tries():
+    participation = {"all": [1, 2, 3], "owner": [0, 1, 0]}
+    get, calls = _fake_stats({"one": participation}, num_computing=10)
+    with patch.object(utils.requests, "get", side_effect=get), patch.object(
+        utils.time, "sleep"
+    ):
+        assert get_participation("org", ["one"], max_tries=2).empty
+    assert len(calls) == 3
+
+    get, calls = _fake_stats({"one": participation}, num_computing=0)
+    with patch.object(utils.requests, "get", side_effect=get):
+        result = get_participation("org", ["one"], output="records")
+    assert [row["weeks_ago"] for row in result] == [2, 1, 0]
+    assert [row["all"] for row in result] == [1, 2, 3]
+
+
+@pytest.mark.usefixtures("_github_token")
+def test_get_commit_activity():
+    activity = [{"days": [0, 3, 2, 0, 0, 1, 0], "total": 6, "week": 1706400000}]
+    get, _ = _fake_stats({"one": activity}, num_computing=1)
+    with patch.object(utils.requests, "get", side_effect=get), patch.object(
+        utils.time, "sleep"
+    ):
+        result = get_commit_activity("org", ["one"], output="arrow")
+    assert result.column("commits").to_pylist() == [6]
+    assert result.column("days").to_pylist() == [[0, 3, 2, 0, 0, 1, 0]]
+
+
+@pytest.mark.usefixtures("_github_token")
+def test_get_stats_isolates_failed_repos():
+    participation = {"all": [1, 2, 3], "owner": [0, 1, 0]}
+    get, _ = _fake_stats({"one": participation}, num_computing=0)
+
+    def get_or_404(url, **kwargs):
+        if "/gone/" in url:
+            return _FakeResponse(404, {"message": "Not Found"})
+        return get(url, **kwargs)
+
+    with patch.object(utils.requests, "get", side_effect=get_or_404):
+        result = get_participation("org", ["one", "gone"], output="records")
+        assert {row["repo_name"] for row in result} == {"one"}
+        result, errors = get_participation(
+            "org", ["one", "gone"], output="records", errors="return"
+        )
+        assert len(result) == 3
+        assert [error["item"] for error in errors] == ["gone"]
+        assert "404" in errors[0]["message"]
+        with pytest.raises(Exception, match="1 of 2 repositories failed"):
+            get_participation("org", ["one", "gone"], errors="raise")
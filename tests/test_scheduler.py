@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import datetime
+from unittest.mock import patch
+
+import pytest
+from github_analyser import crawl, planner, scheduler
+from github_analyser.output import to_output
+from github_analyser.repos import REPO_SCHEMA
+from github_analyser.scheduler import CrawlScheduler, job_priority
+
+from .conftest import null_columns
+
+NOW = datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc)
+
+
+def _repos(updated_at):
+    columns = null_columns(
+        REPO_SCHEMA,
+        len(updated_at),
+        name=list(updated_at),
+        updated_at=list(updated_at.values()),
+        issue_count=[150] * len(updated_at),
+    )
+    return to_output(columns, REPO_SCHEMA, "records")
+
+
+def _cost(query, variables=None):  # noqa: ARG001
+    return {
+        "cost": 1,
+        "limit": 5000,
+        "remaining": 5000,
+        "resetAt": "2024-06-01T01:00:00Z",
+    }
+
+
+def test_job_priority():
+    recent = job_priority("2024-05-31T00:00:00Z", None, now=NOW)
+    old = job_priority("2023-06-01T00:00:00Z", None, now=NOW)
+    assert recent > old
+    fresh = job_priority("2024-05-31T00:00:00Z", "2024-05-31T12:00:00Z", now=NOW)
+    assert fresh < recent
+    assert job_priority("2023-06-01T00:00:00Z", None, weight=1000, now=NOW) > recent
+
+
+def test_scheduler_runs_within_budget():
+    calls = []
+
+    def get_issues(org_name, repo_name, output, categorical):  # noqa: ARG001
+        calls.append(repo_name)
+        if repo_name == "broken":
+            msg = "Not found"
+            raise Exception(msg)
+        return [{"repo": repo_name}]
+
+    repos = _repos(
+        {
+            "old": "2023-01-01T00:00:00Z",
+            "recent": "2024-05-31T00:00:00Z",
+            "broken": "2024-05-30T00:00:00Z",
+            "weighted": "2022-01-01T00:00:00Z",
+        }
+    )
+    jobs = CrawlScheduler("org", max_workers=1, output="records")
+    assert jobs.add(repos, ("issues",), weights={"weighted": 1000}, now=NOW) == 4
+    assert jobs.pending() == [
+        ("issues", "weighted"),
+        ("issues", "recent"),
+        ("issues", "broken"),
+        ("issues", "old"),
+    ]
+    with patch.object(planner, "request_github_graphql") as request, patch.dict(
+        crawl.GETTERS, {"issues": get_issues}
+    ):
+        request.side_effect = lambda payload: {"data": {"rateLimit": _cost(payload)}}
+        assert jobs.estimate("issues", "old") == 2
+        # The budget covers the three highest priority jobs, one of which fails.
+        results = jobs.run(budget=6)
+    assert sorted(calls) == ["broken", "recent", "weighted"]
+    assert set(results["issues"]) == {"recent", "weighted"}
+    assert jobs.pending() == [("issues", "broken"), ("issues", "old")]
+
+
+def test_scheduler_run_all_waits_for_windows():
+    repos = _repos({"a": "2024-05-31T00:00:00Z", "b": "2024-05-30T00:00:00Z"})
+    jobs = CrawlScheduler("org", output="records")
+    jobs.add(repos, ("issues",), now=NOW)
+    sleeps: list[float] = []
+    with patch.object(planner, "query_cost", side_effect=_cost), patch.object(
+        scheduler, "query_cost", side_effect=_cost
+    ), patch.object(
+        scheduler,
+        "rate_limit",
+        return_value={"limit": 2, "remaining": 2, "resetAt": "2024-06-01T01:00:00Z"},
+    ), patch.dict(
+        crawl.GETTERS, {"issues": lambda *_, **__: []}
+    ):
+        results = jobs.run_all(sleep=sleeps.append)
+    assert set(results["issues"]) == {"a", "b"}
+    assert len(sleeps) == 1
+    assert len(jobs) == 0
+
+
+def _get_issues(org_name, repo_name, output, categorical):  # noqa: ARG001
+    if repo_name == "gone":
+        msg = "Could not resolve to a Repository"
+        raise Exception(msg)
+    return []
+
+
+def test_scheduler_drops_jobs_that_keep_failing():
+    repos = _repos({"a": "2024-05-31T00:00:00Z", "gone": "2024-05-30T00:00:00Z"})
+    jobs = CrawlScheduler("org", max_attempts=2, output="records")
+    jobs.add(repos, ("issues",), now=NOW)
+    with patch.object(planner, "query_cost", side_effect=_cost), patch.object(
+        scheduler, "query_cost", side_effect=_cost
+    ), patch.dict(crawl.GETTERS, {"issues": _get_issues}):
+        results = jobs.run(budget=4)
+        assert set(results["issues"]) == {"a"}
+        assert jobs.pending() == [("issues", "gone")]
+        jobs.run(budget=4)
+    assert len(jobs) == 0
+    assert list(jobs.failures["issues"]) == ["gone"]
+    # Adding the job again gives it all its attempts back.
+    jobs.add(repos, ("issues",), now=NOW)
+    assert jobs.failures["issues"] == {}
+
+
+def test_scheduler_run_all_stops_without_progress():
+    repos = _repos({"a": "2024-05-31T00:00:00Z", "gone": "2024-05-30T00:00:00Z"})
+    jobs = CrawlScheduler("org", output="records")
+    jobs.add(repos, ("issues",), now=NOW)
+    sleeps: list[float] = []
+    # Another client spent some of each window, so it is never full.
+    with patch.object(planner, "query_cost", side_effect=_cost), patch.object(
+        scheduler, "query_cost", side_effect=_cost
+    ), patch.object(
+        scheduler,
+        "rate_limit",
+        return_value={"limit": 5, "remaining": 2, "resetAt": "2024-06-01T01:00:00Z"},
+    ), patch.dict(
+        crawl.GETTERS, {"issues": _get_issues}
+    ):
+        results = jobs.run_all(sleep=sleeps.append)
+    assert set(results["issues"]) == {"a"}
+    # The window in which only the failing job ran was the last.
+    assert len(sleeps) == 1
+    assert jobs.pending() == [("issues", "gone")]
+
+
+def test_scheduler_unknown_resource():
+    with pytest.raises(ValueError, match="Unknown resources"):
+        CrawlScheduler("org").add(_repos({}), ("wikis",))
@@ -1,7 +1,262 @@
-from github_analyser.utils import camel_to_snake
+import datetime
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from github_analyser import utils
+from github_analyser.repos import _get_repos_query
+from github_analyser.utils import (
+    ConcurrencyController,
+    SingleFlight,
+    camel_to_snake,
+    decode_json,
+    filter_pages,
+    github_timestamp,
+    iter_pages,
+    parse_timestamp,
+    request_github_graphql,
+    updated_before,
+)
 
 
 def test_camel_to_snake():
     camel = "camelCase"
     snake = "camel_case"
     assert camel_to_snake(camel) == snake
+
+
+def test_decode_json():
+    pytest.importorskip("orjson")
+    content = b'{"data": {"login": "mhauru", "ids": [1, 2], "closedAt": null}}'
+    expected = {"data": {"login": "mhauru", "ids": [1, 2], "closedAt": None}}
+    assert decode_json(content) == expected
+    with patch.object(utils, "orjson", None):
+        assert decode_json(content) == expected
+
+
+def test_request_asks_for_compression(mock_github):
+    payload = {
+        "query": _get_repos_query("alan-turing-institute"),
+        "variables": {"pagination_cursor": None},
+    }
+    request_github_graphql(payload)
+    request = mock_github.calls[-1].request
+    assert request.headers["Accept-Encoding"] == utils.ACCEPT_ENCODING
+
+
+def test_single_flight_shares_concurrent_calls():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait()
+        return {"data": len(calls)}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(single_flight.do("key", func)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    # Wait until the first call is running and the others are waiting for it.
+    while not calls:
+        time.sleep(0.001)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
+    # Once the call has finished, the next one runs again.
+    assert single_flight.do("key", func) == {"data": 2}
+
+
+def test_single_flight_shares_errors():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def func():
+        started.set()
+        release.wait()
+        msg = "GitHub query failed by code 502."
+        raise Exception(msg)
+
+    errors = []
+
+    def call():
+        try:
+            single_flight.do("key", func)
+        except Exception as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+
+
+class _FakeResponse:
+    def __init__(self, status_code, content=b"{}", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+def test_concurrency_controller_aimd():
+    controller = ConcurrencyController(initial=4, maximum=5, cooldown=60)
+    for _ in range(4):
+        controller.acquire()
+    assert controller.in_flight == 4
+    controller.release(healthy=True)
+    assert controller.limit == pytest.approx(4.25)
+    controller.release(healthy=False)
+    controller.release(healthy=False)
+    # Failures within the cooldown only cut the limit once.
+    assert controller.limit == pytest.approx(4.25 / 2)
+    controller.release(healthy=True)
+    assert controller.in_flight == 0
+    for _ in range(100):
+        controller.acquire()
+        controller.release(healthy=True)
+    assert controller.limit == 5
+
+
+@pytest.mark.usefixtures("_github_token")
+def test_request_retries_when_overloaded():
+    responses = [
+        _FakeResponse(502),
+        _FakeResponse(403, b'{"message": "You have exceeded a secondary rate limit"}'),
+        _FakeResponse(429, headers={"Retry-After": "3"}),
+        _FakeResponse(200, b'{"data": {"ok": true}}'),
+    ]
+    sleeps: list[float] = []
+    with patch.object(utils.requests, "post", side_effect=responses), patch.object(
+        utils.time, "sleep", side_effect=sleeps.append
+    ), patch.object(utils, "CONTROLLER", ConcurrencyController(cooldown=0)):
+        assert request_github_graphql({"query": "{ ok }"}) == {"data": {"ok": True}}
+        assert utils.CONTROLLER.limit < 4
+    assert len(sleeps) == 3
+    assert sleeps[2] == 3
+
+
+@pytest.mark.usefixtures("_github_token")
+def test_request_does_not_retry_other_errors():
+    forbidden = _FakeResponse(403, b'{"message": "Resource not accessible"}')
+    with patch.object(
+        utils.requests, "post", return_value=forbidden
+    ) as post, pytest.raises(Exception, match="code 403"):
+        request_github_graphql({"query": "{ forbidden }"})
+    assert post.call_count == 1
+
+
+def _numbered_pages(num_pages, fail_at=None):
+    """Fake `request_github_graphql` for a query with `num_pages` pages."""
+    requested = []
+
+    def request(payload):
+        page = (
+            0
+            if payload["variables"]["cursor"] is None
+            else payload["variables"]["cursor"]
+        )
+        requested.append(page)
+        if page == fail_at:
+            msg = "GitHub query failed by code 502."
+            raise Exception(msg)
+        has_next_page = page + 1 < num_pages
+        return {
+            "data": {
+                "page": page,
+                "items": {
+                    "pageInfo": {"endCursor": page + 1, "hasNextPage": has_next_page}
+                },
+            }
+        }
+
+    return request, requested
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_iter_pages(prefetch):
+    request, requested = _numbered_pages(5)
+    with patch.object(utils, "request_github_graphql", side_effect=request):
+        pages = iter_pages("query", ["data", "items"], "cursor", prefetch=prefetch)
+        assert [page["data"]["page"] for page in pages] == [0, 1, 2, 3, 4]
+    assert requested == [0, 1, 2, 3, 4]
+
+
+def test_iter_pages_stops_early_and_raises():
+    request, requested = _numbered_pages(100, fail_at=3)
+    with patch.object(utils, "request_github_graphql", side_effect=request):
+        pages = iter_pages("query", ["data", "items"], "cursor", prefetch=2)
+        assert next(pages)["data"]["page"] == 0
+        # iter_pages is a generator, typed as an Iterator.
+        pages.close()  # type: ignore[attr-defined]
+        # The fetcher stops after filling the queue, instead of fetching every page.
+        time.sleep(0.3)
+        assert len(requested) < 5
+
+        pages = iter_pages("query", ["data", "items"], "cursor", prefetch=2)
+        assert [next(pages)["data"]["page"] for _ in range(3)] == [0, 1, 2]
+        with pytest.raises(Exception, match="code 502"):
+            next(pages)
+
+
+def test_github_timestamp():
+    assert github_timestamp("2024-01-31") == "2024-01-31T00:00:00Z"
+    assert github_timestamp("2024-01-31T13:00:00+01:00") == "2024-01-31T12:00:00Z"
+
+
+def test_parse_timestamp():
+    utc = datetime.timezone.utc
+    expected = datetime.datetime(2024, 1, 31, 12, tzinfo=utc)
+    assert parse_timestamp("2024-01-31T12:00:00Z") == expected
+    assert parse_timestamp("2024-01-31T13:00:00+01:00") == expected
+    assert parse_timestamp(datetime.datetime(2024, 1, 31, 12)) == expected
+    assert parse_timestamp("2024-01-31T13:00:00+01:00").tzinfo == utc
+
+
+def test_filter_pages_stops_after_window():
+    def request(payload):
+        page = payload["variables"]["cursor"] or 0
+        updated_at = [f"2024-01-{30 - 5 * page - i:02d}T00:00:00Z" for i in range(5)]
+        return {
+            "data": {
+                "items": {
+                    "pageInfo": {"endCursor": page + 1, "hasNextPage": page < 4},
+                    "edges": [{"node": {"updatedAt": t}} for t in updated_at],
+                }
+            }
+        }
+
+    edges_path = ["data", "items", "edges"]
+    since = "2024-01-18T00:00:00Z"
+    with patch.object(utils, "request_github_graphql", side_effect=request) as mock:
+        pages = iter_pages(
+            "query",
+            ["data", "items"],
+            "cursor",
+            last_page=updated_before(since, edges_path),
+        )
+        filtered = filter_pages(pages, edges_path, since, "2024-01-28T00:00:00Z")
+        kept = [
+            edge["node"]["updatedAt"][8:10]
+            for page in filtered
+            for edge in page["data"]["items"]["edges"]
+        ]
+    assert kept == [f"{day:02d}" for day in range(28, 17, -1)]
+    # The page with the first node before `since` is the last one fetched.
+    assert mock.call_count == 3